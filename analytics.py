@@ -0,0 +1,235 @@
+"""
+HaberMetrik - DuckDB Analitik Motoru
+
+Haber arşivinin kolon tabanlı bir kopyasını yerel bir DuckDB dosyasında tutar
+ve zaman/kaynak toplamalarını (saatlik dağılım, kaynak hızları, bugün/dün
+karşılaştırması, çok aylık günlük dağılım) buradan yanıtlar.
+
+SQLite ana kaynak olmaya devam eder. Kopya her sorgudan önce id üzerinden
+artımlı olarak senkronize edilir. Silmeler haber tablosu taranarak değil,
+silme fonksiyonlarının aynı işlemde artırdığı 'news_deletes' veri sürümüyle
+tespit edilir; sürüm değişmişse kopya baştan kurulur. Saat/gün kovaları
+senkronizasyon sırasında SQLite'ın kendi strftime'ı ile hesaplanır, böylece
+sonuçlar SQLite yoluyla birebir aynıdır.
+
+DuckDB dosyasını aynı anda yalnızca bir süreç açabilir (salt okunur açış da
+yazıcı açıkken reddedilir). Motor tek süreçli kurulum içindir: 'python app.py'
+veya tek worker'lı gunicorn. Dosyayı açamayan süreç (ör. çok worker'lı
+kurulumda ikinci worker) ANALYTICS_RETRY_SECONDS boyunca SQLite sorgularını
+kullanır ve sonra yeniden dener. İki yolun sayıları aynıdır (parite:
+tests/test_analytics.py); değişen yalnızca izin verilen aralıktır:
+/api/time-series bu sürede SQLite sınırlarına (7 gün saatlik, 31 gün günlük)
+döner. Geçiş her seferinde günlüğe yazılır.
+duckdb kurulu değilse veya ANALYTICS_BACKEND 'duckdb' değilse modül devre dışıdır.
+"""
+
+import threading
+import time
+from config import ANALYTICS_BACKEND, DUCKDB_PATH, ANALYTICS_RETRY_SECONDS
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Senkronizasyonda tek seferde aktarılan satır sayısı
+SYNC_BATCH_SIZE = 10000
+
+_lock = threading.Lock()
+_conn = None
+_unavailable_until = 0.0  # Dosya kilitliyse bu zamana kadar SQLite kullanılır
+
+
+def is_enabled():
+    """
+    DuckDB analitik motoru kullanılabilir mi?
+
+    Dosya son denemede açılamadıysa ANALYTICS_RETRY_SECONDS dolana kadar False.
+    """
+    return (ANALYTICS_BACKEND == 'duckdb' and duckdb is not None
+            and time.time() >= _unavailable_until)
+
+
+def _get_conn():
+    """DuckDB bağlantısını aç (süreç başına tek bağlantı)"""
+    global _conn, _unavailable_until
+
+    if _conn is None:
+        try:
+            _conn = duckdb.connect(DUCKDB_PATH)
+        except Exception as e:
+            # Genellikle dosya başka bir süreç (ingest veya diğer worker) tarafından kilitli
+            print(f"DuckDB açılamadı, {ANALYTICS_RETRY_SECONDS} sn SQLite kullanılacak: {e}")
+            _unavailable_until = time.time() + ANALYTICS_RETRY_SECONDS
+            return None
+
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS news_facts (
+                id BIGINT NOT NULL,
+                source VARCHAR NOT NULL,
+                ts VARCHAR,
+                hour VARCHAR,
+                day VARCHAR
+            )
+        ''')
+        _conn.execute('CREATE TABLE IF NOT EXISTS sync_state (deletes_version BIGINT NOT NULL)')
+    return _conn
+
+
+def _sync(conn):
+    """
+    SQLite'taki yeni haberleri DuckDB'ye aktar (kilit altında çağrılır)
+
+    Returns:
+        Aktarılan satır sayısı
+    """
+    from database import get_connection, get_data_version
+
+    last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM news_facts').fetchone()[0]
+
+    # Son senkronizasyondan beri haber silindiyse kopyayı baştan kur
+    deletes_version = get_data_version('news_deletes')
+    synced_version = conn.execute('SELECT MAX(deletes_version) FROM sync_state').fetchone()[0]
+    if synced_version != deletes_version:
+        conn.execute('DELETE FROM news_facts')
+        conn.execute('DELETE FROM sync_state')
+        conn.execute('INSERT INTO sync_state VALUES (?)', [deletes_version])
+        last_id = 0
+
+    sqlite_conn = get_connection()
+    cursor = sqlite_conn.cursor()
+
+    cursor.execute(
+        '''SELECT
+            id,
+            source,
+            COALESCE(pub_date, created_at) as ts,
+            strftime('%Y-%m-%d %H:00', COALESCE(pub_date, created_at)) as hour,
+            strftime('%Y-%m-%d', COALESCE(pub_date, created_at)) as day
+           FROM news
+           WHERE id > ?
+           ORDER BY id ASC''',
+        (last_id,)
+    )
+
+    synced = 0
+    while True:
+        rows = cursor.fetchmany(SYNC_BATCH_SIZE)
+        if not rows:
+            break
+        conn.executemany(
+            'INSERT INTO news_facts VALUES (?, ?, ?, ?, ?)',
+            [tuple(row) for row in rows]
+        )
+        synced += len(rows)
+
+    sqlite_conn.close()
+    return synced
+
+
+def sync():
+    """Kopyayı SQLite ile eşitle (dışarıdan çağrı için)"""
+    if not is_enabled():
+        return 0
+    with _lock:
+        conn = _get_conn()
+        if conn is None:
+            return 0
+        return _sync(conn)
+
+
+def _query(sql, params):
+    """
+    Senkronize et ve sorguyu çalıştır
+
+    Returns:
+        Satır listesi veya motor kullanılamıyorsa None
+    """
+    if not is_enabled():
+        return None
+
+    with _lock:
+        conn = _get_conn()
+        if conn is None:
+            return None
+        try:
+            _sync(conn)
+            return conn.execute(sql, params).fetchall()
+        except Exception as e:
+            print(f"DuckDB sorgu hatası, SQLite kullanılacak: {e}")
+            return None
+
+
+def _ts_param(value):
+    """datetime'ı sqlite3'ün varsayılan adaptörüyle aynı stringe çevir"""
+    return value.isoformat(' ')
+
+
+def hourly_distribution(time_ago):
+    """database.get_hourly_distribution karşılığı"""
+    rows = _query(
+        '''SELECT hour, COUNT(*) as count
+           FROM news_facts
+           WHERE ts >= ?
+           GROUP BY hour
+           ORDER BY hour ASC NULLS FIRST''',
+        [_ts_param(time_ago)]
+    )
+    if rows is None:
+        return None
+    return [{'hour': hour, 'count': count} for hour, count in rows]
+
+
+def daily_distribution(time_ago):
+    """database.get_daily_distribution karşılığı"""
+    rows = _query(
+        '''SELECT day, COUNT(*) as count
+           FROM news_facts
+           WHERE ts >= ?
+           GROUP BY day
+           ORDER BY day ASC NULLS FIRST''',
+        [_ts_param(time_ago)]
+    )
+    if rows is None:
+        return None
+    return [{'day': day, 'count': count} for day, count in rows]
+
+
+def source_speed_metrics(time_ago):
+    """database.get_source_speed_metrics karşılığı"""
+    rows = _query(
+        '''SELECT
+            source,
+            COUNT(*) as total,
+            ROUND(CAST(COUNT(*) AS DOUBLE) / 6.0, 2) as avg_per_hour
+           FROM news_facts
+           WHERE ts >= ?
+           GROUP BY source
+           ORDER BY avg_per_hour DESC, source ASC''',
+        [_ts_param(time_ago)]
+    )
+    if rows is None:
+        return None
+    return [
+        {'source': source, 'total': total, 'avg_per_hour': avg_per_hour}
+        for source, total, avg_per_hour in rows
+    ]
+
+
+def comparison_counts(last_24h, prev_24h_start, prev_24h_end):
+    """
+    database.get_comparison_stats için ham sayılar
+
+    Returns:
+        (today_count, yesterday_count) veya None
+    """
+    rows = _query(
+        '''SELECT
+            COUNT(*) FILTER (WHERE ts >= ?),
+            COUNT(*) FILTER (WHERE ts >= ? AND ts < ?)
+           FROM news_facts''',
+        [_ts_param(last_24h), _ts_param(prev_24h_start), _ts_param(prev_24h_end)]
+    )
+    if rows is None:
+        return None
+    return rows[0]
@@ -2,12 +2,164 @@
 HaberMetrik - API Routes
 """
 
-from flask import Blueprint, request, jsonify
+import functools
+import hashlib
+import time
+
+from flask import Blueprint, request, jsonify, g, make_response, copy_current_request_context
 from database import search_news
-from config import SEARCH_LIMIT
+from serialization import select_fields
+from config import (
+    SEARCH_LIMIT, CLUSTER_MAX_EPS, API_ETAG_WINDOW_SECONDS, API_ETAG_SHORT_WINDOW_SECONDS, STORY_EPS
+)
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+# Yanıtı veri sürümüne bağlı olmayan uçlar (iş durumu, akışlar, süreç sayaçları);
+# live-feed'in "x dakika önce" metni ve 15 dakikalık penceresi her dakika değişir
+NO_ETAG_ENDPOINTS = {
+    'api.job_status', 'api.job_stream', 'api.live_stream', 'api.cluster_stats', 'api.live_feed'
+}
+
+# Dakikalık pencereli uçlar: ETag daha kısa zaman kovasıyla yenilenir
+ETAG_WINDOW_SECONDS = {
+    'api.news_flow_rate': API_ETAG_SHORT_WINDOW_SECONDS,
+    'api.trending_topics': API_ETAG_SHORT_WINDOW_SECONDS,
+}
+
+
+def _data_etag():
+    """
+    İstek için ucuz veri sürümü ETag'i
+    
+    Son haber id'si ve silme/hikâye yazımlarının sürümü (data_versions)
+    bellekteki tampondan okunur; tampon bunları RECENT_TAIL_SECONDS'ta bir
+    takip eder, istek başına veritabanı sorgusu yapılmaz. Zaman kovası uca
+    göre seçilir (ETAG_WINDOW_SECONDS).
+    """
+    from recent import get_recent_buffer
+    
+    last_id, reloads, data_version = get_recent_buffer().version()
+    window = ETAG_WINDOW_SECONDS.get(request.endpoint, API_ETAG_WINDOW_SECONDS)
+    bucket = int(time.time() // window)
+    raw = f"{request.full_path}|{last_id}|{reloads}|{data_version}|{bucket}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+@api_bp.before_request
+def check_not_modified():
+    """If-None-Match veri sürümüyle eşleşiyorsa sorgu çalışmadan 304 dön"""
+    if request.method != 'GET' or request.endpoint in NO_ETAG_ENDPOINTS:
+        return None
+    # Canlı bölümlü panel paketi de live-feed gibi ETag'lenmez
+    if request.endpoint == 'api.dashboard_bundle' and 'live' in _dashboard_fields():
+        return None
+    
+    # ETag'ler zayıftır: aynı veri gzip/brotli ile farklı baytlarla gönderilebilir
+    g.api_etag = _data_etag()
+    if request.if_none_match.contains_weak(g.api_etag):
+        response = make_response('', 304)
+        response.set_etag(g.api_etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return None
+
+
+def _is_error_body(response):
+    """200 ile dönen hata gövdesi ({'error': ...}); ETag'lenip 304 ile tekrar verilmemeli"""
+    if not response.is_json:
+        return False
+    data = response.get_data()
+    # Ucuz ön eleme: gövdede "error" anahtarı geçmiyorsa ayrıştırmaya gerek yok
+    if b'"error"' not in data:
+        return False
+    body = response.get_json(silent=True)
+    return isinstance(body, dict) and 'error' in body
+
+
+@api_bp.after_request
+def finalize_response(response):
+    """Başarılı okuma yanıtlarına ETag ve Cache-Control ekle, büyük yanıtları sıkıştır"""
+    from serialization import compress_response
+    
+    etag = g.pop('api_etag', None)
+    if (etag is not None and response.status_code == 200 and not response.is_streamed
+            and not _is_error_body(response)):
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return compress_response(response, request.headers.get('Accept-Encoding'))
+
+
+def _extend_json_object(body, extra):
+    """JSON nesne gövdesine üst düzey alanlar ekle (gövde yeniden ayrıştırılmaz)"""
+    from flask import current_app
+    
+    head = body.rstrip()[:-1].rstrip()
+    separator = '' if head.endswith('{') else ','
+    return head + separator + current_app.json.dumps(extra)[1:]
+
+
+def cached_response(view=None, *, fresh=None):
+    """
+    Yanıtı tüm kullanıcılar için paylaşılan önbellekten ver (cache.ResponseCache)
+    
+    Anahtar uç ve sorgu dizgisidir. Yalnızca 'error' taşımayan 200 yanıtları
+    saklanır; görünüm g.response_no_store ile de saklamayı engelleyebilir.
+    Bayat kayıt yenilenirken görünüm, isteğin kopyalanmış bağlamında arka
+    planda çalışır. Yanıtın ETag'i kaydın hesaplandığı andaki veri sürümüdür;
+    bayat gövde güncel ETag ile gönderilmez.
+    
+    Args:
+        fresh: Önbelleğe girmeyen, her istekte hesaplanan üst düzey alanlar
+            (dict veya None döndürür); 200 gövdesine eklenir, yanıt ETag'lenmez
+    """
+    if view is None:
+        return functools.partial(cached_response, fresh=fresh)
+    
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from cache import get_response_cache
+        
+        response_cache = get_response_cache()
+        if response_cache is None:
+            return view(*args, **kwargs)
+        
+        @copy_current_request_context
+        def compute():
+            etag = _data_etag()
+            response = make_response(view(*args, **kwargs))
+            return {
+                'status': response.status_code,
+                'mimetype': response.mimetype,
+                'body': response.get_data(as_text=True),
+                'etag': etag,
+                'store': (response.status_code == 200 and not _is_error_body(response)
+                          and not g.pop('response_no_store', False))
+            }
+        
+        cached = response_cache.get_or_compute(
+            f"{request.endpoint}|{request.full_path}",
+            compute,
+            should_store=lambda value: value['store']
+        )
+        
+        headers = {'Content-Type': cached['mimetype']}
+        extra = fresh() if fresh is not None and cached['status'] == 200 else None
+        if extra:
+            g.pop('api_etag', None)
+            return make_response(_extend_json_object(cached['body'], extra), 200, headers)
+        
+        # Eski kayıtlarda etag yok: ETag'siz gönderilir
+        g.api_etag = cached.get('etag')
+        if g.api_etag is not None and request.if_none_match.contains_weak(g.api_etag):
+            response = make_response('', 304)
+            response.set_etag(g.pop('api_etag'), weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return make_response(cached['body'], cached['status'], headers)
+    
+    return wrapper
+
 
 @api_bp.route('/search', methods=['GET'])
 def search():
@@ -21,11 +173,34 @@ def search():
     
     results = search_news(query, limit)
     
-    return jsonify({
+    return jsonify(select_fields({
         'query': query,
         'count': len(results),
         'results': results
-    })
+    }, request.args.get('fields')))
+
+
+def _search_grouped_payload(query, total):
+    """Kümeleri /api/search-grouped yanıtına çeviren fonksiyon"""
+    def formatter(clusters_dict):
+        # ID'leri string'e çevir (JSON serialization için)
+        for cluster in clusters_dict.values():
+            cluster['id'] = str(cluster['id'])
+        
+        # Sıralı liste olarak dönüştür
+        clusters = sorted(
+            clusters_dict.values(),
+            key=lambda x: x['count'],
+            reverse=True
+        )
+        
+        return {
+            'query': query,
+            'total': total,
+            'cluster_count': len(clusters),
+            'clusters': clusters
+        }
+    return formatter
 
 
 @api_bp.route('/search-grouped', methods=['GET'])
@@ -35,10 +210,17 @@ def search_grouped():
     
     GET /api/search-grouped?q=deprem&eps=0.35&min_samples=2
     
+    eps ve min_samples verilmezse sonuçlar ingest sırasında kurulmuş hikâyelere
+    (STORY_EPS) göre gruplanır; böylece gruplar Sanal Gazete ve /api/stories ile
+    aynıdır. Verilirse sonuçlar o değerlerle yeniden kümelenir.
+    
     Query Params:
         q: Arama terimi
-        eps: DBSCAN epsilon (0-1, düşük = sıkı gruplama)
+        eps: DBSCAN epsilon (0-CLUSTER_MAX_EPS, düşük = sıkı gruplama; varsayılan STORY_EPS)
         min_samples: Minimum haber sayısı
+        fields: Haber alanları seçimi ('-description' atar, 'title,link' yalnızca bunları tutar)
+        async: 1 ise kümeleme arka planda yapılır, sonuç önbellekte yoksa
+               202 ile job_id döner (bkz. /api/jobs/<job_id>)
     
     Returns:
         {
@@ -54,9 +236,11 @@ def search_grouped():
         return jsonify({'error': 'Arama terimi gerekli'}), 400
     
     # Parametreler
-    eps = float(request.args.get('eps', 0.35))
-    min_samples = int(request.args.get('min_samples', 2))
+    # eps en fazla CLUSTER_MAX_EPS: komşu grafiği bu yarıçapla önbelleklenir
+    eps = min(max(float(request.args.get('eps', STORY_EPS)), 0.01), CLUSTER_MAX_EPS)
+    min_samples = max(int(request.args.get('min_samples', 2)), 1)
     limit = min(int(request.args.get('limit', 100)), 200)
+    run_async = request.args.get('async') == '1'
     
     # Arama
     results = search_news(query, limit)
@@ -69,29 +253,38 @@ def search_grouped():
             'clusters': []
         })
     
+    from clustering import get_clusterer, ClusteringBusyError
+    from stories import group_by_story
+    
+    formatter = _search_grouped_payload(query, len(results))
+    
     # Clustering
     try:
-        from clustering import get_clusterer
-        clusterer = get_clusterer()
-        clusters_dict = clusterer.cluster_news(results, eps=eps, min_samples=min_samples)
-        
-        # ID'leri string'e çevir (JSON serialization için)
-        for cluster in clusters_dict.values():
-            cluster['id'] = str(cluster['id'])
-        
-        # Sıralı liste olarak dönüştür
-        clusters = sorted(
-            clusters_dict.values(),
-            key=lambda x: x['count'],
-            reverse=True
-        )
+        # Parametre verilmediyse ingest sırasında kurulmuş hikâyeleri kullan
+        clusters_dict = None
+        if 'eps' not in request.args and 'min_samples' not in request.args:
+            clusters_dict = group_by_story(results)
+        if clusters_dict is None:
+            if run_async:
+                from jobs import submit_cluster_job
+                
+                job_id, payload = submit_cluster_job(results, eps, min_samples, formatter)
+                if job_id is not None:
+                    return jsonify({'job_id': job_id, 'status': 'pending'}), 202
+                return jsonify(select_fields(payload, request.args.get('fields')))
+            
+            clusterer = get_clusterer()
+            clusters_dict = clusterer.cluster_news(results, eps=eps, min_samples=min_samples)
         
+        return jsonify(select_fields(formatter(clusters_dict), request.args.get('fields')))
+    except ClusteringBusyError as e:
         return jsonify({
             'query': query,
             'total': len(results),
-            'cluster_count': len(clusters),
-            'clusters': clusters
-        })
+            'cluster_count': 0,
+            'clusters': [],
+            'error': str(e)
+        }), 503
     except Exception as e:
         import traceback
         print(f"Clustering hatası: {e}")
@@ -105,30 +298,14 @@ def search_grouped():
         })
 
 
-@api_bp.route('/dashboard-stats', methods=['GET'])
-def dashboard_stats():
-    """Dashboard istatistikleri"""
+def _dashboard_stats_payload(today_count, today_by_source, total_count, all_time_by_source):
+    """/api/dashboard-stats yanıtı (kaynak durumları bellekten okunur)"""
     from failed_sources import get_all_sources_status as get_source_stats
-    from database import (
-        get_today_news_count, get_news_by_source_today,
-        get_total_news_count, get_news_by_source_all_time
-    )
-    
-    # Kaynak limit parametresini al (default 50, max 10000)
-    limit_sources = min(int(request.args.get('limit_sources', 50)), 10000)
     
     # Kaynak durumları
     sources_status = get_source_stats()
     
-    # Bugünün istatistikleri
-    today_count = get_today_news_count()
-    today_by_source = get_news_by_source_today(limit=limit_sources)
-    
-    # Toplam haberler
-    total_count = get_total_news_count()
-    all_time_by_source = get_news_by_source_all_time(limit=limit_sources)
-    
-    return jsonify({
+    return {
         'sources': {
             'total': sources_status['total'],
             'working': len(sources_status['working']),
@@ -144,41 +321,37 @@ def dashboard_stats():
             'count': total_count,
             'by_source': all_time_by_source
         }
-    })
+    }
 
 
-@api_bp.route('/trending-topics', methods=['GET'])
-def trending_topics():
-    """
-    Otomatik kümeleme ile trending topics
-    
-    GET /api/trending-topics
+@api_bp.route('/dashboard-stats', methods=['GET'])
+@cached_response
+def dashboard_stats():
+    """Dashboard istatistikleri"""
+    from database import (
+        get_today_news_count, get_news_by_source_today,
+        get_total_news_count, get_news_by_source_all_time
+    )
     
-    Returns:
-        {
-            "clusters": [...],
-            "total_news": 100
-        }
-    """
-    from database import get_latest_news
+    # Kaynak limit parametresini al (default 50, max 10000)
+    limit_sources = min(int(request.args.get('limit_sources', 50)), 10000)
     
-    # Son 100 haberi al
-    limit = min(int(request.args.get('limit', 100)), 200)
-    recent_news = get_latest_news(limit=limit)
+    # Bugünün istatistikleri
+    today_count = get_today_news_count()
+    today_by_source = get_news_by_source_today(limit=limit_sources)
     
-    if len(recent_news) < 5:
-        return jsonify({
-            'clusters': [],
-            'total_news': len(recent_news),
-            'message': 'Yeterli haber yok'
-        })
+    # Toplam haberler
+    total_count = get_total_news_count()
+    all_time_by_source = get_news_by_source_all_time(limit=limit_sources)
     
-    # Clustering yap
-    try:
-        from clustering import get_clusterer
-        clusterer = get_clusterer()
-        clusters = clusterer.cluster_news(recent_news, eps=0.32, min_samples=2)
-        
+    return jsonify(_dashboard_stats_payload(
+        today_count, today_by_source, total_count, all_time_by_source
+    ))
+
+
+def _trending_payload(total):
+    """Kümeleri /api/trending-topics yanıtına çeviren fonksiyon"""
+    def formatter(clusters):
         # En büyük 5 kümeyi al
         sorted_clusters = sorted(
             clusters.values(),
@@ -186,7 +359,8 @@ def trending_topics():
             reverse=True
         )[:5]
         
-        # Her küme için tüm haberleri 'articles' olarak gönder ve main_topic/keywords ekle
+        # Her küme için tüm haberleri 'articles' olarak gönder ve main_topic ekle
+        # (keywords/keyword_weights kümelemede TF-IDF merkezinden gelir)
         for cluster in sorted_clusters:
             # ID'yi string'e çevir (JSON serialization için)
             cluster['id'] = str(cluster['id'])
@@ -196,24 +370,283 @@ def trending_topics():
             
             # Frontend'in beklediği alanları ekle
             cluster['main_topic'] = cluster['title']  # main_topic = title
-            
-            # Keywords: title'dan kelimeleri ayır
-            title_words = cluster['title'].split()
-            cluster['keywords'] = title_words[:3] if len(title_words) >= 3 else title_words
+            cluster.setdefault('keywords', [])
         
-        return jsonify({
+        return {
             'clusters': sorted_clusters,
-            'total_news': len(recent_news)
+            'total_news': total
+        }
+    return formatter
+
+
+def _trending_from_tree(horizon):
+    """
+    Hikâye ağacının bir seviyesinden trending yanıtı
+    
+    Ağaç henüz kurulmadıysa None döner (çağıran kümelemeye düşer).
+    """
+    from database import get_story_tree, get_story_tree_news
+    from story_tree import LEVEL_HOURS
+    
+    if horizon not in LEVEL_HOURS:
+        return None
+    
+    nodes = get_story_tree(horizon, limit=5)
+    if not nodes:
+        return None
+    
+    news = get_story_tree_news(horizon, [node['node_id'] for node in nodes], LEVEL_HOURS[horizon])
+    
+    clusters = []
+    for node in nodes:
+        clusters.append({
+            'id': str(node['node_id']),
+            'title': node['title'],
+            'main_topic': node['title'],
+            'keywords': [term for term, _ in node['keywords']],
+            'keyword_weights': [{'term': term, 'weight': weight} for term, weight in node['keywords']],
+            'count': node['member_count'],
+            'story_count': node['story_count'],
+            'articles': news[node['node_id']]
         })
+    
+    return {
+        'clusters': clusters,
+        'total_news': sum(node['member_count'] for node in nodes),
+        'horizon': horizon,
+        'built_at': nodes[0]['built_at']
+    }
+
+
+def _trending_latest(limit, allow_async=False, eps=None):
+    """
+    Son haberlerin gündem kümeleri
+    
+    eps verilmezse ingest sırasında kurulmuş hikâyeler (STORY_EPS) kullanılır,
+    hikâyeler eksikse aynı eps ile kümelenir; verilirse o eps ile kümelenir.
+    
+    Returns:
+        (yanıt, durum kodu) - allow_async ve önbellek boşsa (job yanıtı, 202),
+        kümeleme meşgul veya başarısızsa ('error' içeren yanıt, 503)
+    """
+    from clustering import ClusteringBusyError
+    from recent import get_recent_buffer
+    
+    recent_news = get_recent_buffer().latest(limit=limit)
+    
+    if len(recent_news) < 5:
+        return {
+            'clusters': [],
+            'total_news': len(recent_news),
+            'message': 'Yeterli haber yok'
+        }, 200
+    
+    formatter = _trending_payload(len(recent_news))
+    
+    # Clustering yap (önce ingest sırasında kurulmuş hikâyeler)
+    try:
+        from clustering import get_clusterer
+        from stories import group_by_story
+        
+        clusters = group_by_story(recent_news) if eps is None else None
+        if clusters is None:
+            eps = STORY_EPS if eps is None else eps
+            if allow_async:
+                from jobs import submit_cluster_job
+                
+                job_id, payload = submit_cluster_job(recent_news, eps, 2, formatter)
+                if job_id is not None:
+                    return {'job_id': job_id, 'status': 'pending'}, 202
+                return payload, 200
+            
+            clusterer = get_clusterer()
+            clusters = clusterer.cluster_news(recent_news, eps=eps, min_samples=2)
+        
+        return formatter(clusters), 200
+    except ClusteringBusyError as e:
+        return {
+            'clusters': [],
+            'total_news': len(recent_news),
+            'error': str(e)
+        }, 503
     except Exception as e:
         import traceback
         print(f"Clustering hatası: {e}")
         print(traceback.format_exc())
-        return jsonify({
+        return {
             'clusters': [],
             'total_news': len(recent_news),
             'error': f'Clustering failed: {str(e)}'
-        })
+        }, 503
+
+
+@api_bp.route('/trending-topics', methods=['GET'])
+@cached_response
+def trending_topics():
+    """
+    Otomatik kümeleme ile trending topics
+    
+    GET /api/trending-topics
+    GET /api/trending-topics?async=1  (önbellekte yoksa 202 + job_id)
+    GET /api/trending-topics?horizon=24h  (1h, 6h, 24h, 7d - hikâye ağacından)
+    GET /api/trending-topics?eps=0.32  (hikâyeler yerine bu eps ile kümele)
+    GET /api/trending-topics?fields=-description  (haberlerden ağır alanları at)
+    
+    Returns:
+        {
+            "clusters": [...],
+            "total_news": 100
+        }
+    """
+    # Belirli bir pencere istendiyse önceden kurulmuş hikâye ağacından oku
+    horizon = request.args.get('horizon')
+    if horizon:
+        payload = _trending_from_tree(horizon)
+        if payload is not None:
+            return jsonify(select_fields(payload, request.args.get('fields')))
+    
+    # Son 100 haberi al
+    limit = min(int(request.args.get('limit', 100)), 200)
+    eps = request.args.get('eps')
+    if eps is not None:
+        eps = min(max(float(eps), 0.01), CLUSTER_MAX_EPS)
+    payload, status = _trending_latest(limit, allow_async=request.args.get('async') == '1', eps=eps)
+    return jsonify(select_fields(payload, request.args.get('fields'))), status
+
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Arka plan kümeleme işinin durumu
+    
+    GET /api/jobs/<job_id>?wait=10  (en fazla 10 sn tamamlanmayı bekler)
+    GET /api/jobs/<job_id>?fields=-description  (sonuçtaki haber alanları seçimi)
+    
+    Returns:
+        {"job_id": "...", "status": "pending|running|done|error", "result": {...}}
+    """
+    from jobs import get_job, wait_for_job
+    
+    wait = min(float(request.args.get('wait', 0)), 30)
+    job = wait_for_job(job_id, timeout=wait) if wait > 0 else get_job(job_id)
+    
+    if job is None:
+        return jsonify({'error': 'İş bulunamadı'}), 404
+    
+    if 'result' in job:
+        job = dict(job, result=select_fields(job['result'], request.args.get('fields')))
+    return jsonify(job)
+
+
+@api_bp.route('/jobs/<job_id>/stream', methods=['GET'])
+def job_stream(job_id):
+    """
+    Arka plan kümeleme işini Server-Sent Events ile bekle
+    
+    İş bitene kadar 15 saniyede bir keepalive yorumu, bitince tek bir
+    'done' veya 'error' olayı gönderir.
+    """
+    import json
+    from flask import Response, stream_with_context
+    from jobs import get_job, wait_for_job
+    
+    if get_job(job_id) is None:
+        return jsonify({'error': 'İş bulunamadı'}), 404
+    
+    def generate():
+        while True:
+            job = wait_for_job(job_id, timeout=15)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'error': 'İş bulunamadı'})}\n\n"
+                return
+            if job['status'] in ('done', 'error'):
+                yield f"event: {job['status']}\ndata: {json.dumps(job)}\n\n"
+                return
+            yield ": keepalive\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@api_bp.route('/story-tree', methods=['GET'])
+def story_tree():
+    """
+    Çok pencereli hikâye ağacının bir seviyesi
+    
+    GET /api/story-tree?level=24h&limit=20
+    GET /api/story-tree?level=6h&parent=123  (24h düğümü 123'ün alt düğümleri)
+    
+    Returns:
+        {"level": "24h", "hours": 24, "nodes": [...]}
+    """
+    from database import get_story_tree
+    from story_tree import LEVEL_HOURS
+    
+    level = request.args.get('level', '24h')
+    if level not in LEVEL_HOURS:
+        return jsonify({'error': f"Geçersiz seviye, seçenekler: {', '.join(LEVEL_HOURS)}"}), 400
+    
+    limit = min(int(request.args.get('limit', 20)), 200)
+    parent = request.args.get('parent', type=int)
+    
+    nodes = get_story_tree(level, limit=limit, parent_id=parent)
+    
+    return jsonify({
+        'level': level,
+        'hours': LEVEL_HOURS[level],
+        'nodes': nodes,
+        'count': len(nodes)
+    })
+
+
+@api_bp.route('/stories/<int:story_id>/timeline', methods=['GET'])
+def story_timeline(story_id):
+    """
+    Hikâyenin kaynak bazında kapsama zaman çizelgesi
+    
+    GET /api/stories/123/timeline?bucket=hour&since=2024-01-01 10:00
+    
+    Birleşmiş eski hikâye id'leri güncel hikâyeye yönlenir.
+    
+    Returns:
+        {"story": {...}, "bucket": "minute", "timeline": [...], "by_source": {...}}
+    """
+    from database import get_story, get_story_timeline
+    
+    story = get_story(story_id)
+    if story is None:
+        return jsonify({'error': 'Hikâye bulunamadı'}), 404
+    
+    bucket = 'hour' if request.args.get('bucket') == 'hour' else 'minute'
+    timeline = get_story_timeline(story['id'], bucket=bucket, since=request.args.get('since'))
+    
+    by_source = {}
+    for row in timeline:
+        by_source[row['source']] = by_source.get(row['source'], 0) + row['count']
+    
+    return jsonify({
+        'story': story,
+        'bucket': bucket,
+        'timeline': timeline,
+        'by_source': dict(sorted(by_source.items(), key=lambda x: x[1], reverse=True))
+    })
+
+
+@api_bp.route('/cluster-stats', methods=['GET'])
+def cluster_stats():
+    """Kümeleme, yanıt ve kullanıcı önbelleklerinin isabet oranı ve hesaplama süreleri"""
+    from cache import get_response_cache
+    from clustering import get_cluster_cache_stats
+    from database import get_user_cache_stats
+    
+    stats = get_cluster_cache_stats()
+    response_cache = get_response_cache()
+    stats['response_cache'] = response_cache.get_stats() if response_cache else None
+    stats['user_cache'] = get_user_cache_stats()
+    return jsonify(stats)
 
 
 # ============= NEW ADVANCED DASHBOARD ENDPOINTS =============
@@ -231,12 +664,33 @@ def news_flow_rate():
 
 @api_bp.route('/time-series', methods=['GET'])
 def time_series():
-    """24 saatlik zaman serisi grafiği"""
-    from database import get_hourly_distribution
-    
-    hours = min(int(request.args.get('hours', 24)), 168)  # Max 7 days
+    """
+    Zaman serisi grafiği
+
+    GET /api/time-series?hours=24
+    GET /api/time-series?granularity=day&days=90
+
+    DuckDB analitik motoru açıksa çok haftalık/aylık aralıklara izin verilir.
+    """
+    from database import get_hourly_distribution, get_daily_distribution
+    import analytics
+
+    long_range = analytics.is_enabled()
+
+    if request.args.get('granularity') == 'day':
+        days = min(int(request.args.get('days', 30)), 365 if long_range else 31)
+        result = get_daily_distribution(days=days)
+
+        return jsonify({
+            'days': days,
+            'granularity': 'day',
+            'data': result
+        })
+
+    # Max 7 days (DuckDB ile 92 gün)
+    hours = min(int(request.args.get('hours', 24)), 2208 if long_range else 168)
     result = get_hourly_distribution(hours=hours)
-    
+
     return jsonify({
         'hours': hours,
         'data': result
@@ -244,6 +698,7 @@ def time_series():
 
 
 @api_bp.route('/word-cloud', methods=['GET'])
+@cached_response
 def word_cloud():
     """En sık geçen kelimeler"""
     from database import get_word_frequencies
@@ -259,101 +714,145 @@ def word_cloud():
     })
 
 
+def _live_feed_payload(limit):
+    """/api/live-feed yanıtı (son haberler tamponundan)"""
+    from live import get_live_hub
+    from recent import get_recent_buffer
+    
+    # Akışın devam noktası sorgudan önce alınır; arada eklenen haber
+    # kaçmaz, istemci tekrarları id ile ayıklar
+    last_id = get_live_hub().last_id
+    
+    # STRICT FILTER: Max 15 minutes (900 seconds)
+    # User asked for "max 10 dk", we give 15 as buffer/safety.
+    # Tarihler tamponda önceden UTC'ye çevrilmiştir (pub_date, yoksa created_at)
+    results = []
+    for age, item in get_recent_buffer().window(900, limit=limit):
+        if age < 60:
+            item['time_ago'] = "Az önce"
+        else:
+            item['time_ago'] = f"{int(age // 60)} dakika önce"
+        results.append(item)
+    
+    return {
+        'news': results,
+        'count': len(results),
+        'last_id': last_id
+    }
+
+
 @api_bp.route('/live-feed', methods=['GET'])
 def live_feed():
     """Canlı haber akışı - Son 15 dakika (Strict)"""
-    from database import get_latest_news
-    from datetime import datetime, timedelta
-    import pytz
-    
     limit = min(int(request.args.get('limit', 50)), 100)
+    return jsonify(select_fields(_live_feed_payload(limit), request.args.get('fields')))
+
+
+@api_bp.route('/live-stream', methods=['GET'])
+def live_stream():
+    """
+    Yeni haberleri Server-Sent Events ile it
+    
+    GET /api/live-stream?last_id=123
     
-    # Fetch raw news - Prefer quantity to find recent items
-    raw_limit = 500
-    raw_news = get_latest_news(limit=raw_limit)
+    Her haber 'news' olayı olarak gönderilir; olay id'si bağlantıda o ana
+    kadar gönderilen en büyük haber id'sidir. Tarayıcı yeniden bağlanırken
+    Last-Event-ID başlığıyla kaldığı yerden devam eder. İstenen id tampondan
+    düşmüşse tek bir 'reset' olayı gönderilir; istemci listeyi
+    /api/live-feed'den yeniden yüklemelidir. Olaylar ingest yazıcısından
+    süreç içinde veya veritabanı takibinden (live.py) gelir.
     
-    # Timezone setup
-    turkey_tz = pytz.timezone('Europe/Istanbul')
-    now_turkey = datetime.now(turkey_tz)
+    Bağlantı bir thread tutar: tek thread'li worker'da (gunicorn sync) veya
+    süreçte LIVE_MAX_STREAMS akış açıkken bekleyen olaylar gönderilip bağlantı
+    kapatılır, tarayıcı LIVE_POLL_RETRY_MS sonra yeniden bağlanır. Açık akışlar
+    LIVE_STREAM_MAX_SECONDS sonra kapanır.
+    """
+    import json
+    import time
+    from flask import Response, stream_with_context
+    from config import (LIVE_KEEPALIVE_SECONDS, LIVE_MAX_STREAMS,
+                        LIVE_STREAM_MAX_SECONDS, LIVE_POLL_RETRY_MS)
+    from live import get_live_hub
+    
+    hub = get_live_hub()
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_id')
+    try:
+        last_id = int(last_id)
+    except (TypeError, ValueError):
+        last_id = hub.last_id
     
-    filtered_news = []
+    multithread = bool(request.environ.get('wsgi.multithread'))
     
-    for item in raw_news:
-        # Skip if no title
-        if not item.get('title'):
-            continue
-            
+    def generate():
+        hold = multithread and hub.subscribe(LIVE_MAX_STREAMS)
         try:
-            # Parse date (Prioritize pub_date, fall back to created_at)
-            date_str = item.get('pub_date') or item.get('created_at')
-            if not date_str:
-                continue
-                
-            # Handle string formats (SQLite default often 'YYYY-MM-DD HH:MM:SS')
-            if isinstance(date_str, str):
-                # Try standard format first
-                try:
-                    dt = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    # Try ISO format if needed
-                    try:
-                        dt = datetime.fromisoformat(date_str.replace('Z', ''))
-                    except ValueError:
-                        continue
-            else:
-                # Already datetime?
-                dt = date_str
-                
-            # Assume database dates are naive UTC (common in this app context)
-            if dt.tzinfo is None:
-                dt = pytz.utc.localize(dt)
+            events, seq = hub.resume(last_id)
+            if events is None:
+                yield f"event: reset\ndata: {json.dumps({'last_id': hub.last_id})}\n\n"
+                return
             
-            # Convert to Turkey time for comparison
-            dt_turkey = dt.astimezone(turkey_tz)
-            
-            # Calculate difference
-            delta = now_turkey - dt_turkey
-            total_seconds = delta.total_seconds()
-            
-            # STRICT FILTER: Max 15 minutes (900 seconds)
-            # User asked for "max 10 dk", we give 15 as buffer/safety.
-            if total_seconds > 900: 
-                continue
-            
-            # Format time string
-            if total_seconds < 60:
-                time_ago_str = "Az önce"
-            else:
-                mins = int(total_seconds // 60)
-                time_ago_str = f"{mins} dakika önce"
+            yield f"retry: {5000 if hold else LIVE_POLL_RETRY_MS}\n\n"
+            high_id = last_id
+            deadline = time.time() + LIVE_STREAM_MAX_SECONDS
+            while True:
+                for event in events:
+                    # Geç gelen küçük id'ler devam noktasını geri almaz
+                    high_id = max(high_id, event['id'])
+                    yield f"id: {high_id}\nevent: news\ndata: {json.dumps(event)}\n\n"
                 
-            item['time_ago'] = time_ago_str
-            filtered_news.append(item)
-            
-        except Exception as e:
-            # If date parsing fails, skip item to be safe
-            continue
-            
-    # Apply requested limit to our strictly filtered list
-    results = filtered_news[:limit]
+                remaining = deadline - time.time()
+                if not hold or remaining <= 0:
+                    return
+                
+                events, seq = hub.wait_for_events(seq, timeout=min(LIVE_KEEPALIVE_SECONDS, remaining))
+                if events is None:
+                    yield f"event: reset\ndata: {json.dumps({'last_id': hub.last_id})}\n\n"
+                    return
+                if not events:
+                    yield ": keepalive\n\n"
+        finally:
+            if hold:
+                hub.unsubscribe()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _source_performance_payload(results):
+    """
+    Kaynak hızlarına tazelik yüzdeliklerini ve yoklama sürelerini ekle
     
-    return jsonify({
-        'news': results,
-        'count': len(results)
-    })
+    freshness_p50/p95: yayınlanmadan (pub_date) eklenmeye (created_at) geçen
+    süre, saniye (FRESHNESS_DAYS gün); avg_*_seconds: son 24 saatin yoklamaları
+    """
+    from database import get_source_freshness, get_feed_poll_stats
+    
+    freshness = get_source_freshness()
+    polls = get_feed_poll_stats(hours=24)
+    empty_freshness = {'freshness_p50': None, 'freshness_p95': None, 'freshness_samples': 0}
+    empty_polls = {'polls': 0, 'avg_fetch_seconds': None, 'avg_parse_seconds': None,
+                   'avg_insert_seconds': None, 'last_poll': None}
+    
+    sources = []
+    for row in results:
+        row = dict(row)
+        row.update(freshness.get(row['source'], empty_freshness))
+        poll = polls.get(row['source'])
+        row.update({key: poll[key] for key in empty_polls} if poll else empty_polls)
+        sources.append(row)
+    
+    return {'sources': sources, 'total': len(sources)}
 
 
 @api_bp.route('/source-performance', methods=['GET'])
 def source_performance():
-    """Kaynak performans metrikleri"""
+    """Kaynak performans metrikleri (hız, tazelik ve yoklama süreleri)"""
     from database import get_source_speed_metrics
     
-    results = get_source_speed_metrics()
-    
-    return jsonify({
-        'sources': results,
-        'total': len(results)
-    })
+    return jsonify(_source_performance_payload(get_source_speed_metrics()))
 
 
 @api_bp.route('/comparison', methods=['GET'])
@@ -366,12 +865,8 @@ def comparison():
     return jsonify(stats)
 
 
-@api_bp.route('/sentiment', methods=['GET'])
-def sentiment():
-    """Duygu analizi dağılımı"""
-    from database import get_sentiment_distribution
-    
-    result = get_sentiment_distribution()
+def _sentiment_payload(result):
+    """Duygu sayılarına toplam ve yüzdeleri ekle"""
     total = sum(result.values())
     
     # Add percentages
@@ -381,4 +876,90 @@ def sentiment():
         result['negative_percent'] = round((result['negative'] / total) * 100, 1)
         result['neutral_percent'] = round((result['neutral'] / total) * 100, 1)
     
-    return jsonify(result)
+    return result
+
+
+@api_bp.route('/sentiment', methods=['GET'])
+@cached_response
+def sentiment():
+    """Duygu analizi dağılımı"""
+    from database import get_sentiment_distribution
+    
+    return jsonify(_sentiment_payload(get_sentiment_distribution()))
+
+
+# Panel paketi alanları (her biri aynı adlı ayrı ucun yanıt biçimindedir)
+DASHBOARD_FIELDS = (
+    'stats', 'trending', 'flow', 'comparison', 'time_series', 'word_cloud',
+    'sources', 'sentiment', 'live'
+)
+
+
+def _dashboard_fields():
+    """Panel paketinde istenen alanlar (?fields=, varsayılan hepsi)"""
+    fields = request.args.get('fields')
+    return [f.strip() for f in fields.split(',') if f.strip()] if fields else list(DASHBOARD_FIELDS)
+
+
+def _dashboard_live():
+    """Paketin canlı bölümü: önbelleğe girmez, her istekte son haberler tamponundan"""
+    if 'live' not in _dashboard_fields():
+        return None
+    return {'live': select_fields(_live_feed_payload(20), request.args.get('article_fields'))}
+
+
+@api_bp.route('/dashboard-bundle', methods=['GET'])
+@cached_response(fresh=_dashboard_live)
+def dashboard_bundle():
+    """
+    Panelin tüm bileşenleri tek istekte
+    
+    GET /api/dashboard-bundle
+    GET /api/dashboard-bundle?fields=stats,flow,comparison
+    GET /api/dashboard-bundle?article_fields=-description  (trending/live haber alanları)
+    
+    Alanlar: stats (dashboard-stats), trending (trending-topics), flow
+    (news-flow-rate), comparison, time_series (24 saat), word_cloud (40 kelime,
+    6 saat), sources (source-performance), sentiment, live (live-feed, 20).
+    Veritabanı bölümleri tek pencere taramasından hesaplanır; trending ve live
+    bellekteki son haberler tamponundan gelir. live zamana bağlı olduğu için
+    paylaşılan önbelleğe girmez (_dashboard_live).
+    """
+    from database import get_dashboard_snapshot
+    
+    fields = _dashboard_fields()
+    unknown = [f for f in fields if f not in DASHBOARD_FIELDS]
+    if unknown:
+        return jsonify({'error': f"Geçersiz alan: {', '.join(unknown)}, seçenekler: {', '.join(DASHBOARD_FIELDS)}"}), 400
+    
+    limit_sources = min(int(request.args.get('limit_sources', 10000)), 10000)
+    snapshot = get_dashboard_snapshot(fields, limit_sources=limit_sources)
+    bundle = {}
+    
+    if 'stats' in snapshot:
+        stats = snapshot['stats']
+        bundle['stats'] = _dashboard_stats_payload(
+            stats['today_count'], stats['today_by_source'],
+            stats['total_count'], stats['all_time_by_source']
+        )
+    article_fields = request.args.get('article_fields')
+    if 'trending' in fields:
+        trending, status = _trending_latest(100)
+        if status != 200:
+            # Meşgul/başarısız kümeleme paketi paylaşılan önbelleğe girmemeli
+            g.response_no_store = True
+        bundle['trending'] = select_fields(trending, article_fields)
+    if 'flow' in snapshot:
+        bundle['flow'] = snapshot['flow']
+    if 'comparison' in snapshot:
+        bundle['comparison'] = snapshot['comparison']
+    if 'time_series' in snapshot:
+        bundle['time_series'] = {'hours': 24, 'data': snapshot['time_series']}
+    if 'word_cloud' in snapshot:
+        bundle['word_cloud'] = {'words': snapshot['word_cloud'], 'total': len(snapshot['word_cloud'])}
+    if 'sources' in snapshot:
+        bundle['sources'] = _source_performance_payload(snapshot['sources'])
+    if 'sentiment' in snapshot:
+        bundle['sentiment'] = _sentiment_payload(snapshot['sentiment'])
+    
+    return jsonify(bundle)
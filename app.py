@@ -8,27 +8,48 @@ import threading
 import time
 import signal
 import sys
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+import hmac
+from datetime import datetime
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response
 
-from config import RSS_SOURCES, UPDATE_INTERVAL, SECRET_KEY
+from config import (
+    RSS_SOURCES, UPDATE_INTERVAL, SECRET_KEY, STORY_TREE_INTERVAL, EDITION_INTERVAL, METRICS_TOKEN
+)
 from database import (
     init_db, insert_many_news, verify_user, ensure_admin_exists,
     get_all_users, create_user, delete_user, get_user_by_id,
     get_news_count, delete_news_by_source, delete_news_by_age,
-    get_random_news_24h, get_word_frequencies
+    get_random_news_24h, get_word_frequencies,
+    backfill_news_vectors, backfill_vector_terms, backfill_story_timeline,
+    add_insert_listener, record_feed_poll
 )
 from parsers import get_parser
 from failed_sources import (
     log_failed_source, log_success_source, should_skip_source
 )
 from api.routes import api_bp
-from auth import login_required, admin_required, get_current_user, is_admin
+from auth import login_required, admin_required, get_current_user, is_admin, set_session_user
+from serialization import install_json_provider
+from profiler import install_request_sampling
+from metrics import (
+    install_request_metrics, render_metrics,
+    FEED_STAGE_LATENCY, FEED_ITEMS, FEED_ERRORS, FEED_LAST_SUCCESS
+)
 
 # Flask uygulaması
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
+
+# İstek süreleri ölçülür (diğer before_request kancalarından önce kurulmalı)
+install_request_metrics(app)
+
+# Admin panelinden açılan profil oturumunda isteklerin bir kısmı örneklenir
+install_request_sampling(app)
 app.register_blueprint(api_bp)
 
+# orjson kuruluysa API yanıtları onunla serileştirilir
+install_json_provider(app)
+
 # Arka plan thread'lerini takip et
 background_threads = []
 stop_event = threading.Event()
@@ -58,19 +79,48 @@ def update_feed(source_key):
             continue
 
         try:
+            # İndirme ve ayrıştırma süreleri (parser indirmeyi fetch_seconds'a yazar)
+            parser.reset_timings()
+            poll_started = datetime.utcnow()
+            start = time.perf_counter()
             items = parser.get_items()
+            elapsed = time.perf_counter() - start
+            FEED_STAGE_LATENCY.observe(parser.fetch_seconds, source_key, 'fetch')
+            FEED_STAGE_LATENCY.observe(elapsed - parser.fetch_seconds, source_key, 'parse')
 
+            inserted = 0
+            insert_seconds = 0.0
             if items:
+                FEED_ITEMS.inc(source_key, 'fetched', amount=len(items))
+                start = time.perf_counter()
                 inserted = insert_many_news(items)
+                insert_seconds = time.perf_counter() - start
+                FEED_STAGE_LATENCY.observe(insert_seconds, source_key, 'insert')
+                FEED_ITEMS.inc(source_key, 'inserted', amount=inserted)
+                FEED_LAST_SUCCESS.set(time.time(), source_key)
                 if inserted > 0:
                     print(f"[{source_key}] {inserted} yeni haber eklendi")
                 # Başarılı - hata sayacını sıfırla
                 log_success_source(source_key)
             else:
                 # Veri gelmedi
+                FEED_ERRORS.inc(source_key, 'no_data')
                 log_failed_source(source_key, source_url, 'no_data', 'Haber bulunamadı')
 
+            # Yoklama süreleri (/api/source-performance başka süreçten de okur)
+            record_feed_poll({
+                'source': source_key,
+                'fetch_started': parser.fetch_started or poll_started,
+                'fetch_ended': parser.fetch_ended,
+                'fetch_seconds': round(parser.fetch_seconds, 4),
+                'parse_seconds': round(elapsed - parser.fetch_seconds, 4),
+                'insert_seconds': round(insert_seconds, 4),
+                'fetched': len(items),
+                'inserted': inserted
+            })
+
         except ConnectionError as e:
+            FEED_ERRORS.inc(source_key, 'connection')
             log_failed_source(source_key, source_url, 'connection', str(e))
             print(f"[{source_key}] Bağlantı hatası: {e}")
         except Exception as e:
@@ -86,6 +136,7 @@ def update_feed(source_key):
             else:
                 error_type = 'unknown'
 
+            FEED_ERRORS.inc(source_key, error_type)
             log_failed_source(source_key, source_url, error_type, error_msg)
             print(f"[{source_key}] Güncelleme hatası: {e}")
 
@@ -97,6 +148,40 @@ def start_background_updates():
     """Tüm kaynaklar için arka plan güncelleme thread'lerini başlat"""
     print("Arka plan güncellemeleri başlatılıyor...")
 
+    # Yeni haberleri ekleme anında hikâyelere ata
+    from stories import get_tracker
+    add_insert_listener(get_tracker().add_news)
+
+    # Yeni haberleri canlı akış abonelerine it
+    from live import get_live_hub
+    add_insert_listener(get_live_hub().publish)
+
+    # Son haberler tamponunu yazıcıdan güncel tut
+    from recent import get_recent_buffer
+    add_insert_listener(get_recent_buffer().push)
+
+    # Çok pencereli hikâye ağacını periyodik olarak kur
+    from story_tree import run_story_tree_loop
+    thread = threading.Thread(
+        target=run_story_tree_loop,
+        args=(stop_event, STORY_TREE_INTERVAL),
+        name="story_tree",
+        daemon=True
+    )
+    thread.start()
+    background_threads.append(thread)
+
+    # Sanal Gazete baskılarını periyodik olarak kur
+    from editions import run_edition_loop
+    thread = threading.Thread(
+        target=run_edition_loop,
+        args=(app, stop_event, EDITION_INTERVAL),
+        name="editions",
+        daemon=True
+    )
+    thread.start()
+    background_threads.append(thread)
+
     for source_key in RSS_SOURCES.keys():
         thread = threading.Thread(
             target=update_feed,
@@ -132,7 +217,10 @@ def signal_handler(signum, frame):
 @app.before_request
 def require_login():
     """Tüm isteklerde giriş kontrolü yap"""
-    allowed_routes = ['login', 'static', 'api.trending_topics', 'api.search_grouped', 'api.live_feed']
+    allowed_routes = [
+        'login', 'static', 'api.trending_topics', 'api.search_grouped', 'api.live_feed',
+        'api.live_stream', 'api.job_status', 'api.job_stream', 'metrics'
+    ]
     if request.endpoint and request.endpoint not in allowed_routes and 'user_id' not in session:
         return redirect(url_for('login'))
 
@@ -141,10 +229,8 @@ def require_login():
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     """Giriş sayfası"""
-    if 'user_id' in session:
-        user = get_user_by_id(session['user_id'])
-        if user:
-            return redirect(url_for('virtual_newspaper'))
+    if get_current_user():
+        return redirect(url_for('virtual_newspaper'))
 
     error = None
     if request.method == 'POST':
@@ -153,9 +239,7 @@ def login():
 
         user = verify_user(username, password)
         if user:
-            session['user_id'] = user['id']
-            session['username'] = user['username']
-            session['role'] = user['role']
+            set_session_user(user)
 
             next_url = request.form.get('next') or request.args.get('next')
             if next_url:
@@ -175,6 +259,18 @@ def logout():
     return redirect(url_for('login'))
 
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus ölçümleri (admin oturumu veya METRICS_TOKEN ile)"""
+    # Başlıklar latin-1 çözülmüş gelir; ASCII olmayan str'ler compare_digest'te
+    # TypeError verir, baytlar karşılaştırılır
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    token = token.encode('latin-1', errors='replace')
+    if not (METRICS_TOKEN and hmac.compare_digest(token, METRICS_TOKEN.encode())) and not is_admin():
+        return Response('Yetkisiz\n', status=403, mimetype='text/plain')
+    return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # ============ User Dashboard ============
 
 @app.route('/dashboard')
@@ -191,14 +287,77 @@ def dashboard():
 @admin_required
 def admin_panel():
     """Admin paneli"""
+    from querylog import get_slow_query_log
+    from profiler import get_profiler, PROFILER_TARGETS
+    from config import PROFILER_MAX_SECONDS
+    
     user = get_current_user()
     users = get_all_users()
     news_count = get_news_count()
+    slow_query_log = get_slow_query_log()
+    profiler = get_profiler()
     return render_template('admin.html',
                            user=user,
                            users=users,
                            news_count=news_count,
-                           sources=RSS_SOURCES)
+                           sources=RSS_SOURCES,
+                           slow_queries=slow_query_log.top(),
+                           slow_query_stats=slow_query_log.get_stats(),
+                           profiler=profiler.status(),
+                           profiler_top=profiler.top_frames(),
+                           profiler_targets=PROFILER_TARGETS,
+                           profiler_max_seconds=PROFILER_MAX_SECONDS)
+
+
+@app.route('/admin/profiler/start', methods=['POST'])
+@admin_required
+def admin_start_profiler():
+    """Örneklemeli profil oturumu başlat"""
+    from profiler import get_profiler
+    
+    target = request.form.get('target', 'requests')
+    try:
+        duration = int(request.form.get('duration', 60))
+        rate = float(request.form.get('rate', 0.1))
+        get_profiler().start(target, duration, rate)
+        flash('Profil çıkarma başlatıldı.', 'success')
+    except ValueError as e:
+        flash(str(e), 'error')
+    return redirect(url_for('admin_panel'))
+
+
+@app.route('/admin/profiler/stop', methods=['POST'])
+@admin_required
+def admin_stop_profiler():
+    """Süren profil oturumunu bitir"""
+    from profiler import get_profiler
+    
+    get_profiler().stop()
+    return redirect(url_for('admin_panel'))
+
+
+@app.route('/admin/profiler/stacks.txt')
+@admin_required
+def admin_download_profile():
+    """Son oturumun yığınları (flamegraph.pl / speedscope için collapsed biçim)"""
+    from profiler import get_profiler
+    
+    return Response(
+        get_profiler().collapsed(),
+        mimetype='text/plain',
+        headers={'Content-Disposition': f'attachment; filename=habermetrik-{int(time.time())}.collapsed.txt'}
+    )
+
+
+@app.route('/admin/slow-queries/clear', methods=['POST'])
+@admin_required
+def admin_clear_slow_queries():
+    """Yavaş sorgu tablosunu sıfırla"""
+    from querylog import get_slow_query_log
+    
+    get_slow_query_log().clear()
+    flash('Yavaş sorgu tablosu sıfırlandı.', 'success')
+    return redirect(url_for('admin_panel'))
 
 
 @app.route('/admin/users', methods=['POST'])
@@ -266,6 +425,10 @@ def admin_delete_news():
         deleted = delete_news_by_age(hours, limit)
         flash(f'{deleted} haber silindi ({hours} saatten eski).', 'success')
 
+    # Silinen haberler önbellekteki kümelerde kalmasın
+    from clustering import invalidate_cluster_cache
+    invalidate_cluster_cache()
+
     return redirect(url_for('admin_panel'))
 
 
@@ -294,102 +457,43 @@ def search_grouped_page():
 @app.route('/sanal-gazete')
 @login_required
 def virtual_newspaper():
-    """Sanal Gazetem - Gündemdeki (Gruplanmış) Haberler"""
-    from clustering import get_clusterer
-    from database import get_recent_news
+    """Sanal Gazetem - Gündemdeki (Gruplanmış) Haberler (en son hazır baskı)"""
+    from editions import get_current_edition
     
     user = get_current_user()
+    edition = get_current_edition(app)
+    return render_template('virtual_newspaper.html', user=user, edition=edition)
+
+
+@app.route('/sanal-gazete/arsiv')
+@login_required
+def virtual_newspaper_archive():
+    """Sanal Gazetem - Önceki baskılar"""
+    from database import list_editions
+    from config import EDITION_KEEP
     
-    # 1. Son 24 saatin haberlerini çek
-    raw_news = get_recent_news(hours=24, limit=1000)
-    
-    # 2. Kümeleme yap
-    clusterer = get_clusterer()
-    # eps küçültüldü (0.40 -> 0.25) daha hassas gruplama için
-    clusters = clusterer.cluster_news(raw_news, eps=0.25, min_samples=2)
-    
-    # 3. Her kümeden en iyi temsili haberi seç
-    news_items = []
-    seen_titles = set()
+    user = get_current_user()
+    return render_template(
+        'virtual_newspaper.html', user=user, edition=None,
+        editions=list_editions(limit=EDITION_KEEP)
+    )
+
+
+@app.route('/sanal-gazete/<edition_id>')
+@login_required
+def virtual_newspaper_edition(edition_id):
+    """Sanal Gazetem - Arşivdeki bir baskı"""
+    from database import get_edition, get_latest_edition_meta
     
-    for cluster in clusters.values():
-        cluster_news = cluster['news']
-        if not cluster_news:
-            continue
-            
-        # ---------------------------------------------------------
-        # HYBRID SELECTION STRATEGY FOR VARIETY
-        # ---------------------------------------------------------
-        
-        # 1. Categorize candidates
-        rich_candidates = []      # Image + Long Description
-        fallback_candidates = []  # Others (Text only, short desc, etc.)
-        
-        for n in cluster_news:
-            has_image = bool(n.get('image_url'))
-            desc_len = len(n.get('description', '') or '')
-            
-            if has_image and desc_len > 20:
-                rich_candidates.append(n)
-            elif desc_len > 10:
-                # Only accept fallbacks if they have at least some description
-                # This prevents "empty description" cards
-                fallback_candidates.append(n)
-                
-        # 2. Sort both lists by quality
-        # Sort key: Image (1/0) -> Desc Length -> Date
-        def sort_key(x):
-            return (
-                1 if x.get('image_url') else 0,
-                len(x.get('description', '') or ''),
-                x.get('pub_date', '')
-            )
-            
-        rich_candidates.sort(key=sort_key, reverse=True)
-        fallback_candidates.sort(key=sort_key, reverse=True)
-        
-        # 3. Determine Selection Pool (Weighted for Visuals)
-        import random
-        pool = []
-        
-        # Strategy: Prioritize Visuals but allow Variety
-        if rich_candidates:
-            # If we have plenty of rich news (>=3), stick to them for max quality
-            if len(rich_candidates) >= 3:
-                pool = rich_candidates[:10]
-            else:
-                # If rich news is scarce (1-2 items), we mix in text-only for variety
-                # BUT we weight the rich items heavily so images appear most of the time
-                
-                # Add rich candidates multiple times (Weight: 5x)
-                # This ensures ~60-70% chance of seeing an image
-                for rc in rich_candidates:
-                    pool.extend([rc] * 5)
-                    
-                # Add a few high-quality fallbacks (Limit to top 4)
-                pool.extend(fallback_candidates[:4])
-        else:
-            # No images at all? Use best text-only news
-            pool = fallback_candidates[:5]
-            
-        if not pool:
-            continue
-            
-        # 4. Pick One Randomly
-        best_news = random.choice(pool)
-        
-        if best_news['title'] not in seen_titles:
-            # Add cluster metadata
-            best_news['cluster_size'] = cluster['count']
-            best_news['cluster_title'] = cluster['title']
-            
-            news_items.append(best_news)
-            seen_titles.add(best_news['title'])
+    edition = get_edition(edition_id)
+    if edition is None:
+        return redirect(url_for('virtual_newspaper_archive'))
     
-    # Haberleri küme büyüklüğüne göre sırala (en çok konuşulan en üstte)
-    news_items.sort(key=lambda x: x.get('cluster_size', 0), reverse=True)
+    latest = get_latest_edition_meta()
+    edition['is_latest'] = latest is not None and latest['id'] == edition['id']
     
-    return render_template('virtual_newspaper.html', user=user, news=news_items)
+    user = get_current_user()
+    return render_template('virtual_newspaper.html', user=user, edition=edition)
 
 
 @app.route('/canli-akis')
@@ -410,21 +514,46 @@ def earthquakes():
     return render_template('earthquakes.html', user=user, earthquakes=earthquake_data)
 
 
-if __name__ == '__main__':
-    # Sinyal handler'larını ayarla
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+def start_ingest():
+    """
+    Veritabanını hazırla ve veri toplamayı başlat
 
+    gunicorn altında web süreçleri yalnızca istekleri sunar; kaynak yoklama,
+    vektör/zaman çizelgesi tamamlama, hikâye ataması (StoryTracker), hikâye
+    ağacı ve Sanal Gazete baskıları tek bir ayrı süreçte çalışmalıdır
+    (Procfile: worker: python app.py --ingest). Web süreçleri canlı akışı ve
+    son haberleri veritabanını takip ederek günceller.
+    """
     # Veritabanını başlat
     print("Veritabanı başlatılıyor...")
     init_db()
 
+    # Eski haberlerin başlık vektörlerini tamamla
+    backfill_news_vectors()
+    backfill_vector_terms()
+    backfill_story_timeline()
+
     # Varsayılan admin kullanıcısını oluştur
     ensure_admin_exists()
 
     # Arka plan güncellemelerini başlat
     start_background_updates()
 
+
+if __name__ == '__main__':
+    # Sinyal handler'larını ayarla
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    start_ingest()
+
+    if '--ingest' in sys.argv[1:]:
+        # Yalnızca veri toplama: HTTP'yi gunicorn sunar
+        print("\nVeri toplama süreci çalışıyor (HTTP sunulmuyor)")
+        while not stop_event.wait(60):
+            pass
+        sys.exit(0)
+
     # Flask uygulamasını başlat
     print("\nFlask uygulaması başlatılıyor...")
     print("API: http://localhost:5001")
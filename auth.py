@@ -1,12 +1,46 @@
 """
 HaberMetrik - Kimlik Doğrulama Yardımcıları
+
+Girişte kullanıcının id, ad ve rolü Flask'ın imzalı oturum çerezine yazılır.
+Bu iddialar SESSION_CLAIMS_TTL boyunca veritabanına gitmeden kullanılır; süre
+dolunca kullanıcı (önbellekli) yeniden okunur, böylece silinen kullanıcı veya
+değişen rol en geç bu süre sonunda etkili olur.
 """
 
+import time
 from functools import wraps
 from flask import session, redirect, url_for, flash
+from config import SESSION_CLAIMS_TTL
 from database import get_user_by_id
 
 
+def set_session_user(user):
+    """Kullanıcının oturum iddialarını yaz"""
+    session['user_id'] = user['id']
+    session['username'] = user['username']
+    session['role'] = user['role']
+    session['claims_at'] = int(time.time())
+
+
+def _session_claims():
+    """
+    Oturumdaki kullanıcı iddiaları
+
+    Returns:
+        {'id', 'username', 'role'} veya oturum yoksa/kullanıcı silinmişse None
+    """
+    if 'user_id' not in session:
+        return None
+
+    if 'role' not in session or time.time() - session.get('claims_at', 0) >= SESSION_CLAIMS_TTL:
+        user = get_user_by_id(session['user_id'])
+        if not user:
+            return None
+        set_session_user(user)
+
+    return {'id': session['user_id'], 'username': session['username'], 'role': session['role']}
+
+
 def login_required(f):
     """Giriş gerektirir decorator"""
     @wraps(f)
@@ -25,21 +59,19 @@ def admin_required(f):
         if 'user_id' not in session:
             flash('Bu sayfayı görüntülemek için giriş yapmalısınız.', 'error')
             return redirect(url_for('login'))
-        
-        user = get_user_by_id(session['user_id'])
+
+        user = _session_claims()
         if not user or user['role'] != 'admin':
             flash('Bu sayfayı görüntülemek için admin yetkisi gereklidir.', 'error')
             return redirect(url_for('dashboard'))
-        
+
         return f(*args, **kwargs)
     return decorated_function
 
 
 def get_current_user():
-    """Mevcut kullanıcıyı getir"""
-    if 'user_id' in session:
-        return get_user_by_id(session['user_id'])
-    return None
+    """Mevcut kullanıcıyı getir ({'id', 'username', 'role'})"""
+    return _session_claims()
 
 
 def is_admin():
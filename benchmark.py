@@ -0,0 +1,478 @@
+"""
+HaberMetrik - Kümeleme Performans ve Kalite Ölçümü
+
+clustering.py'deki bir değişikliğin hız ve kaliteye etkisini ölçer.
+
+- Sentetik Türkçe başlık derlemleri (1k/10k/100k): her olay birkaç farklı
+  ifadeyle yazılmış başlıklardan oluşur, olay numarası doğru etikettir.
+- Kaydedilmiş gerçek derlemler (JSON Lines: {"id", "title", "label"?}).
+  --record ile veritabanından alınır; etiket olarak hikâye id'si yazılır.
+
+Her çalıştırmada vektörleştirme, komşu arama ve etiket atama ayrı ayrı
+zamanlanır, etiket varsa ARI/NMI hesaplanır. Süreler tracemalloc kapalıyken
+alınır (tracemalloc bellek ayıran aşamaları birkaç kat yavaşlatır); her
+aşamanın tepe belleği aşama ikinci kez çalıştırılarak ayrı bir geçişte
+ölçülür (--no-memory ile atlanır). Sonuçlar JSON dosyasına yazılır; --compare
+ile iki commit'in sonuçları karşılaştırılır.
+
+--payload ile kümeleme yerine gruplu arama yanıtının serileştirme süresi ve
+boyutu ölçülür (stdlib json / orjson, ham / gzip / brotli, fields=-description).
+
+Kullanım:
+    python benchmark.py --sizes 1000,10000 --output bench.json
+    python benchmark.py --sizes 100000 --engines lsh --no-memory
+    python benchmark.py --snapshot kayit.jsonl --engines brute,lsh
+    python benchmark.py --record kayit.jsonl --hours 24
+    python benchmark.py --compare eski.json --output yeni.json
+    python benchmark.py --payload --sizes 200,1000
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import sklearn
+from sklearn.cluster import DBSCAN
+from sklearn.metrics import adjusted_rand_score, normalized_mutual_info_score
+
+from lsh import lsh_radius_graph
+from vectors import vectorize_titles, tfidf_from_counts
+
+# Kaba kuvvet komşu arama bu boyutun üstünde atlanır (O(n²))
+BRUTE_MAX_ITEMS = 20000
+
+CITIES = [
+    'İstanbul', 'Ankara', 'İzmir', 'Bursa', 'Antalya', 'Adana', 'Konya', 'Trabzon',
+    'Gaziantep', 'Kayseri', 'Eskişehir', 'Samsun', 'Diyarbakır', 'Mersin', 'Erzurum',
+    'Malatya', 'Hatay', 'Van', 'Sakarya', 'Kocaeli'
+]
+ACTORS = [
+    'Cumhurbaşkanı', 'Bakanlık', 'Merkez Bankası', 'TBMM', 'Valilik', 'AFAD', 'Emniyet',
+    'Belediye', 'TFF', 'Galatasaray', 'Fenerbahçe', 'Beşiktaş', 'Trabzonspor', 'Meteoroloji',
+    'Sağlık Bakanlığı', 'Milli Eğitim', 'TÜİK', 'Borsa İstanbul', 'YSK', 'Kızılay'
+]
+PEOPLE = [
+    'Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Aydın', 'Öztürk', 'Arslan',
+    'Doğan', 'Kılıç', 'Aslan', 'Çetin', 'Kara', 'Koç', 'Kurt', 'Özdemir', 'Şimşek',
+    'Polat', 'Erdem'
+]
+SUBJECTS = [
+    'deprem', 'yangın', 'sel', 'trafik kazası', 'faiz kararı', 'enflasyon', 'seçim',
+    'derbi', 'transfer', 'zam', 'ihracat', 'operasyon', 'protesto', 'grev', 'fırtına',
+    'kar yağışı', 'asgari ücret', 'doğalgaz', 'akaryakıt', 'konut satışları', 'aşı',
+    'salgın', 'sınav', 'burs', 'maç', 'şampiyonluk', 'istifa', 'atama', 'soruşturma', 'dava'
+]
+ACTIONS = [
+    'açıkladı', 'duyurdu', 'uyardı', 'karar verdi', 'tepki gösterdi', 'onayladı',
+    'erteledi', 'başlattı', 'iptal etti', 'yalanladı', 'inceleme başlattı', 'rekor kırdı'
+]
+DETAILS = [
+    'yaralı', 'gözaltı', 'milyon lira', 'yüzde', 'puan', 'kişi', 'saat', 'ilçe',
+    'mahalle', 'bölge', 'tahliye', 'hasar', 'ceza', 'destek', 'paket', 'tarih'
+]
+SYLLABLES = [
+    'ka', 'ra', 'lı', 'me', 'sin', 'tep', 'ol', 'gün', 'dur', 'ya', 'ağ', 'ça', 'şe',
+    'köy', 'bel', 'ta', 'nur', 'de', 're', 'su', 'yol', 'kur', 'tan', 'mer', 'öz', 'can'
+]
+FILLERS = [
+    'son dakika', 'flaş', 'gelişme', 'açıklama', 'detaylar', 'canlı', 'işte', 'yeni',
+    'önemli', 'sıcak gelişme', 'gündem', 'kritik', 'resmi', 'ayrıntılar belli oldu'
+]
+
+
+def synthetic_corpus(n_items, seed=0, noise_ratio=0.3):
+    """
+    Etiketli sentetik başlık derlemi üret
+
+    Her olayın 6-9 kelimelik bir çekirdeği vardır: ortak havuzlardan şehir,
+    kurum, konu vb. ve olaya özgü iki uydurma özel isim. Olayın başlıkları bu
+    çekirdekten sırası korunarak kelime düşürülüp başa ya da sona bir dolgu
+    ifadesi eklenerek yazılır; farklı olaylar ortak havuz kelimelerini
+    paylaşabilir.
+
+    Returns:
+        (haberler, etiketler) - tekil (gürültü) başlıklar kendi etiketini alır
+    """
+    rng = random.Random(seed)
+
+    def proper_name():
+        return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+    items = []
+    labels = []
+    event = 0
+
+    while len(items) < n_items:
+        if rng.random() < noise_ratio:
+            words = rng.sample(SUBJECTS + DETAILS + FILLERS, 3) + [proper_name(), proper_name()]
+            items.append(' '.join(words))
+            labels.append(f"noise_{len(items)}")
+            continue
+
+        core = [
+            rng.choice(CITIES), rng.choice(ACTORS), rng.choice(PEOPLE),
+            rng.choice(SUBJECTS), rng.choice(ACTIONS), proper_name(), proper_name()
+        ] + rng.sample(DETAILS, rng.randint(0, 2))
+        size = min(int(rng.paretovariate(1.2)) + 1, 40, n_items - len(items))
+
+        for _ in range(size):
+            words = [w for w in core if rng.random() > 0.15] or core[:2]
+            filler = rng.choice(FILLERS)
+            words = [filler] + words if rng.random() < 0.5 else words + [filler]
+            items.append(' '.join(words))
+            labels.append(f"event_{event}")
+        event += 1
+
+    news = [
+        {'title': title, 'link': f'synthetic://{i}', 'source': 'synthetic'}
+        for i, title in enumerate(items)
+    ]
+    return news, labels
+
+
+def load_snapshot(path):
+    """
+    Kaydedilmiş derlemi yükle (JSON Lines)
+
+    Returns:
+        (haberler, etiketler veya None)
+    """
+    news = []
+    labels = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            news.append({'title': row['title'], 'link': row.get('link', ''), 'source': row.get('source', '')})
+            labels.append(row.get('label'))
+
+    if any(label is None for label in labels):
+        return news, None
+    return news, labels
+
+
+def record_snapshot(path, hours=24, limit=5000):
+    """
+    Veritabanındaki son haberleri derlem olarak kaydet
+
+    Etiket olarak hikâye id'si yazılır (hikâyesi olmayan haber tekil sayılır);
+    bu etiketler çevrimiçi kümeleyicinin çıktısıdır, elle doğrulanmış değildir.
+    """
+    from database import get_recent_news, get_story_assignments
+
+    news = get_recent_news(hours=hours, limit=limit)
+    assignments = get_story_assignments([item['id'] for item in news])
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for item in news:
+            assignment = assignments.get(item['id'])
+            label = f"story_{assignment['story_id']}" if assignment else f"single_{item['id']}"
+            f.write(json.dumps({
+                'id': item['id'],
+                'title': item['title'],
+                'source': item['source'],
+                'label': label
+            }, ensure_ascii=False) + '\n')
+
+    return len(news)
+
+
+def _measure(fn, memory=True):
+    """
+    fn() çalıştır: (sonuç, saniye, tepe bellek MB veya None)
+
+    Süre tracemalloc kapalıyken ölçülür; memory=True ise fn() tepe bellek
+    için tracemalloc altında bir kez daha çalıştırılır.
+    """
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+
+    if not memory:
+        return result, elapsed, None
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+
+def _stage(seconds, peak):
+    return {'seconds': round(seconds, 4), 'peak_mb': round(peak, 1) if peak is not None else None}
+
+
+def run_benchmark(news, labels, engine, eps=0.35, min_samples=2, memory=True):
+    """
+    Tek bir derlem ve motor için aşama süreleri, bellek ve kalite
+
+    Args:
+        memory: Aşamaların tepe belleğini ayrı bir geçişte ölç
+
+    Returns:
+        {'engine', 'items', 'stages': {aşama: {'seconds', 'peak_mb'}},
+         'total_seconds', 'clusters', 'noise', 'edges', 'ari'?, 'nmi'?}
+    """
+    from clustering import radius_graph
+
+    titles = [item['title'] for item in news]
+    stages = {}
+
+    matrix, seconds, peak = _measure(lambda: tfidf_from_counts(vectorize_titles(titles)), memory)
+    stages['vectorize'] = _stage(seconds, peak)
+
+    if engine == 'lsh':
+        graph, seconds, peak = _measure(lambda: lsh_radius_graph(matrix, eps), memory)
+    else:
+        graph, seconds, peak = _measure(lambda: radius_graph(matrix, eps), memory)
+    stages['neighbors'] = _stage(seconds, peak)
+
+    predicted, seconds, peak = _measure(
+        lambda: DBSCAN(eps=eps, min_samples=min_samples, metric='precomputed').fit_predict(graph),
+        memory
+    )
+    stages['labels'] = _stage(seconds, peak)
+
+    result = {
+        'engine': engine,
+        'items': len(news),
+        'stages': stages,
+        'total_seconds': round(sum(stage['seconds'] for stage in stages.values()), 4),
+        'clusters': int(len(set(predicted[predicted != -1]))),
+        'noise': int((predicted == -1).sum()),
+        'edges': int(graph.nnz // 2)
+    }
+
+    if labels is not None:
+        # Gürültü noktaları ayrı tekil kümeler sayılır
+        predicted = [f"c{label}" if label != -1 else f"n{i}" for i, label in enumerate(predicted)]
+        result['ari'] = round(adjusted_rand_score(labels, predicted), 4)
+        result['nmi'] = round(normalized_mutual_info_score(labels, predicted), 4)
+
+    return result
+
+
+def payload_benchmark(sizes=(200, 1000), seed=0, repeats=5):
+    """
+    /api/search-grouped yanıtının serileştirme ve sıkıştırma ölçümü
+
+    Sentetik haberlere gerçekçi uzunlukta açıklama eklenir, kümelenir ve
+    yanıt biçimine çevrilir. Her varyant (tam / fields=-description) için
+    stdlib ve orjson serileştirme süresi (en iyi tekrar) ile ham, gzip ve
+    brotli boyutları ölçülür.
+
+    Returns:
+        [{'items', 'variant', 'serializer', 'seconds', 'bytes', 'gzip_bytes', 'br_bytes'}, ...]
+    """
+    import gzip
+
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+
+    import serialization
+    from api.routes import _search_grouped_payload
+    from clustering import NewsClusterer
+
+    app = Flask(__name__)
+    providers = {'stdlib': DefaultJSONProvider(app)}
+    if serialization.orjson is not None:
+        providers['orjson'] = serialization.OrjsonProvider(app)
+
+    rng = random.Random(seed)
+    rows = []
+    for size in sizes:
+        news, _ = synthetic_corpus(size, seed=seed)
+        for i, item in enumerate(news):
+            item.update({
+                'id': i + 1,
+                'description': ' '.join(rng.choice(SUBJECTS + DETAILS + FILLERS) for _ in range(60)),
+                'pub_date': '2024-01-01 12:00:00',
+                'created_at': '2024-01-01 12:00:05',
+                'image_url': f'https://img.example/{i}.jpg'
+            })
+
+        clusters = NewsClusterer().cluster_news(news, eps=0.35, min_samples=2)
+        payload = _search_grouped_payload('benchmark', len(news))(clusters)
+
+        for variant, fields in (('full', None), ('-description', '-description')):
+            selected = serialization.select_fields(payload, fields)
+            for name, provider in providers.items():
+                best = None
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    body = provider.dumps(selected).encode()
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+
+                row = {
+                    'items': size,
+                    'variant': variant,
+                    'serializer': name,
+                    'seconds': round(best, 5),
+                    'bytes': len(body),
+                    'gzip_bytes': len(gzip.compress(body, compresslevel=6)),
+                    'br_bytes': (
+                        len(serialization.brotli.compress(body, quality=5))
+                        if serialization.brotli is not None else None
+                    )
+                }
+                rows.append(row)
+                print(f"📦 {size} haber / {variant} / {name}: {row['seconds'] * 1000:.1f} ms, "
+                      f"{row['bytes'] / 1024:.0f} KB, gzip {row['gzip_bytes'] / 1024:.0f} KB"
+                      + (f", br {row['br_bytes'] / 1024:.0f} KB" if row['br_bytes'] else ''))
+
+    return rows
+
+
+def _git_commit():
+    """Çalışılan commit (git yoksa None)"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def run_suite(sizes=(1000, 10000, 100000), snapshots=(), engines=('brute', 'lsh'),
+              eps=0.35, min_samples=2, seed=0, memory=True):
+    """
+    Tüm derlemler ve motorlar için ölçüm yap
+
+    Returns:
+        JSON'a yazılabilir sonuç sözlüğü
+    """
+    corpora = []
+    for size in sizes:
+        news, labels = synthetic_corpus(size, seed=seed)
+        corpora.append((f"synthetic_{size}", news, labels))
+    for path in snapshots:
+        news, labels = load_snapshot(path)
+        corpora.append((f"snapshot:{path}", news, labels))
+
+    runs = []
+    for name, news, labels in corpora:
+        for engine in engines:
+            if engine == 'brute' and len(news) > BRUTE_MAX_ITEMS:
+                runs.append({'corpus': name, 'engine': engine, 'items': len(news), 'skipped': True})
+                print(f"⏭️  {name} / {engine}: {len(news)} haber, atlandı (> {BRUTE_MAX_ITEMS})")
+                continue
+
+            result = run_benchmark(news, labels, engine, eps=eps, min_samples=min_samples, memory=memory)
+            result['corpus'] = name
+            runs.append(result)
+
+            quality = f", ARI={result['ari']}, NMI={result['nmi']}" if 'ari' in result else ''
+            print(f"⏱️  {name} / {engine}: {result['total_seconds']} sn, "
+                  f"{result['clusters']} küme{quality}")
+
+    return {
+        'commit': _git_commit(),
+        'created_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'params': {'eps': eps, 'min_samples': min_samples, 'seed': seed, 'memory': memory},
+        'runs': runs
+    }
+
+
+def compare_results(old, new):
+    """
+    İki sonuç dosyasını karşılaştır
+
+    Returns:
+        Satır listesi: derlem/motor başına süre oranı ve ARI farkı
+    """
+    old_runs = {(run['corpus'], run['engine']): run for run in old['runs'] if not run.get('skipped')}
+    lines = [f"{old.get('commit')} -> {new.get('commit')}"]
+
+    for run in new['runs']:
+        key = (run['corpus'], run['engine'])
+        before = old_runs.get(key)
+        if run.get('skipped') or before is None:
+            continue
+
+        ratio = run['total_seconds'] / before['total_seconds'] if before['total_seconds'] else float('inf')
+        line = f"{key[0]} / {key[1]}: süre x{ratio:.2f}"
+        for stage, values in run['stages'].items():
+            previous = before['stages'].get(stage)
+            if previous and previous['seconds']:
+                line += f", {stage} x{values['seconds'] / previous['seconds']:.2f}"
+        if 'ari' in run and 'ari' in before:
+            line += f", ARI {run['ari'] - before['ari']:+.4f}, NMI {run['nmi'] - before['nmi']:+.4f}"
+        lines.append(line)
+
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Kümeleme performans ve kalite ölçümü')
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='Sentetik derlem boyutları (virgülle, boş = yok)')
+    parser.add_argument('--snapshot', action='append', default=[],
+                        help='Kaydedilmiş derlem (JSON Lines), birden fazla verilebilir')
+    parser.add_argument('--engines', default='brute,lsh')
+    parser.add_argument('--eps', type=float, default=0.35)
+    parser.add_argument('--min-samples', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Tepe bellek geçişini atla (yalnızca süreler)')
+    parser.add_argument('--compare', help='Karşılaştırılacak eski sonuç dosyası')
+    parser.add_argument('--record', help='Veritabanından derlem kaydet ve çık')
+    parser.add_argument('--hours', type=int, default=24, help='--record için pencere')
+    parser.add_argument('--limit', type=int, default=5000, help='--record için en fazla haber')
+    parser.add_argument('--payload', action='store_true',
+                        help='Kümeleme yerine gruplu arama yanıtının serileştirme/sıkıştırma ölçümü')
+    args = parser.parse_args()
+
+    if args.record:
+        count = record_snapshot(args.record, hours=args.hours, limit=args.limit)
+        print(f"💾 {count} haber {args.record} dosyasına kaydedildi")
+        raise SystemExit(0)
+
+    if args.payload:
+        results = {
+            'commit': _git_commit(),
+            'created_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+            'payload': payload_benchmark(
+                sizes=[int(size) for size in args.sizes.split(',') if size.strip()],
+                seed=args.seed
+            )
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 Sonuçlar: {args.output}")
+        raise SystemExit(0)
+
+    results = run_suite(
+        sizes=[int(size) for size in args.sizes.split(',') if size.strip()],
+        snapshots=args.snapshot,
+        engines=[engine.strip() for engine in args.engines.split(',') if engine.strip()],
+        eps=args.eps,
+        min_samples=args.min_samples,
+        seed=args.seed,
+        memory=not args.no_memory
+    )
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"💾 Sonuçlar: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            for line in compare_results(json.load(f), results):
+                print(line)
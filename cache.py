@@ -0,0 +1,442 @@
+"""
+HaberMetrik - Önbellekler
+
+TTLCache: TTL ve LRU tahliyeli, single-flight hesaplamalı basit önbellek. Aynı
+anahtar için eşzamanlı gelen istekler tek bir hesaplamayı bekler.
+
+ResponseCache: Ağır API yanıtları için stale-while-revalidate önbelleği. Depo
+takılabilir: süreç içi MemoryBackend veya gunicorn worker'ları arasında
+paylaşılan RedisBackend. Tek süreç içinde single-flight, worker'lar arasında
+depodaki kısa ömürlü kilit ile bir anahtar için tek hesaplama yapılır.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class _Flight:
+    """Devam eden tek bir hesaplama"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """TTL + LRU önbellek (single-flight)"""
+
+    def __init__(self, maxsize=64, ttl=300):
+        """
+        Args:
+            maxsize: Tutulacak en fazla kayıt (aşılırsa en eski kullanılan atılır)
+            ttl: Kayıt ömrü (saniye)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'evictions': 0,
+            'invalidations': 0,
+            'errors': 0,
+            'compute_count': 0,
+            'compute_seconds': 0.0
+        }
+
+    def get_or_compute(self, key, compute):
+        """
+        Önbellekteki değeri döndür, yoksa compute() ile hesapla
+
+        Aynı anahtar için hesaplama sürerken gelen çağrılar sonucu bekler.
+        compute() hata verirse bekleyen tüm çağrılara aynı hata iletilir.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._data.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self._stats['misses'] += 1
+            else:
+                self._stats['waits'] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        start = time.perf_counter()
+        try:
+            value = compute()
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._stats['errors'] += 1
+            flight.event.set()
+            raise
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats['evictions'] += 1
+            self._inflight.pop(key, None)
+            self._stats['compute_count'] += 1
+            self._stats['compute_seconds'] += elapsed
+
+        flight.value = value
+        flight.event.set()
+        return value
+
+    def get(self, key):
+        """Geçerli kaydı döndür, yoksa None (hesaplama başlatmaz)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._data.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1]
+            self._stats['misses'] += 1
+            return None
+
+    def set(self, key, value, compute_seconds=None):
+        """Dışarıda hesaplanan değeri kaydet (ör. süreç havuzundaki iş)"""
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats['evictions'] += 1
+            if compute_seconds is not None:
+                self._stats['compute_count'] += 1
+                self._stats['compute_seconds'] += compute_seconds
+
+    def invalidate(self):
+        """Tüm kayıtları düşür (süren hesaplamalar etkilenmez)"""
+        with self._lock:
+            self._data.clear()
+            self._stats['invalidations'] += 1
+
+    def get_stats(self):
+        """İsabet oranı ve hesaplama süreleri"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._data)
+
+        lookups = stats['hits'] + stats['misses'] + stats['waits']
+        stats['hit_rate'] = round((stats['hits'] + stats['waits']) / lookups, 3) if lookups else 0
+        stats['avg_compute_ms'] = (
+            round(stats['compute_seconds'] / stats['compute_count'] * 1000, 1)
+            if stats['compute_count'] else 0
+        )
+        stats['compute_seconds'] = round(stats['compute_seconds'], 3)
+        return stats
+
+
+class MemoryBackend:
+    """Süreç içi yanıt deposu (LRU)"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._locks = {}            # key -> expires_at
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.time():
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def acquire(self, key, timeout):
+        """Hesaplama kilidini al (süresi dolan kilit yeniden alınabilir)"""
+        with self._lock:
+            now = time.time()
+            if self._locks.get(key, 0) > now:
+                return False
+            self._locks[key] = now + timeout
+            return True
+
+    def release(self, key):
+        with self._lock:
+            self._locks.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """
+    Worker'lar arasında paylaşılan yanıt deposu
+
+    Değerler JSON olarak saklanır; kilit SET NX PX ile alınır. client, redis-py
+    arayüzünü (get, set(nx=, px=), delete, scan_iter) sağlayan herhangi bir
+    nesne olabilir.
+    """
+
+    def __init__(self, client, prefix='habermetrik:response:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), px=max(int(ttl * 1000), 1))
+
+    def acquire(self, key, timeout):
+        return bool(self.client.set(self.prefix + 'lock:' + key, '1', nx=True, px=int(timeout * 1000)))
+
+    def release(self, key):
+        self.client.delete(self.prefix + 'lock:' + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    """
+    TTL + stale-while-revalidate yanıt önbelleği
+
+    Kayıt ttl saniye taze, sonrasında stale saniye daha bayat kabul edilir.
+    Bayat kayıt hemen döndürülür ve arka planda tek bir yenileme başlatılır;
+    süresi tamamen dolmuş kayıt için çağıran hesaplamayı bekler.
+    """
+
+    def __init__(self, backend, ttl=30, stale=120, lock_timeout=30):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale = stale
+        self.lock_timeout = lock_timeout
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'remote_waits': 0,
+            'refreshes': 0,
+            'errors': 0,
+            'compute_count': 0,
+            'compute_seconds': 0.0
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def get_or_compute(self, key, compute, ttl=None, should_store=None):
+        """
+        Kayıt tazeyse döndür, bayatsa döndürüp arka planda yenile, yoksa hesapla
+
+        Args:
+            compute: JSON'a çevrilebilir değer döndüren fonksiyon
+            should_store: Değerin saklanıp saklanmayacağına karar veren fonksiyon
+                (ör. yalnızca 200 yanıtları); saklanmayan değer yine döndürülür
+        """
+        ttl = ttl if ttl is not None else self.ttl
+        entry = self._read(key)
+        now = time.time()
+
+        if entry is not None and now < entry['fresh_until']:
+            self._count('hits')
+            return entry['value']
+
+        if entry is not None:
+            self._count('stale_hits')
+            self._refresh_in_background(key, compute, ttl, should_store)
+            return entry['value']
+
+        return self._compute(key, compute, ttl, should_store)
+
+    def _read(self, key):
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            print(f"Yanıt önbelleği okunamadı: {e}")
+            return None
+
+    def _compute(self, key, compute, ttl, should_store, background=False):
+        """Tek süreç içinde single-flight hesaplama"""
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self._stats['refreshes' if background else 'misses'] += 1
+            elif background:
+                return None
+            else:
+                self._stats['waits'] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._compute_shared(key, compute, ttl, should_store)
+        except Exception as e:
+            flight.error = e
+            self._count('errors')
+            if not background:
+                raise
+            print(f"Yanıt önbelleği yenilenemedi ({key}): {e}")
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+        return flight.value
+
+    def _compute_shared(self, key, compute, ttl, should_store):
+        """Depodaki kilitle worker'lar arasında tek hesaplama"""
+        try:
+            locked = self.backend.acquire(key, self.lock_timeout)
+        except Exception as e:
+            print(f"Yanıt önbelleği kilidi alınamadı: {e}")
+            locked = True
+
+        if not locked:
+            # Başka bir worker hesaplıyor: sonucunu bekle, gelmezse kendin hesapla
+            self._count('remote_waits')
+            deadline = time.time() + self.lock_timeout
+            while time.time() < deadline:
+                time.sleep(0.05)
+                entry = self._read(key)
+                if entry is not None and time.time() < entry['fresh_until']:
+                    return entry['value']
+
+        start = time.perf_counter()
+        try:
+            value = compute()
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._stats['compute_count'] += 1
+                self._stats['compute_seconds'] += elapsed
+
+            if should_store is None or should_store(value):
+                now = time.time()
+                entry = {'value': value, 'fresh_until': now + ttl, 'stale_until': now + ttl + self.stale}
+                try:
+                    self.backend.set(key, entry, ttl + self.stale)
+                except Exception as e:
+                    print(f"Yanıt önbelleğine yazılamadı: {e}")
+            return value
+        finally:
+            if locked:
+                try:
+                    self.backend.release(key)
+                except Exception:
+                    pass
+
+    def _refresh_in_background(self, key, compute, ttl, should_store):
+        """Bayat kaydı bekletmeden yenile (anahtar başına tek thread)"""
+        with self._lock:
+            if key in self._inflight:
+                return
+        thread = threading.Thread(
+            target=self._compute,
+            args=(key, compute, ttl, should_store, True),
+            name='response_refresh',
+            daemon=True
+        )
+        thread.start()
+
+    def invalidate(self):
+        """Tüm kayıtları düşür"""
+        self.backend.clear()
+
+    def get_stats(self):
+        """İsabet oranı ve hesaplama süreleri"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses'] + stats['waits']
+        stats['hit_rate'] = (
+            round((stats['hits'] + stats['stale_hits'] + stats['waits']) / lookups, 3) if lookups else 0
+        )
+        stats['avg_compute_ms'] = (
+            round(stats['compute_seconds'] / stats['compute_count'] * 1000, 1)
+            if stats['compute_count'] else 0
+        )
+        stats['compute_seconds'] = round(stats['compute_seconds'], 3)
+        stats['backend'] = type(self.backend).__name__
+        return stats
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Yapılandırılmış yanıt önbelleği (RESPONSE_CACHE_BACKEND 'off' ise None)
+
+    'redis' seçilmiş ama redis paketi yoksa veya sunucuya ulaşılamıyorsa süreç
+    içi depoya düşülür.
+    """
+    global _response_cache
+    from config import (
+        RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_REDIS_URL, RESPONSE_CACHE_TTL,
+        RESPONSE_CACHE_STALE, RESPONSE_CACHE_LOCK_TIMEOUT
+    )
+
+    if RESPONSE_CACHE_BACKEND == 'off':
+        return None
+
+    with _response_cache_lock:
+        if _response_cache is None:
+            backend = None
+            if RESPONSE_CACHE_BACKEND == 'redis':
+                if redis is None:
+                    print("redis paketi kurulu değil, yanıt önbelleği süreç içinde tutulacak")
+                else:
+                    try:
+                        client = redis.Redis.from_url(RESPONSE_CACHE_REDIS_URL)
+                        client.ping()
+                        backend = RedisBackend(client)
+                    except Exception as e:
+                        print(f"Redis'e bağlanılamadı, yanıt önbelleği süreç içinde tutulacak: {e}")
+            _response_cache = ResponseCache(
+                backend or MemoryBackend(),
+                ttl=RESPONSE_CACHE_TTL,
+                stale=RESPONSE_CACHE_STALE,
+                lock_timeout=RESPONSE_CACHE_LOCK_TIMEOUT
+            )
+        return _response_cache
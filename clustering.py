@@ -5,78 +5,474 @@ BERT embeddings kullanarak Türkçe haberleri anlamsal olarak gruplar.
 """
 
 
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import DBSCAN
 from collections import Counter
-import re
+import hashlib
+import random
+import threading
+import time
 import numpy as np
+from scipy import sparse
+from cache import TTLCache
+from config import (
+    CLUSTER_CACHE_SIZE, CLUSTER_CACHE_TTL, CLUSTER_ENGINE, CLUSTER_LSH_MIN_ITEMS,
+    CLUSTER_MAX_CONCURRENCY, CLUSTER_QUEUE_TIMEOUT, CLUSTER_MAX_EPS,
+    REPRESENTATIVE_CACHE_SIZE
+)
+from lsh import lsh_radius_graph
+from metrics import CLUSTERING_LATENCY
+from vectors import vectorize_titles, pack_vector, unpack_vectors, tfidf_from_counts, distance_graph
+
+# Kümeleme sonuçları: (haber id kümesi, eps, min_samples) -> kümeler
+_cluster_cache = TTLCache(maxsize=CLUSTER_CACHE_SIZE, ttl=CLUSTER_CACHE_TTL)
+
+# Komşu grafikleri: (haber id kümesi, yarıçap, motor) -> seyrek mesafe matrisi
+_graph_cache = TTLCache(maxsize=CLUSTER_CACHE_SIZE, ttl=CLUSTER_CACHE_TTL)
+
+# Temsilci seçimleri: (küme üyeleri parmak izi, tohum) -> seçilen haberin anahtarı
+_representative_cache = TTLCache(maxsize=REPRESENTATIVE_CACHE_SIZE, ttl=CLUSTER_CACHE_TTL)
+
+# Aynı anda çalışan kümeleme hesaplaması sınırı (fazlası sırada bekler)
+_compute_slots = threading.BoundedSemaphore(CLUSTER_MAX_CONCURRENCY)
+
+
+# Anahtar kelime olarak kullanılmayan kelimeler
+STOPWORDS = {
+    've', 'veya', 'ile', 'ama', 'fakat', 'ancak', 'için', 'gibi', 
+    'bir', 'bu', 'şu', 'o', 'ne', 'nasıl', 'neden', 'niçin',
+    'mi', 'mı', 'mu', 'mü', 'de', 'da', 'ki', 'dı', 'di',
+    'var', 'yok', 'olan', 'oldu', 'olacak', 'etti', 'ediyor',
+    'den', 'dan', 'ten', 'tan', 'e', 'a', 'ye', 'ya'
+}
+
+# Anahtar kelime aranırken küme başına bakılan en ağır sütun sayısı
+KEYWORD_CANDIDATES = 20
+
+
+class ClusteringBusyError(RuntimeError):
+    """Kümeleme sırası CLUSTER_QUEUE_TIMEOUT içinde boşalmadı"""
+
+
+def news_fingerprint(news_items, ordered=False):
+    """
+    Haber listesinin içerik parmak izi (id kümesi)
+    
+    Haberler eklendikten sonra değişmediği için aynı id kümesi her zaman aynı
+    kümelemeyi verir; yeni haber gelince parmak izi de değişir.
+    
+    Args:
+        ordered: True ise sıra da dahil edilir (satırları girdi sırasına bağlı
+                 matris/grafik önbelleği için)
+    """
+    keys = [
+        str(item['id']) if item.get('id') is not None else 't:' + item['title']
+        for item in news_items
+    ]
+    if not ordered:
+        keys.sort()
+    return hashlib.blake2b('\n'.join(keys).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def copy_clusters(clusters):
+    """Önbellekteki sonucu çağıranların değiştirebileceği şekilde kopyala"""
+    return {
+        cluster_id: dict(cluster, news=[dict(item) for item in cluster['news']])
+        for cluster_id, cluster in clusters.items()
+    }
+
+
+def get_cluster_cache_stats():
+    """Kümeleme önbelleği istatistikleri (komşu grafiği önbelleği 'graph_cache')"""
+    stats = _cluster_cache.get_stats()
+    stats['graph_cache'] = _graph_cache.get_stats()
+    stats['representative_cache'] = _representative_cache.get_stats()
+    return stats
+
+
+def invalidate_cluster_cache():
+    """Kümeleme ve komşu grafiği önbelleklerini boşalt"""
+    _cluster_cache.invalidate()
+    _graph_cache.invalidate()
+    _representative_cache.invalidate()
+
+
+def cluster_keywords(matrix, labels, top_n=3):
+    """
+    Kümelerin anahtar kelimeleri (TF-IDF merkezlerinden)
+    
+    Tüm küme merkezleri tek bir seyrek çarpımla hesaplanır; her merkezin en
+    ağır sütunları vector_terms tablosundan terime çevrilir. Bigram sütunları
+    ve STOPWORDS elenir.
+    
+    Args:
+        matrix: TF-IDF matrisi (n x F)
+        labels: Her satırın küme numarası (0..k-1), -1 = yok say
+    
+    Returns:
+        {küme numarası: [(terim, ağırlık), ...]}
+    """
+    from database import get_vector_terms
+    
+    labels = np.asarray(labels)
+    rows = np.flatnonzero(labels >= 0)
+    if len(rows) == 0:
+        return {}
+    
+    # Ortalama matrisi (k x n) ile merkezler (k x F)
+    n_clusters = labels[rows].max() + 1
+    sizes = np.bincount(labels[rows], minlength=n_clusters)
+    membership = sparse.csr_matrix(
+        (1.0 / sizes[labels[rows]], (labels[rows], rows)),
+        shape=(n_clusters, matrix.shape[0])
+    )
+    centroids = (membership @ matrix).tocoo()
+    
+    # Her merkezin en ağır KEYWORD_CANDIDATES sütunu (satır içinde ağırlığa göre sıralı)
+    order = np.lexsort((-centroids.data, centroids.row))
+    cluster_of, column, weight = centroids.row[order], centroids.col[order], centroids.data[order]
+    row_start = np.searchsorted(cluster_of, cluster_of, side='left')
+    keep = np.arange(len(order)) - row_start < KEYWORD_CANDIDATES
+    cluster_of, column, weight = cluster_of[keep], column[keep], weight[keep]
+    
+    terms = get_vector_terms(np.unique(column).tolist())
+    
+    keywords = {}
+    for label, col, w in zip(cluster_of.tolist(), column.tolist(), weight.tolist()):
+        term = terms.get(col)
+        if term is None or term in STOPWORDS or len(term) <= 2:
+            continue
+        found = keywords.setdefault(label, [])
+        if len(found) < top_n:
+            found.append((term, round(w, 4)))
+    return keywords
+
+
+def keyword_title(keywords, news_items):
+    """Anahtar kelimelerden küme başlığı (yoksa ilk haberin başlığı)"""
+    if keywords:
+        return ' '.join(term for term, _ in keywords).title()
+    return news_items[0]['title'][:50] + '...'
+
+
+def assign_story_ids(clusters):
+    """
+    DBSCAN etiketlerini kalıcı hikâye id'leriyle değiştir
+    
+    Her küme, üyelerinin en çok ait olduğu hikâyenin id'sini alır (büyük
+    kümeler önce seçer). Hikâyesi olmayan kümeler en eski haberinin id'sini,
+    tekil haberler 'single_<haber id>' alır. Böylece aynı haberler yeniden
+    kümelendiğinde id'ler değişmez.
+    
+    Returns:
+        {id: küme} - her kümede 'story_id' (eşleşen hikâye veya None)
+    """
+    from database import get_story_assignments
+    
+    ids = [item['id'] for cluster in clusters.values() for item in cluster['news'] if item.get('id') is not None]
+    assignments = get_story_assignments(ids)
+    
+    claimed = set()
+    result = {}
+    for label, cluster in clusters.items():
+        news_ids = [item['id'] for item in cluster['news'] if item.get('id') is not None]
+        votes = Counter(
+            assignments[news_id]['story_id'] for news_id in news_ids if news_id in assignments
+        )
+        story_id = next(
+            (s for s, _ in sorted(votes.items(), key=lambda x: (-x[1], x[0])) if str(s) not in claimed),
+            None
+        )
+        
+        if story_id is not None:
+            cluster_id = str(story_id)
+        elif not news_ids:
+            cluster_id = f"c{label}"
+        elif len(cluster['news']) == 1:
+            cluster_id = f"single_{news_ids[0]}"
+        else:
+            cluster_id = str(min(news_ids))
+        
+        if cluster_id in claimed:
+            cluster_id = f"c{label}"
+        claimed.add(cluster_id)
+        
+        cluster['id'] = cluster_id
+        cluster['story_id'] = story_id
+        result[cluster_id] = cluster
+    
+    return result
+
+
+def _news_key(item):
+    """Haberin kararlı anahtarı (kaydedilmemiş haberler için başlık)"""
+    return item['id'] if item.get('id') is not None else 't:' + item['title']
+
+
+def representative_candidates(cluster_news):
+    """
+    Küme temsilcisi adayları ve seçim ağırlıkları
+
+    Görselli ve açıklaması uzun haberler önceliklidir. Bu türden en az 3 haber
+    varsa yalnızca en iyi 10'u aday olur; 1-2 tane varsa her biri 5 ağırlıkla
+    en iyi 4 metin haberiyle karışır (görsel ~%60-70 olasılıkla gelir); hiç
+    yoksa en iyi 5 metin haberi eşit ağırlıkla aday olur. Açıklaması 10
+    karakterden kısa haberler aday olmaz.
+
+    Returns:
+        (adaylar, ağırlıklar)
+    """
+    rich_candidates = []      # Görsel + uzun açıklama
+    fallback_candidates = []  # Diğerleri (yalnızca metin, kısa açıklama)
+
+    for item in cluster_news:
+        desc_len = len(item.get('description') or '')
+        if item.get('image_url') and desc_len > 20:
+            rich_candidates.append(item)
+        elif desc_len > 10:
+            fallback_candidates.append(item)
+
+    # Görsel -> açıklama uzunluğu -> tarih; eşitlikte anahtar (girdi sırasından bağımsız)
+    def quality(item):
+        return (
+            1 if item.get('image_url') else 0,
+            len(item.get('description') or ''),
+            item.get('pub_date') or '',
+            str(_news_key(item))
+        )
+
+    rich_candidates.sort(key=quality, reverse=True)
+    fallback_candidates.sort(key=quality, reverse=True)
+
+    if len(rich_candidates) >= 3:
+        candidates = rich_candidates[:10]
+        weights = [1] * len(candidates)
+    elif rich_candidates:
+        candidates = rich_candidates + fallback_candidates[:4]
+        weights = [5] * len(rich_candidates) + [1] * len(fallback_candidates[:4])
+    else:
+        candidates = fallback_candidates[:5]
+        weights = [1] * len(candidates)
+
+    return candidates, weights
+
+
+def pick_representative(cluster_news, seed=0):
+    """
+    Kümenin temsili haberi (aynı üyeler ve tohum için her zaman aynı haber)
+
+    Rastgele üreteç tohum ve küme üyelerinin parmak iziyle başlatılır; seçim
+    (parmak izi, tohum) başına bir kez yapılıp saklanır.
+
+    Args:
+        seed: Seçim tohumu (ör. baskı veya kullanıcı başına)
+
+    Returns:
+        Seçilen haber veya uygun aday yoksa None
+    """
+    if not cluster_news:
+        return None
+
+    fingerprint = news_fingerprint(cluster_news)
+
+    def compute():
+        candidates, weights = representative_candidates(cluster_news)
+        if not candidates:
+            return None
+        rng = random.Random(f"{seed}:{fingerprint}")
+        return _news_key(rng.choices(candidates, weights=weights)[0])
+
+    chosen = _representative_cache.get_or_compute((fingerprint, str(seed)), compute)
+    if chosen is None:
+        return None
+    return next((item for item in cluster_news if _news_key(item) == chosen), None)
+
+
+def select_representatives(clusters, seed=0):
+    """
+    Her kümeden bir temsili haber seç (bkz. pick_representative)
+
+    Returns:
+        Küme büyüklüğüne göre sıralı haber kopyaları (cluster_size, cluster_title eklenmiş)
+    """
+    news_items = []
+    seen_titles = set()
+
+    for cluster in clusters.values():
+        best_news = pick_representative(cluster['news'], seed)
+        if best_news is None or best_news['title'] in seen_titles:
+            continue
+
+        news_items.append(dict(
+            best_news,
+            cluster_size=cluster['count'],
+            cluster_title=cluster['title']
+        ))
+        seen_titles.add(best_news['title'])
+
+    # En çok konuşulan en üstte
+    news_items.sort(key=lambda x: x.get('cluster_size', 0), reverse=True)
+    return news_items
+
+
+def radius_graph(matrix, eps, chunk_size=2000):
+    """
+    Kosinüs mesafesi eps'ten küçük/eşit tüm haber çiftleri (kesin)
+    
+    lsh_radius_graph ile aynı biçimde seyrek mesafe matrisi döndürür;
+    satır parçalarıyla hesaplandığı için n x n yoğun matris oluşmaz.
+    """
+    matrix = sparse.csr_matrix(matrix)
+    n = matrix.shape[0]
+    threshold = 1.0 - eps
+    
+    rows, cols, similarities = [], [], []
+    for start in range(0, n, chunk_size):
+        sims = (matrix[start:start + chunk_size] @ matrix.T).tocoo()
+        keep = (sims.data >= threshold) & (sims.row + start != sims.col)
+        rows.append(sims.row[keep] + start)
+        cols.append(sims.col[keep])
+        similarities.append(sims.data[keep])
+    
+    if not rows:
+        return sparse.csr_matrix((n, n))
+    
+    return distance_graph(np.concatenate(rows), np.concatenate(cols), np.concatenate(similarities), n)
+
 
 class NewsClusterer:
-    """Haber gruplama sınıfı (TF-IDF Lightweight Sürümü)"""
+    """
+    Haber gruplama sınıfı (TF-IDF Lightweight Sürümü)
     
-    def __init__(self, model_name=None):
+    Örnek üzerinde değişen durum tutulmaz: vektörleştirici durumsuzdur,
+    TF-IDF ve DBSCAN her çağrıda yeniden oluşturulur. Bu yüzden aynı örnek
+    birden fazla thread'den güvenle kullanılabilir.
+    """
+    
+    def __init__(self, model_name=None, engine=CLUSTER_ENGINE):
         """
         Args:
             model_name: Geriye uyumluluk için tutuldu (kullanılmıyor)
+            engine: 'brute', 'lsh' veya 'auto' (bkz. config.CLUSTER_ENGINE)
         """
         print("📥 TF-IDF Vektörleştirici ile başlatılıyor (Lightweight Mode)")
-        self.vectorizer = TfidfVectorizer(
-            stop_words=None, # Türkçe stop words aşağıda manuel temizleniyor
-            max_features=5000,
-            ngram_range=(1, 2)
-        )
+        self.engine = engine
     
-    def extract_keywords(self, text, top_n=3):
-        """Metinden anahtar kelimeleri çıkar"""
-        stopwords = {
-            've', 'veya', 'ile', 'ama', 'fakat', 'ancak', 'için', 'gibi', 
-            'bir', 'bu', 'şu', 'o', 'ne', 'nasıl', 'neden', 'niçin',
-            'mi', 'mı', 'mu', 'mü', 'de', 'da', 'ki', 'dı', 'di',
-            'var', 'yok', 'olan', 'oldu', 'olacak', 'etti', 'ediyor',
-            'den', 'dan', 'ten', 'tan', 'e', 'a', 'ye', 'ya', 'ile'
-        }
+    def resolve_engine(self, n_items, engine=None):
+        """Haber sayısına göre kullanılacak komşu arama motorunu seç"""
+        engine = engine or self.engine
+        if engine == 'auto':
+            return 'lsh' if n_items >= CLUSTER_LSH_MIN_ITEMS else 'brute'
+        return engine
+    
+    def vectorize(self, news_items):
+        """
+        Haberlerin TF-IDF matrisini oluştur
+        
+        Saklanan vektörler (news_vectors) id ile yüklenir; id'si veya vektörü
+        olmayan haberler anında vektörleştirilir.
+        """
+        from database import get_news_vectors
+        
+        ids = [item['id'] for item in news_items if item.get('id') is not None]
+        stored = get_news_vectors(ids)
         
-        words = re.findall(r'\b\w+\b', text.lower())
-        filtered = [w for w in words if w not in stopwords and len(w) > 2]
+        blobs = [stored.get(item.get('id')) for item in news_items]
+        missing = [i for i, blob in enumerate(blobs) if blob is None]
         
-        if not filtered:
-            return []
+        if missing:
+            fresh = vectorize_titles([news_items[i]['title'] for i in missing])
+            for row, i in enumerate(missing):
+                blobs[i] = pack_vector(fresh, row)
         
-        counter = Counter(filtered)
-        return [word for word, _ in counter.most_common(top_n)]
+        return tfidf_from_counts(unpack_vectors(blobs))
     
-    def generate_cluster_title(self, news_items):
-        """Küme için otomatik başlık oluştur"""
-        all_text = ' '.join([item['title'] for item in news_items])
-        keywords = self.extract_keywords(all_text, top_n=3)
+    def cache_key(self, news_items, eps, min_samples, engine=None):
+        """Kümeleme önbelleği anahtarı: (parmak izi, eps, min_samples, motor)"""
+        engine = self.resolve_engine(len(news_items), engine)
+        return (news_fingerprint(news_items), eps, min_samples, engine)
+    
+    def get_cached(self, key):
+        """Önbellekteki kümeleri kopya olarak döndür (yoksa None)"""
+        clusters = _cluster_cache.get(key)
+        return copy_clusters(clusters) if clusters is not None else None
+    
+    def store_cached(self, key, clusters, compute_seconds=None):
+        """Başka bir süreçte hesaplanan kümeleri önbelleğe yaz"""
+        _cluster_cache.set(key, copy_clusters(clusters), compute_seconds)
+    
+    def neighbor_graph(self, news_items, eps, engine):
+        """
+        Haberlerin TF-IDF matrisi ve komşu grafiği (önbellekli)
         
-        if keywords:
-            return ' '.join(keywords).title()
+        Brute motorda (CLUSTER_LSH_MIN_ITEMS altı) grafik CLUSTER_MAX_EPS
+        yarıçapıyla kurulur; DBSCAN daha küçük eps için yalnızca eşiği geçen
+        kenarları kullandığından aynı grafik her eps/min_samples denemesinde
+        yeniden kullanılır. LSH motorunda ve büyük girdilerde en büyük
+        yarıçapın kenar sayısı ve belleği ölçeklemeyi bozduğundan grafik
+        istenen eps ile kurulur.
+        
+        Önbellek anahtarı sıralı parmak izidir: matris ve grafik satırları
+        girdi sırasını izler, aynı haberlerin farklı sırası aynı grafiği
+        kullanamaz.
+        
+        Returns:
+            (tfidf_matrix, graph)
+        """
+        if engine == 'lsh' or len(news_items) >= CLUSTER_LSH_MIN_ITEMS:
+            radius = eps
         else:
-            return news_items[0]['title'][:50] + '...'
+            radius = max(eps, CLUSTER_MAX_EPS)
+        key = (news_fingerprint(news_items, ordered=True), radius, engine)
+        
+        def compute():
+            print(f"🔍 {len(news_items)} haber için TF-IDF hesaplanıyor...")
+            tfidf_matrix = self.vectorize(news_items)
+            if engine == 'lsh':
+                # Yaklaşık komşu grafiği: yalnızca LSH kovalarında doğrulanan çiftler
+                return tfidf_matrix, lsh_radius_graph(tfidf_matrix, radius)
+            return tfidf_matrix, radius_graph(tfidf_matrix, radius)
+        
+        return _graph_cache.get_or_compute(key, compute)
     
-    def cluster_news(self, news_items, eps=0.4, min_samples=2):
-        """Haberleri kümelere ayır (TF-IDF + DBSCAN)"""
+    def cluster_news(self, news_items, eps=0.4, min_samples=2, engine=None):
+        """
+        Haberleri kümelere ayır (önbellekli)
+        
+        Aynı girdi için eşzamanlı istekler tek bir hesaplamayı bekler.
+        """
         if not news_items:
             return {}
         
-        titles = [item['title'] for item in news_items]
-        
-        print(f"🔍 {len(titles)} haber için TF-IDF hesaplanıyor...")
-        
-        # TF-IDF Matrisi oluştur
+        key = self.cache_key(news_items, eps, min_samples, engine)
+        engine = key[3]
+        clusters = _cluster_cache.get_or_compute(
+            key,
+            lambda: copy_clusters(self._cluster_news_limited(news_items, eps, min_samples, engine))
+        )
+        return copy_clusters(clusters)
+    
+    def _cluster_news_limited(self, news_items, eps, min_samples, engine):
+        """Eşzamanlılık sınırı altında kümele"""
+        if not _compute_slots.acquire(timeout=CLUSTER_QUEUE_TIMEOUT):
+            raise ClusteringBusyError('Kümeleme sırası dolu, lütfen tekrar deneyin')
+        start = time.perf_counter()
         try:
-            tfidf_matrix = self.vectorizer.fit_transform(titles)
-            
-            # DBSCAN (Cosine Similarity = 1 - Cosine Distance)
-            # sklearn DBSCAN varsayılan olarak euclidean kullanır. 
-            # TF-IDF l2 normalize olduğu için euclidean ~ cosine distance davranır.
-            # Ancak biz yine de 'cosine' metriğini kullanalım daha doğru sonuç için.
+            return self._cluster_news(news_items, eps, min_samples, engine)
+        finally:
+            _compute_slots.release()
+            CLUSTERING_LATENCY.observe(time.perf_counter() - start, engine, 'inprocess')
+    
+    def _cluster_news(self, news_items, eps, min_samples, engine):
+        """Haberleri kümelere ayır (TF-IDF + DBSCAN)"""
+        try:
+            # Kosinüs mesafeli komşu grafiği (TF-IDF saklanan vektörlerden)
+            tfidf_matrix, graph = self.neighbor_graph(news_items, eps, engine)
             
-            print(f"📊 Clustering yapılıyor (eps={eps}, min_samples={min_samples})...")
+            print(f"📊 Clustering yapılıyor (eps={eps}, min_samples={min_samples}, engine={engine})...")
             
-            clustering = DBSCAN(eps=eps, min_samples=min_samples, metric='cosine', algorithm='brute')
-            labels = clustering.fit_predict(tfidf_matrix) # Sparse matrix destekler
+            # DBSCAN grafikteki eps'ten uzak kenarları yok sayar
+            clustering = DBSCAN(eps=eps, min_samples=min_samples, metric='precomputed')
+            labels = clustering.fit_predict(graph)
             
             # Kümeleri oluştur
             clusters = {}
@@ -93,12 +489,26 @@ class NewsClusterer:
             
             print(f"✅ {len(clusters)} küme oluşturuldu")
             
+            # Anahtar kelimeler: tüm kümelerin TF-IDF merkezleri tek seferde
+            # (tekil haberler kendi grubunu alır)
+            order = {cluster_id: i for i, cluster_id in enumerate(clusters)}
+            groups = [
+                order[str(label) if label != -1 else f"single_{idx}"]
+                for idx, label in enumerate(labels)
+            ]
+            keywords = cluster_keywords(tfidf_matrix, groups)
+            
             # Sonuçları hazırla
             result = {}
             for cluster_id, items in clusters.items():
+                top_terms = keywords.get(order[cluster_id], [])
                 result[cluster_id] = {
                     'id': cluster_id,
-                    'title': self.generate_cluster_title(items),
+                    'title': keyword_title(top_terms, items),
+                    'keywords': [term for term, _ in top_terms],
+                    'keyword_weights': [
+                        {'term': term, 'weight': weight} for term, weight in top_terms
+                    ],
                     'count': len(items),
                     'news': sorted(items, key=lambda x: x.get('pub_date') or '', reverse=True)
                 }
@@ -110,18 +520,33 @@ class NewsClusterer:
                 reverse=True
             ))
             
-            return sorted_clusters
+            return assign_story_ids(sorted_clusters)
 
         except ValueError:
             # Boş veri vb. durumlarda
             return {}
 
+
+def cluster_news_job(news_items, eps, min_samples, engine):
+    """
+    Süreç havuzunda çalışan kümeleme işi (bkz. jobs.py)
+    
+    Returns:
+        (kümeler, hesaplama süresi saniye)
+    """
+    start = time.perf_counter()
+    clusters = get_clusterer()._cluster_news(news_items, eps, min_samples, engine)
+    return clusters, time.perf_counter() - start
+
+
 # Global singleton
 _clusterer = None
+_clusterer_lock = threading.Lock()
 
 def get_clusterer():
     global _clusterer
     if _clusterer is None:
-        _clusterer = NewsClusterer()
+        with _clusterer_lock:
+            if _clusterer is None:
+                _clusterer = NewsClusterer()
     return _clusterer
-
@@ -7,12 +7,25 @@ import os
 # Veritabanı ayarları
 DATABASE_PATH = 'habermetre.db'
 
+# Analitik motoru: 'sqlite' (varsayılan) veya 'duckdb'
+# 'duckdb' seçilirse zaman/kaynak toplamaları yerel bir DuckDB kopyasından yanıtlanır
+ANALYTICS_BACKEND = os.environ.get('ANALYTICS_BACKEND', 'sqlite')
+DUCKDB_PATH = os.environ.get('DUCKDB_PATH', 'habermetre_analytics.duckdb')
+# DuckDB dosyası tek süreç tarafından açılabilir; açamayan süreç bu süre SQLite kullanır
+ANALYTICS_RETRY_SECONDS = 60
+
 # Flask session için gizli anahtar
 SECRET_KEY = os.environ.get('SECRET_KEY', 'habermetrik-secret-key-change-in-production-2024')
 
 # RSS/Sitemap güncelleme aralığı (saniye)
 UPDATE_INTERVAL = 30
 
+# Kaynak tazeliği: haberin yayınlanmasından (pub_date) eklenmesine (created_at)
+# kadar geçen süre, kaynak ve gün başına bu üst sınırlı (saniye) kovalarda sayılır
+FRESHNESS_BUCKETS = (30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 14400, 43200, 86400)
+FRESHNESS_DAYS = 7       # /api/source-performance tazelik yüzdeliklerinin penceresi (gün)
+FEED_POLL_KEEP_DAYS = 7  # Kaynak yoklama kayıtlarının (feed_polls) saklanma süresi
+
 # HTTP istek ayarları
 REQUEST_TIMEOUT = 15
 REQUEST_HEADERS = {
@@ -26,6 +39,114 @@ RETRY_DELAY = 5
 # Tekilleştirme eşiği
 SIMILARITY_THRESHOLD = 0.70
 
+# /metrics (metrics.py): admin oturumu veya 'Authorization: Bearer <METRICS_TOKEN>' ile
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Yavaş sorgu günlüğü (querylog.py): 0 kapalı; > 0 ise bu süreyi aşan SQL ifadeleri
+# parametreleri ve EXPLAIN QUERY PLAN çıktısıyla günlüğe yazılır
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '0'))
+SLOW_QUERY_TOP_N = 20  # Admin panelinde tutulan en yavaş ifade sayısı
+
+# Örneklemeli profil çıkarıcı (profiler.py): admin panelinden açılır
+PROFILER_INTERVAL_MS = 5     # Örnekleme aralığı
+PROFILER_MAX_SECONDS = 300   # Bir oturumun en uzun süresi
+PROFILER_MAX_STACKS = 10000  # Tutulan en fazla farklı yığın
+
+# Kullanıcı önbelleği (database.py) ve imzalı oturum iddiaları (auth.py)
+USER_CACHE_SIZE = 1024     # Önbellekte tutulan en fazla kullanıcı
+USER_CACHE_TTL = 60        # Kullanıcı kaydının önbellekte kaldığı süre (saniye)
+SESSION_CLAIMS_TTL = 300   # Oturumdaki rol bilgisine veritabanına gitmeden güvenilen süre
+
+# Kümeleme sonuç önbelleği (clustering.py)
+CLUSTER_CACHE_SIZE = 32   # En fazla kayıt (LRU)
+CLUSTER_CACHE_TTL = 300   # Saniye
+REPRESENTATIVE_CACHE_SIZE = 4096  # Küme temsilcisi seçimleri (küme üyeleri + tohum başına)
+
+# Brute motorda komşu grafiği bu eps ile bir kez kurulur; daha küçük
+# eps/min_samples değerleri aynı grafikten türetilir (API'de izin verilen en
+# büyük eps). LSH motorunda ve büyük girdilerde grafik istenen eps ile kurulur.
+CLUSTER_MAX_EPS = 0.6
+
+# Aynı anda çalışabilecek kümeleme hesaplaması ve sırada bekleme süresi (saniye)
+CLUSTER_MAX_CONCURRENCY = int(os.environ.get('CLUSTER_MAX_CONCURRENCY', 2))
+CLUSTER_QUEUE_TIMEOUT = 30
+
+# Arka plan kümeleme işleri (jobs.py): süreç havuzu boyutu ve iş kaydı ömrü (saniye)
+CLUSTER_JOB_WORKERS = int(os.environ.get('CLUSTER_JOB_WORKERS', 2))
+CLUSTER_JOB_TTL = 600
+CLUSTER_JOB_WAIT_TIMEOUT = 120  # Bir işin sonucunu bekleyen çağıranın en uzun bekleme süresi
+
+# Kümeleme motoru: 'brute' (tam DBSCAN), 'lsh' (yaklaşık komşu) veya 'auto'
+# 'auto': CLUSTER_LSH_MIN_ITEMS ve üzeri haberde LSH kullanır
+CLUSTER_ENGINE = os.environ.get('CLUSTER_ENGINE', 'auto')
+CLUSTER_LSH_MIN_ITEMS = 3000
+
+# LSH ayarları (lsh.py) - daha fazla tablo = daha yüksek recall
+LSH_TABLES = 16
+LSH_BITS = 10
+LSH_MAX_BUCKET = 2000
+
+# Çevrimiçi hikâye kümeleme (stories.py)
+# STORY_EPS: Sanal Gazete'deki DBSCAN eps değerinin karşılığı (kosinüs mesafesi).
+# /api/trending-topics ve eps verilmeyen /api/search-grouped da hikâyeleri okur,
+# yani bu uçlar da bu eps ile gruplanır (eskiden 0.32 ve 0.35); eski gruplama
+# için uçlara eps parametresi verilebilir.
+STORY_EPS = 0.25
+STORY_WINDOW_HOURS = 24           # Bellekte tutulan aktif pencere
+STORY_MAINTENANCE_INTERVAL = 600  # Birleştirme/bölme bakımı (saniye)
+STORY_MAINTENANCE_LIMIT = 5000    # Bakımda yeniden kümelenen en yeni haber sayısı
+
+# Çok pencereli hikâye ağacı (story_tree.py): (seviye, pencere saat, birleştirme eps)
+# İlk seviye hikâyelerin kendisidir; üst seviyeler hikâye merkezlerini daha gevşek
+# eps ile birleştirir (eps büyüdükçe her düğüm bir üst seviyedeki tek düğüme girer)
+STORY_TREE_LEVELS = [
+    ('1h', 1, None),
+    ('6h', 6, 0.35),
+    ('24h', 24, 0.45),
+    ('7d', 168, 0.55),
+]
+STORY_TREE_INTERVAL = 600  # Ağacın yeniden kurulma aralığı (saniye)
+
+# Sanal Gazete baskıları (editions.py): sayfa her istekte kümelenmek yerine
+# periyodik olarak kurulan hazır baskıdan sunulur
+EDITION_INTERVAL = 300  # Hikâye kümesi değişmişse yeni baskı kurma aralığı (saniye)
+EDITION_KEEP = 288      # Arşivde tutulan baskı sayısı (5 dk'da bir ~24 saat)
+# Temsilci seçiminin tohumu: üyeleri değişmeyen hikâye baskıdan baskıya aynı haberle görünür
+EDITION_SEED = os.environ.get('EDITION_SEED', 'sanal-gazete')
+
+# Canlı akış (live.py): yeni haberler SSE ile abonelere itilir
+LIVE_BUFFER_SIZE = 500       # Yeniden bağlananlar için tutulan son olay sayısı
+LIVE_KEEPALIVE_SECONDS = 15  # Olay yokken keepalive yorumu aralığı
+LIVE_TAIL_SECONDS = 2        # Başka süreçte eklenen haberler için veritabanı takip aralığı
+# Açık akış bir thread tutar (gunicorn gthread, Procfile'da --threads 32);
+# sınır normal isteklere thread bırakır. Dolunca ve tek thread'li worker'da
+# istemci LIVE_POLL_RETRY_MS sonra yeniden bağlanır (yoklamaya düşer)
+LIVE_MAX_STREAMS = 24        # Süreç başına açık akış sınırı
+LIVE_STREAM_MAX_SECONDS = 600  # Akış bu süre sonunda kapanır, tarayıcı Last-Event-ID ile yeniden bağlanır
+LIVE_POLL_RETRY_MS = 15000     # Bağlantı tutulamadığında yeniden bağlanma aralığı (ms)
+
+# Son haberler tamponu (recent.py): canlı akış ve gündem uçları buradan okur
+RECENT_BUFFER_SIZE = 2000    # Bellekte tutulan en son haber sayısı
+RECENT_TAIL_SECONDS = 5      # Başka süreçte eklenen haberler için takip aralığı
+
+# API ETag'leri (api/routes.py): veri sürümü + bu süreye yuvarlanmış zaman.
+# "Son 6 saat" gibi kayan pencereler yeni haber gelmese de değiştiği için
+# yanıt en fazla bu kadar süre aynı ETag ile doğrulanır.
+API_ETAG_WINDOW_SECONDS = 300
+# Dakika çözünürlüklü pencereler (akış hızı, 1 saatlik trending) için kova
+API_ETAG_SHORT_WINDOW_SECONDS = 60
+
+# Ağır API yanıtlarının önbelleği (cache.py): 'memory', 'redis' (worker'lar arası) veya 'off'
+RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+RESPONSE_CACHE_REDIS_URL = os.environ.get('RESPONSE_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+RESPONSE_CACHE_TTL = 30           # Yanıtın taze kaldığı süre (saniye)
+RESPONSE_CACHE_STALE = 120        # Sonrasında bayat yanıt dönüp arka planda yenileme süresi
+RESPONSE_CACHE_LOCK_TIMEOUT = 30  # Worker'lar arası hesaplama kilidi
+
+# API yanıt serileştirme/sıkıştırma (serialization.py)
+API_JSON_BACKEND = os.environ.get('API_JSON_BACKEND', 'auto')  # 'auto' (orjson varsa) veya 'stdlib'
+API_COMPRESS_MIN_BYTES = 1024  # Bu boyutun altındaki yanıtlar sıkıştırılmaz
+
 # Arama sonuç limiti
 SEARCH_LIMIT = 50
 
@@ -4,15 +4,60 @@ HaberMetrik - Veritabanı İşlemleri
 
 import sqlite3
 import hashlib
+import json
 from datetime import datetime, timedelta
-from config import DATABASE_PATH, SIMILARITY_THRESHOLD
+from config import (
+    DATABASE_PATH, SIMILARITY_THRESHOLD, USER_CACHE_SIZE, USER_CACHE_TTL,
+    FRESHNESS_BUCKETS, FRESHNESS_DAYS, FEED_POLL_KEEP_DAYS
+)
+from bisect import bisect_left
 from collections import Counter
 import re
+import analytics
+from cache import TTLCache
+from metrics import instrument_functions, FEED_FRESHNESS
+from querylog import open_connection
+
+
+# Haber eklendikten sonra çağrılan fonksiyonlar (ör. hikâye takibi)
+_insert_listeners = []
+
+
+def add_insert_listener(callback):
+    """
+    Yeni haberler eklendiğinde çağrılacak fonksiyonu kaydet
+    
+    callback, id'leri atanmış haber sözlüklerinin listesini alır.
+    """
+    if callback not in _insert_listeners:
+        _insert_listeners.append(callback)
+
+
+def _notify_insert_listeners(new_items):
+    """Kayıtlı dinleyicileri çağır (hatalar ingest'i durdurmaz)"""
+    for callback in list(_insert_listeners):
+        try:
+            callback(new_items)
+        except Exception as e:
+            print(f"Insert listener hatası ({getattr(callback, '__name__', callback)}): {e}")
+
+
+# Kullanıcı kayıtları: id -> kullanıcı (create_user/delete_user'da boşaltılır)
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+def invalidate_user_cache():
+    """Kullanıcı önbelleğini boşalt (başka süreçlerde kayıtlar TTL ile düşer)"""
+    _user_cache.invalidate()
+
+
+def get_user_cache_stats():
+    return _user_cache.get_stats()
 
 
 def get_connection():
-    """Veritabanı bağlantısı al"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    """Veritabanı bağlantısı al (SLOW_QUERY_MS > 0 ise yavaş ifadeler günlüğe yazılır)"""
+    conn = open_connection(DATABASE_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -46,10 +91,148 @@ def init_db():
         )
     ''')
     
+    # Başlık vektörleri (haber eklenirken bir kez hesaplanır, bkz. vectors.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS news_vectors (
+            news_id INTEGER PRIMARY KEY,
+            vector BLOB NOT NULL
+        )
+    ''')
+    
+    # Hash sütunu -> tek kelimelik terim (küme anahtar kelimeleri için)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vector_terms (
+            hash INTEGER PRIMARY KEY,
+            term TEXT NOT NULL
+        )
+    ''')
+    
+    # Haber hikâyeleri (çevrimiçi kümeleme, bkz. stories.py)
+    # id = hikâyenin ilk haberinin id'si
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stories (
+            id INTEGER PRIMARY KEY,
+            title TEXT,
+            keywords TEXT,
+            member_count INTEGER NOT NULL DEFAULT 0,
+            first_seen TIMESTAMP,
+            last_seen TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS story_members (
+            news_id INTEGER PRIMARY KEY,
+            story_id INTEGER NOT NULL
+        )
+    ''')
+    
+    # Hikâye zaman çizelgesi: dakika ve kaynak bazında haber sayısı (artımlı güncellenir)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS story_timeline (
+            story_id INTEGER NOT NULL,
+            minute TEXT NOT NULL,
+            source TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (story_id, minute, source)
+        )
+    ''')
+    # Birleşen hikâyelerin eski id'leri -> güncel hikâye id'si
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS story_aliases (
+            old_id INTEGER PRIMARY KEY,
+            story_id INTEGER NOT NULL
+        )
+    ''')
+    
+    # Çok pencereli hikâye ağacı (bkz. story_tree.py), her çalıştırmada yeniden yazılır
+    # node_id = düğümdeki en eski hikâyenin id'si, parent_id = bir üst seviyedeki düğüm
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS story_tree (
+            level TEXT NOT NULL,
+            node_id INTEGER NOT NULL,
+            parent_id INTEGER,
+            title TEXT,
+            keywords TEXT,
+            story_count INTEGER NOT NULL,
+            member_count INTEGER NOT NULL,
+            first_seen TIMESTAMP,
+            last_seen TIMESTAMP,
+            built_at TIMESTAMP,
+            PRIMARY KEY (level, node_id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS story_tree_members (
+            level TEXT NOT NULL,
+            node_id INTEGER NOT NULL,
+            story_id INTEGER NOT NULL,
+            PRIMARY KEY (level, story_id)
+        )
+    ''')
+    
+    # Kaynak yoklamaları (update_feed) ve tazelik histogramları
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS feed_polls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            fetch_started TIMESTAMP NOT NULL,
+            fetch_ended TIMESTAMP,
+            fetch_seconds REAL NOT NULL,
+            parse_seconds REAL NOT NULL,
+            insert_seconds REAL NOT NULL,
+            fetched INTEGER NOT NULL,
+            inserted INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS source_freshness (
+            source TEXT NOT NULL,
+            day TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (source, day, bucket)
+        )
+    ''')
+    
+    # Süreçler arası veri sürümleri (ör. haber silmeleri); yazımla aynı işlemde artar
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    ''')
+    
+    # Sanal Gazete baskıları (editions.py) - oluşturulduktan sonra değişmez
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS newspaper_editions (
+            id TEXT PRIMARY KEY,
+            built_at TIMESTAMP NOT NULL,
+            signature TEXT NOT NULL,
+            item_count INTEGER NOT NULL,
+            html TEXT NOT NULL
+        )
+    ''')
+    
+    # Yeni kurulan news tablosunda görsel sütunu yok (eski kurulumlara elle eklenmişti)
+    cursor.execute('PRAGMA table_info(news)')
+    if 'image_url' not in [row['name'] for row in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE news ADD COLUMN image_url TEXT')
+    
+    # Eski stories tablosuna anahtar kelime sütunu ekle
+    cursor.execute('PRAGMA table_info(stories)')
+    if 'keywords' not in [row['name'] for row in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE stories ADD COLUMN keywords TEXT')
+    
     # İndeksler
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_news_source ON news(source)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_news_pub_date ON news(pub_date)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_news_created_at ON news(created_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_story_members_story ON story_members(story_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_stories_last_seen ON stories(last_seen)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_story_tree_rank ON story_tree(level, member_count)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_story_tree_node ON story_tree_members(level, node_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_editions_built_at ON newspaper_editions(built_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_feed_polls_started ON feed_polls(fetch_started)')
     
     conn.commit()
     conn.close()
@@ -121,6 +304,7 @@ def create_user(username, password, role='user'):
         conn.commit()
         user_id = cursor.lastrowid
         conn.close()
+        invalidate_user_cache()
         return user_id
     except sqlite3.IntegrityError:
         conn.close()
@@ -135,20 +319,22 @@ def delete_user(user_id):
     deleted = cursor.rowcount > 0
     conn.commit()
     conn.close()
+    invalidate_user_cache()
     return deleted
 
 
 def get_user_by_id(user_id):
-    """ID'ye göre kullanıcı getir"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    """ID'ye göre kullanıcı getir (USER_CACHE_TTL süreyle önbellekten)"""
+    def load():
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
+        user = cursor.fetchone()
+        conn.close()
+        return dict(user) if user else None
     
-    if user:
-        return dict(user)
-    return None
+    user = _user_cache.get_or_compute(user_id, load)
+    return dict(user) if user else None
 
 
 def insert_many_news(items):
@@ -159,14 +345,22 @@ def insert_many_news(items):
     conn = get_connection()
     cursor = conn.cursor()
     inserted = 0
+    new_rows = []  # (id, title) - vektörleştirme için
+    new_items = []
     
     # Gelecek kontrolü (Güvenlik) - Maksimim 15 dakika tolerans
     from datetime import datetime, timedelta
     cutoff_date = datetime.utcnow() + timedelta(minutes=15)
+    # Dinleyicilerin de göreceği eklenme zamanı (CURRENT_TIMESTAMP biçiminde)
+    created_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    
+    created_dt = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
+    freshness = Counter()  # (kaynak, kova) -> eklenen haber sayısı
     
     for item in items:
         # Tarih kontrolü: Eğer tarih 1 günden daha ileriyse (hatalı parser/sistem saati) KAYDETME.
         pub_date_str = item.get('pub_date')
+        pd = None
         if pub_date_str:
             try:
                 # Format: YYYY-MM-DD HH:MM:SS (parsers.py bu formatı garantiler)
@@ -178,20 +372,222 @@ def insert_many_news(items):
 
         try:
             cursor.execute(
-                'INSERT INTO news (title, link, description, source, pub_date, image_url) VALUES (?, ?, ?, ?, ?, ?)',
+                'INSERT INTO news (title, link, description, source, pub_date, image_url, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
                 (item['title'], item['link'], item.get('description', ''), 
-                 item['source'], item.get('pub_date'), item.get('image_url'))
+                 item['source'], item.get('pub_date'), item.get('image_url'), created_at)
             )
             inserted += 1
+            new_rows.append((cursor.lastrowid, item['title']))
+            if pd is not None:
+                # Tazelik: yayınlanmadan eklenmeye (saat farkı toleransı içinde eksi olabilir)
+                lag = max(0.0, (created_dt - pd).total_seconds())
+                freshness[(item['source'], bisect_left(FRESHNESS_BUCKETS, lag))] += 1
+                FEED_FRESHNESS.observe(lag, item['source'])
+            new_items.append({
+                'id': cursor.lastrowid,
+                'title': item['title'],
+                'link': item['link'],
+                'description': item.get('description', ''),
+                'source': item['source'],
+                'pub_date': item.get('pub_date'),
+                'image_url': item.get('image_url'),
+                'created_at': created_at
+            })
         except sqlite3.IntegrityError:
             # Link zaten var
             pass
     
+    if new_rows:
+        _save_news_vectors(cursor, new_rows)
+    
+    if freshness:
+        cursor.executemany(
+            '''INSERT INTO source_freshness (source, day, bucket, count) VALUES (?, ?, ?, ?)
+               ON CONFLICT(source, day, bucket) DO UPDATE SET count = count + excluded.count''',
+            [(source, created_at[:10], bucket, count) for (source, bucket), count in freshness.items()]
+        )
+    
     conn.commit()
     conn.close()
+    
+    if new_items:
+        _notify_insert_listeners(new_items)
     return inserted
 
 
+def _save_news_vectors(cursor, rows):
+    """(id, title) listesini vektörleştirip news_vectors ve vector_terms tablolarına yaz"""
+    from vectors import vectorize_titles, pack_vector, unigram_terms
+    
+    titles = [title for _, title in rows]
+    matrix = vectorize_titles(titles)
+    cursor.executemany(
+        'INSERT OR REPLACE INTO news_vectors (news_id, vector) VALUES (?, ?)',
+        [(news_id, pack_vector(matrix, i)) for i, (news_id, _) in enumerate(rows)]
+    )
+    cursor.executemany(
+        'INSERT OR IGNORE INTO vector_terms (hash, term) VALUES (?, ?)',
+        unigram_terms(titles).items()
+    )
+
+
+def backfill_news_vectors(batch_size=1000):
+    """Vektörü olmayan (eski) haberleri vektörleştir"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    total = 0
+    
+    while True:
+        cursor.execute(
+            '''SELECT id, title FROM news
+               WHERE id NOT IN (SELECT news_id FROM news_vectors)
+               LIMIT ?''',
+            (batch_size,)
+        )
+        rows = [(row['id'], row['title']) for row in cursor.fetchall()]
+        if not rows:
+            break
+        _save_news_vectors(cursor, rows)
+        conn.commit()
+        total += len(rows)
+    
+    conn.close()
+    if total:
+        print(f"{total} haber için vektör hesaplandı")
+    return total
+
+
+def backfill_vector_terms(batch_size=5000):
+    """vector_terms tablosu boşsa mevcut tüm başlıklardan doldur"""
+    from vectors import unigram_terms
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('SELECT 1 FROM vector_terms LIMIT 1')
+    if cursor.fetchone():
+        conn.close()
+        return 0
+    
+    total = 0
+    last_id = 0
+    while True:
+        cursor.execute(
+            'SELECT id, title FROM news WHERE id > ? ORDER BY id LIMIT ?',
+            (last_id, batch_size)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        cursor.executemany(
+            'INSERT OR IGNORE INTO vector_terms (hash, term) VALUES (?, ?)',
+            unigram_terms([row['title'] for row in rows]).items()
+        )
+        conn.commit()
+        last_id = rows[-1]['id']
+        total += len(rows)
+    
+    conn.close()
+    if total:
+        print(f"{total} haber başlığından terim sözlüğü oluşturuldu")
+    return total
+
+
+def get_vector_terms(hashes):
+    """
+    Hash sütunlarının terimlerini getir
+    
+    Returns:
+        {hash: term}
+    """
+    results = {}
+    if not hashes:
+        return results
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    hashes = [int(h) for h in hashes]
+    for start in range(0, len(hashes), 900):
+        chunk = hashes[start:start + 900]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(
+            f'SELECT hash, term FROM vector_terms WHERE hash IN ({placeholders})',
+            chunk
+        )
+        for row in cursor.fetchall():
+            results[row['hash']] = row['term']
+    
+    conn.close()
+    return results
+
+
+def get_news_vectors(news_ids):
+    """
+    ID listesine göre saklanan vektörleri getir
+    
+    Returns:
+        {news_id: bytes}
+    """
+    results = {}
+    if not news_ids:
+        return results
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    # SQLite parametre limiti için parça parça sorgula
+    ids = list(news_ids)
+    for start in range(0, len(ids), 900):
+        chunk = ids[start:start + 900]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(
+            f'SELECT news_id, vector FROM news_vectors WHERE news_id IN ({placeholders})',
+            chunk
+        )
+        for row in cursor.fetchall():
+            results[row['news_id']] = row['vector']
+    
+    conn.close()
+    return results
+
+
+def _delete_orphan_rows(cursor):
+    """Silinen haberlere ait vektörleri ve hikâye üyeliklerini temizle"""
+    cursor.execute('DELETE FROM news_vectors WHERE news_id NOT IN (SELECT id FROM news)')
+    cursor.execute('DELETE FROM story_members WHERE news_id NOT IN (SELECT id FROM news)')
+
+
+def _bump_data_version(cursor, name):
+    """Adlı veri sürümünü yazımla aynı işlemde artır"""
+    cursor.execute(
+        '''INSERT INTO data_versions (name, version) VALUES (?, 1)
+           ON CONFLICT(name) DO UPDATE SET version = version + 1''',
+        (name,)
+    )
+
+
+def get_data_version(name):
+    """
+    Adlı veri sürümü (tüm süreçlerde aynı; hiç artmadıysa 0)
+    
+    Args:
+        name: 'news_deletes' (haber silmeleri), 'data' (haber eklemeleri
+            dışındaki yazımlar: silme, hikâye/ağaç güncellemesi; API ETag'leri)
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT version FROM data_versions WHERE name = ?', (name,))
+        row = cursor.fetchone()
+    except sqlite3.OperationalError:
+        # init_db henüz çalışmamış eski veritabanı
+        row = None
+    conn.close()
+    return row['version'] if row else 0
+
+
 def get_news_count():
     """Toplam haber sayısı"""
     conn = get_connection()
@@ -202,12 +598,42 @@ def get_news_count():
     return count
 
 
+def get_max_news_id():
+    """En büyük haber id'si (haber yoksa 0)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT COALESCE(MAX(id), 0) as max_id FROM news')
+    max_id = cursor.fetchone()['max_id']
+    conn.close()
+    return max_id
+
+
+def get_news_after_id(after_id, limit=500):
+    """id'si after_id'den büyük haberler, id sırasıyla (canlı akış takibi)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, title, link, description, source, pub_date, created_at, image_url
+        FROM news
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?
+    ''', (after_id, limit))
+    results = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return results
+
+
 def delete_news_by_source(source, limit=100):
     """Kaynağa göre haber sil"""
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('DELETE FROM news WHERE source = ? LIMIT ?', (source, limit))
     deleted = cursor.rowcount
+    _delete_orphan_rows(cursor)
+    if deleted:
+        _bump_data_version(cursor, 'news_deletes')
+    _bump_data_version(cursor, 'data')
     conn.commit()
     conn.close()
     return deleted
@@ -223,6 +649,10 @@ def delete_news_by_age(hours, limit=100):
         (cutoff_date, limit)
     )
     deleted = cursor.rowcount
+    _delete_orphan_rows(cursor)
+    if deleted:
+        _bump_data_version(cursor, 'news_deletes')
+    _bump_data_version(cursor, 'data')
     conn.commit()
     conn.close()
     return deleted
@@ -371,18 +801,23 @@ def get_news_flow_rate(minutes=60):
     }
 
 
-def get_hourly_distribution(hours=24):
+def get_hourly_distribution(hours=24, now=None, use_analytics=True):
     """
     Saat bazında haber dağılımı
     
     Returns:
         [{'hour': 'YYYY-MM-DD HH:00', 'count': int}, ...]
     """
+    time_ago = (now or datetime.utcnow()) - timedelta(hours=hours)
+    
+    if use_analytics and analytics.is_enabled():
+        results = analytics.hourly_distribution(time_ago)
+        if results is not None:
+            return results
+    
     conn = get_connection()
     cursor = conn.cursor()
     
-    time_ago = datetime.utcnow() - timedelta(hours=hours)
-    
     cursor.execute(
         '''SELECT 
             strftime('%Y-%m-%d %H:00', COALESCE(pub_date, created_at)) as hour,
@@ -399,42 +834,80 @@ def get_hourly_distribution(hours=24):
     return results
 
 
-def get_word_frequencies(limit=50, hours=6):
+def get_daily_distribution(days=30, now=None, use_analytics=True):
     """
-    En sık geçen kelimeleri çıkar
+    Gün bazında haber dağılımı (çok haftalık/aylık aralıklar için)
     
     Returns:
-        [{'word': str, 'count': int}, ...]
+        [{'day': 'YYYY-MM-DD', 'count': int}, ...]
     """
+    time_ago = (now or datetime.utcnow()) - timedelta(days=days)
+    
+    if use_analytics and analytics.is_enabled():
+        results = analytics.daily_distribution(time_ago)
+        if results is not None:
+            return results
+    
     conn = get_connection()
     cursor = conn.cursor()
     
-    time_ago = datetime.utcnow() - timedelta(hours=hours)
-    
     cursor.execute(
-        'SELECT title, description FROM news WHERE COALESCE(pub_date, created_at) >= ?',
+        '''SELECT 
+            strftime('%Y-%m-%d', COALESCE(pub_date, created_at)) as day,
+            COUNT(*) as count
+           FROM news 
+           WHERE COALESCE(pub_date, created_at) >= ?
+           GROUP BY day
+           ORDER BY day ASC''',
         (time_ago,)
     )
     
-    # Stopwords
-    stopwords = {
-        've', 'veya', 'ile', 'ama', 'fakat', 'ancak', 'için', 'gibi',
-        'bir', 'bu', 'şu', 'o', 'ne', 'nasıl', 'neden', 'niçin',
-        'mi', 'mı', 'mu', 'mü', 'de', 'da', 'ki', 'dı', 'di',
-        'var', 'yok', 'olan', 'oldu', 'olacak', 'etti', 'ediyor',
-        'den', 'dan', 'ten', 'tan', 'e', 'a', 'ye', 'ya', 'daha',
-        'çok', 'az', 'her', 'tüm', 'bütün', 'bazı', 'ise', 'son',
-        'http', 'https', 'com', 'www', 'href', 'target', 'blank', 'class'
-    }
-    
+    results = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return results
+
+
+# Kelime bulutunda sayılmayan kelimeler
+WORD_STOPWORDS = {
+    've', 'veya', 'ile', 'ama', 'fakat', 'ancak', 'için', 'gibi',
+    'bir', 'bu', 'şu', 'o', 'ne', 'nasıl', 'neden', 'niçin',
+    'mi', 'mı', 'mu', 'mü', 'de', 'da', 'ki', 'dı', 'di',
+    'var', 'yok', 'olan', 'oldu', 'olacak', 'etti', 'ediyor',
+    'den', 'dan', 'ten', 'tan', 'e', 'a', 'ye', 'ya', 'daha',
+    'çok', 'az', 'her', 'tüm', 'bütün', 'bazı', 'ise', 'son',
+    'http', 'https', 'com', 'www', 'href', 'target', 'blank', 'class'
+}
+
+
+def _count_words(rows, limit):
+    """(title, description) satırlarından en sık kelimeler"""
     word_list = []
-    for row in cursor.fetchall():
+    for row in rows:
         text = (row['title'] or '') + ' ' + (row['description'] or '')
         words = re.findall(r'\b\w+\b', text.lower())
-        word_list.extend([w for w in words if w not in stopwords and len(w) > 2])
+        word_list.extend([w for w in words if w not in WORD_STOPWORDS and len(w) > 2])
     
     counter = Counter(word_list)
-    results = [{'word': word, 'count': count} for word, count in counter.most_common(limit)]
+    return [{'word': word, 'count': count} for word, count in counter.most_common(limit)]
+
+
+def get_word_frequencies(limit=50, hours=6):
+    """
+    En sık geçen kelimeleri çıkar
+    
+    Returns:
+        [{'word': str, 'count': int}, ...]
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    time_ago = datetime.utcnow() - timedelta(hours=hours)
+    
+    cursor.execute(
+        'SELECT title, description FROM news WHERE COALESCE(pub_date, created_at) >= ?',
+        (time_ago,)
+    )
+    results = _count_words(cursor.fetchall(), limit)
     
     conn.close()
     return results
@@ -463,19 +936,24 @@ def get_latest_news(limit=20):
     return results
 
 
-def get_source_speed_metrics():
+def get_source_speed_metrics(now=None, use_analytics=True):
     """
     Kaynak başına hız ve güvenilirlik metrikleri
     
     Returns:
         [{'source': str, 'avg_per_hour': float, 'total': int, 'success_rate': float}, ...]
     """
+    # Last 6 hours stats per source
+    six_hours_ago = (now or datetime.utcnow()) - timedelta(hours=6)
+    
+    if use_analytics and analytics.is_enabled():
+        results = analytics.source_speed_metrics(six_hours_ago)
+        if results is not None:
+            return results
+    
     conn = get_connection()
     cursor = conn.cursor()
     
-    # Last 6 hours stats per source
-    six_hours_ago = datetime.utcnow() - timedelta(hours=6)
-    
     cursor.execute(
         '''SELECT 
             source,
@@ -484,7 +962,7 @@ def get_source_speed_metrics():
            FROM news
            WHERE COALESCE(pub_date, created_at) >= ?
            GROUP BY source
-           ORDER BY avg_per_hour DESC''',
+           ORDER BY avg_per_hour DESC, source ASC''',
         (six_hours_ago,)
     )
     
@@ -495,49 +973,182 @@ def get_source_speed_metrics():
 
 
 
-def get_comparison_stats():
+def record_feed_poll(poll):
     """
-    Bugün ve Dün karşılaştırması (Yayınlanma zamanına göre)
-    Today: Son 24 saat
-    Yesterday: Önceki 24 saat (24-48 saat önce)
+    Kaynak yoklamasının sürelerini kaydet (FEED_POLL_KEEP_DAYS'ten eskiler silinir)
+    
+    Args:
+        poll: {'source', 'fetch_started', 'fetch_ended', 'fetch_seconds', 'parse_seconds',
+               'insert_seconds', 'fetched', 'inserted'}
     """
     conn = get_connection()
     cursor = conn.cursor()
     
-    # Zaman dilimleri (UTC)
-    now = datetime.utcnow()
-    last_24h = now - timedelta(hours=24)
-    prev_24h_start = now - timedelta(hours=48)
-    prev_24h_end = last_24h
+    cursor.execute(
+        '''INSERT INTO feed_polls (source, fetch_started, fetch_ended, fetch_seconds,
+                                   parse_seconds, insert_seconds, fetched, inserted)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+        (poll['source'], poll['fetch_started'], poll['fetch_ended'], poll['fetch_seconds'],
+         poll['parse_seconds'], poll['insert_seconds'], poll['fetched'], poll['inserted'])
+    )
+    cursor.execute(
+        'DELETE FROM feed_polls WHERE fetch_started < ?',
+        (datetime.utcnow() - timedelta(days=FEED_POLL_KEEP_DAYS),)
+    )
     
-    # Sorgu: pub_date varsa onu kullan, yoksa created_at
-    # Today stat
-    cursor.execute('''
-        SELECT COUNT(*) as count 
-        FROM news 
-        WHERE COALESCE(pub_date, created_at) >= ?
-    ''', (last_24h,))
-    today_count = cursor.fetchone()['count']
+    conn.commit()
+    conn.close()
+
+
+def get_feed_poll_stats(hours=24, now=None):
+    """
+    Kaynak başına yoklama süreleri
     
-    # Yesterday stat
-    cursor.execute('''
-        SELECT COUNT(*) as count 
-        FROM news 
-        WHERE COALESCE(pub_date, created_at) >= ? 
-          AND COALESCE(pub_date, created_at) < ?
-    ''', (prev_24h_start, prev_24h_end))
-    yesterday_count = cursor.fetchone()['count']
+    Returns:
+        {kaynak: {'polls', 'avg_fetch_seconds', 'avg_parse_seconds', 'avg_insert_seconds',
+                  'fetched', 'inserted', 'last_poll'}}
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        '''SELECT source,
+                  COUNT(*) as polls,
+                  ROUND(AVG(fetch_seconds), 3) as avg_fetch_seconds,
+                  ROUND(AVG(parse_seconds), 3) as avg_parse_seconds,
+                  ROUND(AVG(insert_seconds), 3) as avg_insert_seconds,
+                  SUM(fetched) as fetched,
+                  SUM(inserted) as inserted,
+                  MAX(fetch_started) as last_poll
+           FROM feed_polls
+           WHERE fetch_started >= ?
+           GROUP BY source''',
+        ((now or datetime.utcnow()) - timedelta(hours=hours),)
+    )
+    stats = {row['source']: dict(row) for row in cursor.fetchall()}
     
     conn.close()
+    for row in stats.values():
+        del row['source']
+    return stats
+
+
+def histogram_quantile(counts, q, bounds=FRESHNESS_BUCKETS):
+    """
+    Kova sayılarından yüzdelik (kova içinde doğrusal ara değer)
     
-    # Değişim oranı
-    change = today_count - yesterday_count
+    Args:
+        counts: {kova indeksi: adet}; son kova (len(bounds)) üst sınırsızdır
+        q: 0-1 arası yüzdelik
     
-    if yesterday_count > 0:
-        change_percent = round((change / yesterday_count) * 100, 1)
-    else:
-        change_percent = 100 if today_count > 0 else 0
-        
+    Returns:
+        Saniye veya hiç örnek yoksa None
+    """
+    total = sum(counts.values())
+    if total == 0:
+        return None
+    
+    rank = q * total
+    cumulative = 0
+    for bucket in range(len(bounds) + 1):
+        count = counts.get(bucket, 0)
+        if count and cumulative + count >= rank:
+            if bucket == len(bounds):
+                # Üst sınırsız kova: bilinen en büyük sınır
+                return float(bounds[-1])
+            lower = bounds[bucket - 1] if bucket > 0 else 0
+            return lower + (bounds[bucket] - lower) * (rank - cumulative) / count
+        cumulative += count
+    return float(bounds[-1])
+
+
+def get_source_freshness(days=FRESHNESS_DAYS, now=None):
+    """
+    Kaynak başına tazelik dağılımı (yayınlanmadan eklenmeye geçen süre)
+    
+    Returns:
+        {kaynak: {'freshness_p50', 'freshness_p95' (saniye), 'freshness_samples'}}
+    """
+    since_day = ((now or datetime.utcnow()) - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        '''SELECT source, bucket, SUM(count) as count
+           FROM source_freshness
+           WHERE day >= ?
+           GROUP BY source, bucket''',
+        (since_day,)
+    )
+    histograms = {}
+    for row in cursor.fetchall():
+        histograms.setdefault(row['source'], {})[row['bucket']] = row['count']
+    
+    conn.close()
+    
+    result = {}
+    for source, counts in histograms.items():
+        p50 = histogram_quantile(counts, 0.5)
+        p95 = histogram_quantile(counts, 0.95)
+        result[source] = {
+            'freshness_p50': round(p50) if p50 is not None else None,
+            'freshness_p95': round(p95) if p95 is not None else None,
+            'freshness_samples': sum(counts.values())
+        }
+    return result
+
+
+def get_comparison_stats(now=None, use_analytics=True):
+    """
+    Bugün ve Dün karşılaştırması (Yayınlanma zamanına göre)
+    Today: Son 24 saat
+    Yesterday: Önceki 24 saat (24-48 saat önce)
+    """
+    # Zaman dilimleri (UTC)
+    now = now or datetime.utcnow()
+    last_24h = now - timedelta(hours=24)
+    prev_24h_start = now - timedelta(hours=48)
+    prev_24h_end = last_24h
+    
+    counts = None
+    if use_analytics and analytics.is_enabled():
+        counts = analytics.comparison_counts(last_24h, prev_24h_start, prev_24h_end)
+    
+    if counts is not None:
+        today_count, yesterday_count = counts
+    else:
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        # Sorgu: pub_date varsa onu kullan, yoksa created_at
+        # Today stat
+        cursor.execute('''
+            SELECT COUNT(*) as count 
+            FROM news 
+            WHERE COALESCE(pub_date, created_at) >= ?
+        ''', (last_24h,))
+        today_count = cursor.fetchone()['count']
+        
+        # Yesterday stat
+        cursor.execute('''
+            SELECT COUNT(*) as count 
+            FROM news 
+            WHERE COALESCE(pub_date, created_at) >= ? 
+              AND COALESCE(pub_date, created_at) < ?
+        ''', (prev_24h_start, prev_24h_end))
+        yesterday_count = cursor.fetchone()['count']
+        
+        conn.close()
+    
+    # Değişim oranı
+    change = today_count - yesterday_count
+    
+    if yesterday_count > 0:
+        change_percent = round((change / yesterday_count) * 100, 1)
+    else:
+        change_percent = 100 if today_count > 0 else 0
+        
     return {
         'today': today_count,
         'yesterday': yesterday_count,
@@ -549,6 +1160,33 @@ def get_comparison_stats():
 
 
 
+# Basit duygu sözlükleri
+POSITIVE_WORDS = {'başarı', 'kazandı', 'iyi', 'güzel', 'harika', 'mükemmel', 'zafer', 'galip', 'mutlu'}
+NEGATIVE_WORDS = {'kötü', 'kaybetti', 'kaza', 'ölüm', 'yaralı', 'tehlike', 'sorun', 'problem', 'yenilgi'}
+
+
+def _count_sentiment(rows):
+    """(title, description) satırlarını olumlu/olumsuz/nötr say"""
+    positive = 0
+    negative = 0
+    neutral = 0
+    
+    for row in rows:
+        text = ((row['title'] or '') + ' ' + (row['description'] or '')).lower()
+        
+        has_positive = any(word in text for word in POSITIVE_WORDS)
+        has_negative = any(word in text for word in NEGATIVE_WORDS)
+        
+        if has_positive and not has_negative:
+            positive += 1
+        elif has_negative and not has_positive:
+            negative += 1
+        else:
+            neutral += 1
+    
+    return {'positive': positive, 'negative': negative, 'neutral': neutral}
+
+
 def get_sentiment_distribution():
     """
     Basit keyword-based sentiment analizi
@@ -565,29 +1203,142 @@ def get_sentiment_distribution():
         'SELECT title, description FROM news WHERE COALESCE(pub_date, created_at) >= ?',
         (six_hours_ago,)
     )
+    result = _count_sentiment(cursor.fetchall())
     
-    positive_words = {'başarı', 'kazandı', 'iyi', 'güzel', 'harika', 'mükemmel', 'zafer', 'galip', 'mutlu'}
-    negative_words = {'kötü', 'kaybetti', 'kaza', 'ölüm', 'yaralı', 'tehlike', 'sorun', 'problem', 'yenilgi'}
+    conn.close()
+    return result
+
+
+# Panel paketinde hesaplanabilen bölümler
+DASHBOARD_SECTIONS = (
+    'stats', 'flow', 'comparison', 'time_series', 'word_cloud', 'sources', 'sentiment'
+)
+
+
+def get_dashboard_snapshot(sections=DASHBOARD_SECTIONS, now=None, limit_sources=10000,
+                           flow_minutes=60, series_hours=24, word_limit=40, word_hours=6):
+    """
+    Panel bölümlerini tek pencere taramasıyla hesapla
     
-    positive = 0
-    negative = 0
-    neutral = 0
+    Ayrı uçların her biri aynı COALESCE(pub_date, created_at) penceresini
+    yeniden tarar. Burada istenen en geniş pencere bir kez okunur ve her
+    bölüm bu satırlardan çıkarılır; başlık/açıklama yalnızca kelime ve duygu
+    penceresindeki satırlar için getirilir. Tüm zamanlar sayıları ('stats')
+    tek bir GROUP BY ile okunur.
     
-    for row in cursor.fetchall():
-        text = ((row['title'] or '') + ' ' + (row['description'] or '')).lower()
-        
-        has_positive = any(word in text for word in positive_words)
-        has_negative = any(word in text for word in negative_words)
-        
-        if has_positive and not has_negative:
-            positive += 1
-        elif has_negative and not has_positive:
-            negative += 1
+    Returns:
+        {bölüm: ayrı fonksiyonun döndürdüğü biçimde sonuç}
+    """
+    sections = [section for section in sections if section in DASHBOARD_SECTIONS]
+    now = now or datetime.utcnow()
+    
+    # Bölümlerin ihtiyaç duyduğu pencereler (string karşılaştırması SQL ile aynı)
+    cutoffs = {
+        'stats': now - timedelta(hours=6),
+        'flow': now - timedelta(minutes=flow_minutes),
+        'comparison': now - timedelta(hours=48),
+        'time_series': now - timedelta(hours=series_hours),
+        'word_cloud': now - timedelta(hours=word_hours),
+        'sources': now - timedelta(hours=6),
+        'sentiment': now - timedelta(hours=6),
+    }
+    needed = [cutoffs[section] for section in sections]
+    text_needed = [cutoffs[s] for s in ('word_cloud', 'sentiment') if s in sections]
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    rows = []
+    
+    if needed:
+        text_cutoff = min(text_needed) if text_needed else now + timedelta(days=1)
+        cursor.execute(
+            '''SELECT source, ts, strftime('%Y-%m-%d %H:%M', ts) as minute,
+                      CASE WHEN ts >= ? THEN title END as title,
+                      CASE WHEN ts >= ? THEN description END as description
+               FROM (SELECT source, title, description,
+                            COALESCE(pub_date, created_at) as ts FROM news)
+               WHERE ts >= ?''',
+            (text_cutoff, text_cutoff, min(needed))
+        )
+        rows = cursor.fetchall()
+    
+    result = {}
+    
+    def since(section):
+        cutoff = str(cutoffs[section])
+        return [row for row in rows if row['ts'] >= cutoff]
+    
+    def by_source(selected):
+        counts = Counter(row['source'] for row in selected)
+        return sorted(counts.items(), key=lambda item: -item[1])
+    
+    if 'stats' in sections:
+        recent = since('stats')
+        cursor.execute('SELECT source, COUNT(*) as count FROM news GROUP BY source ORDER BY count DESC')
+        all_time = [dict(row) for row in cursor.fetchall()]
+        result['stats'] = {
+            'today_count': len(recent),
+            'today_by_source': [
+                {'source': source, 'count': count}
+                for source, count in by_source(recent)[:limit_sources]
+            ],
+            'total_count': sum(row['count'] for row in all_time),
+            'all_time_by_source': all_time[:limit_sources]
+        }
+    
+    if 'flow' in sections:
+        recent = since('flow')
+        total = len(recent)
+        peak = Counter(row['minute'] for row in recent).most_common(1)
+        result['flow'] = {
+            'news_per_minute': round(total / flow_minutes, 2) if flow_minutes > 0 else 0,
+            'news_per_hour': int((total / flow_minutes) * 60) if flow_minutes > 0 else 0,
+            'total_in_period': total,
+            'peak_minute': {
+                'minute': peak[0][0] if peak else None,
+                'count': peak[0][1] if peak else 0
+            }
+        }
+    
+    if 'comparison' in sections:
+        last_24h = str(now - timedelta(hours=24))
+        window = since('comparison')
+        today_count = sum(1 for row in window if row['ts'] >= last_24h)
+        yesterday_count = len(window) - today_count
+        change = today_count - yesterday_count
+        if yesterday_count > 0:
+            change_percent = round((change / yesterday_count) * 100, 1)
         else:
-            neutral += 1
+            change_percent = 100 if today_count > 0 else 0
+        result['comparison'] = {
+            'today': today_count,
+            'yesterday': yesterday_count,
+            'change': change,
+            'change_percent': change_percent,
+            'trending': 'up' if change > 0 else 'down' if change < 0 else 'same'
+        }
+    
+    if 'time_series' in sections:
+        hours = Counter(row['minute'][:13] + ':00' for row in since('time_series') if row['minute'])
+        result['time_series'] = [{'hour': hour, 'count': count} for hour, count in sorted(hours.items())]
+    
+    if 'word_cloud' in sections:
+        result['word_cloud'] = _count_words(since('word_cloud'), word_limit)
+    
+    if 'sources' in sections:
+        result['sources'] = sorted(
+            (
+                {'source': source, 'total': count, 'avg_per_hour': round(count / 6.0, 2)}
+                for source, count in Counter(row['source'] for row in since('sources')).items()
+            ),
+            key=lambda item: (-item['avg_per_hour'], item['source'])
+        )
+    
+    if 'sentiment' in sections:
+        result['sentiment'] = _count_sentiment(since('sentiment'))
     
     conn.close()
-    return {'positive': positive, 'negative': negative, 'neutral': neutral}
+    return result
 
 
 def get_random_news_24h(limit=30):
@@ -655,3 +1406,522 @@ def get_recent_news(hours=24, limit=500):
     news = [dict(row) for row in cursor.fetchall()]
     conn.close()
     return news
+
+
+# ============= HABER HİKÂYELERİ (stories.py) =============
+
+def get_story_window(hours=24):
+    """
+    Son X saatte eklenen haberler ve hikâye atamaları (takipçiyi yüklemek için)
+    
+    Returns:
+        [{'id', 'title', 'created_at', 'story_id'}, ...]  (id sırasıyla)
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    time_ago = datetime.utcnow() - timedelta(hours=hours)
+    
+    cursor.execute(
+        '''SELECT n.id, n.title, n.created_at, m.story_id
+           FROM news n
+           LEFT JOIN story_members m ON m.news_id = n.id
+           WHERE n.created_at >= ?
+           ORDER BY n.id ASC''',
+        (time_ago,)
+    )
+    
+    results = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return results
+
+
+def save_story_updates(stories, memberships, merges=(), recount_ids=()):
+    """
+    Hikâye değişikliklerini tek işlemde kaydet
+    
+    Args:
+        stories: [{'id', 'title', 'keywords', 'seen_at'}, ...]  - eklenecek/güncellenecek hikâyeler
+                 (keywords: [(terim, ağırlık), ...], JSON olarak saklanır)
+        memberships: [(news_id, story_id), ...]
+        merges: [(eski_story_id, yeni_story_id), ...]  - tüm üyeler taşınır
+        recount_ids: Üye sayısı yeniden hesaplanacak ek hikâyeler
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    touched = {story['id'] for story in stories} | set(recount_ids)
+    
+    for old_id, new_id in merges:
+        cursor.execute(
+            'UPDATE story_members SET story_id = ? WHERE story_id = ?',
+            (new_id, old_id)
+        )
+        # Zaman çizelgesi birleşen hikâyeye taşınır, eski id yeni id'ye yönlenir
+        cursor.execute(
+            '''INSERT INTO story_timeline (story_id, minute, source, count)
+               SELECT ?, minute, source, count FROM story_timeline WHERE story_id = ?
+               ON CONFLICT(story_id, minute, source) DO UPDATE SET count = count + excluded.count''',
+            (new_id, old_id)
+        )
+        cursor.execute('DELETE FROM story_timeline WHERE story_id = ?', (old_id,))
+        cursor.execute('UPDATE story_aliases SET story_id = ? WHERE story_id = ?', (new_id, old_id))
+        cursor.execute(
+            'INSERT OR REPLACE INTO story_aliases (old_id, story_id) VALUES (?, ?)',
+            (old_id, new_id)
+        )
+        touched.update((old_id, new_id))
+    
+    _update_story_timeline(cursor, memberships)
+    
+    cursor.executemany(
+        'INSERT OR REPLACE INTO story_members (news_id, story_id) VALUES (?, ?)',
+        memberships
+    )
+    
+    cursor.executemany(
+        '''INSERT INTO stories (id, title, keywords, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)
+           ON CONFLICT(id) DO UPDATE SET
+               title = excluded.title, keywords = excluded.keywords, last_seen = excluded.last_seen''',
+        [
+            (story['id'], story['title'], json.dumps(story.get('keywords') or [], ensure_ascii=False),
+             story['seen_at'], story['seen_at'])
+            for story in stories
+        ]
+    )
+    
+    # Yeniden kullanılan id'ler artık yönlendirilmez
+    cursor.executemany(
+        'DELETE FROM story_aliases WHERE old_id = ?',
+        [(story['id'],) for story in stories]
+    )
+    
+    # Üye sayılarını yeniden hesapla, boşalan hikâyeleri sil
+    touched = list(touched)
+    for start in range(0, len(touched), 900):
+        chunk = touched[start:start + 900]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(
+            f'''UPDATE stories SET member_count =
+                   (SELECT COUNT(*) FROM story_members WHERE story_id = stories.id)
+               WHERE id IN ({placeholders})''',
+            chunk
+        )
+    cursor.execute('DELETE FROM stories WHERE member_count = 0')
+    
+    _bump_data_version(cursor, 'data')
+    conn.commit()
+    conn.close()
+
+
+def _update_story_timeline(cursor, memberships):
+    """
+    Üyelik değişikliklerini story_timeline sayılarına yansıt
+    
+    Yeni haber yeni hikâyesinin (dakika, kaynak) sayısını artırır; hikâye
+    değiştiren haber eskisinden düşülüp yenisine eklenir.
+    """
+    if not memberships:
+        return
+    
+    cursor.execute('CREATE TEMP TABLE IF NOT EXISTS _membership_changes (news_id INTEGER, story_id INTEGER)')
+    cursor.execute('DELETE FROM _membership_changes')
+    cursor.executemany('INSERT INTO _membership_changes (news_id, story_id) VALUES (?, ?)', memberships)
+    
+    bucket = "strftime('%Y-%m-%d %H:%M', COALESCE(n.pub_date, n.created_at))"
+    upsert = 'ON CONFLICT(story_id, minute, source) DO UPDATE SET count = count + excluded.count'
+    
+    # Eski hikâyeden düş
+    cursor.execute(
+        f'''INSERT INTO story_timeline (story_id, minute, source, count)
+            SELECT m.story_id, {bucket}, n.source, -COUNT(*)
+            FROM _membership_changes c
+            JOIN story_members m ON m.news_id = c.news_id AND m.story_id != c.story_id
+            JOIN news n ON n.id = c.news_id
+            WHERE true
+            GROUP BY 1, 2, 3
+            {upsert}'''
+    )
+    # Yeni hikâyeye ekle
+    cursor.execute(
+        f'''INSERT INTO story_timeline (story_id, minute, source, count)
+            SELECT c.story_id, {bucket}, n.source, COUNT(*)
+            FROM _membership_changes c
+            JOIN news n ON n.id = c.news_id
+            LEFT JOIN story_members m ON m.news_id = c.news_id
+            WHERE m.story_id IS NULL OR m.story_id != c.story_id
+            GROUP BY 1, 2, 3
+            {upsert}'''
+    )
+    cursor.execute('DELETE FROM story_timeline WHERE count <= 0')
+
+
+def backfill_story_timeline():
+    """story_timeline boşsa mevcut hikâye üyeliklerinden doldur"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('SELECT 1 FROM story_timeline LIMIT 1')
+    if cursor.fetchone():
+        conn.close()
+        return 0
+    
+    cursor.execute(
+        '''INSERT INTO story_timeline (story_id, minute, source, count)
+           SELECT m.story_id, strftime('%Y-%m-%d %H:%M', COALESCE(n.pub_date, n.created_at)),
+                  n.source, COUNT(*)
+           FROM story_members m
+           JOIN news n ON n.id = m.news_id
+           GROUP BY 1, 2, 3'''
+    )
+    total = cursor.rowcount
+    conn.commit()
+    conn.close()
+    if total > 0:
+        print(f"{total} hikâye zaman çizelgesi satırı oluşturuldu")
+    return total
+
+
+def get_story(story_id):
+    """
+    Hikâyeyi getir (birleşmiş eski id'ler güncel hikâyeye yönlenir)
+    
+    Returns:
+        {'id', 'title', 'keywords', 'member_count', 'first_seen', 'last_seen'} veya None
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('SELECT story_id FROM story_aliases WHERE old_id = ?', (story_id,))
+    alias = cursor.fetchone()
+    if alias:
+        story_id = alias['story_id']
+    
+    cursor.execute(
+        'SELECT id, title, keywords, member_count, first_seen, last_seen FROM stories WHERE id = ?',
+        (story_id,)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    
+    if row is None:
+        return None
+    story = dict(row)
+    story['keywords'] = json.loads(story['keywords']) if story['keywords'] else []
+    return story
+
+
+def get_story_timeline(story_id, bucket='minute', since=None):
+    """
+    Hikâyenin kaynak bazında zaman çizelgesi
+    
+    Args:
+        bucket: 'minute' veya 'hour'
+        since: Bu zamandan (dahil, 'YYYY-MM-DD HH:MM') sonraki kovalar
+    
+    Returns:
+        [{'time', 'source', 'count'}, ...]  (zamana göre sıralı)
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    time_expr = 'minute' if bucket == 'minute' else "substr(minute, 1, 13) || ':00'"
+    
+    cursor.execute(
+        f'''SELECT {time_expr} AS time, source, SUM(count) AS count
+            FROM story_timeline
+            WHERE story_id = ? AND minute >= ?
+            GROUP BY 1, 2
+            ORDER BY 1, 2''',
+        (story_id, since or '')
+    )
+    
+    results = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return results
+
+
+def get_story_assignments(news_ids):
+    """
+    Haberlerin hikâye atamalarını getir
+    
+    Returns:
+        {news_id: {'story_id': int, 'title': str, 'keywords': [[terim, ağırlık], ...]}}
+    """
+    results = {}
+    if not news_ids:
+        return results
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    ids = list(news_ids)
+    for start in range(0, len(ids), 900):
+        chunk = ids[start:start + 900]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(
+            f'''SELECT m.news_id, m.story_id, s.title, s.keywords
+                FROM story_members m
+                JOIN stories s ON s.id = m.story_id
+                WHERE m.news_id IN ({placeholders})''',
+            chunk
+        )
+        for row in cursor.fetchall():
+            results[row['news_id']] = {
+                'story_id': row['story_id'],
+                'title': row['title'],
+                'keywords': json.loads(row['keywords']) if row['keywords'] else []
+            }
+    
+    conn.close()
+    return results
+
+
+def get_existing_story_ids(story_ids):
+    """Verilen id'lerden kayıtlı bir hikâyeye ait olanlar"""
+    existing = set()
+    if not story_ids:
+        return existing
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    ids = list(story_ids)
+    for start in range(0, len(ids), 900):
+        chunk = ids[start:start + 900]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f'SELECT id FROM stories WHERE id IN ({placeholders})', chunk)
+        existing.update(row['id'] for row in cursor.fetchall())
+    
+    conn.close()
+    return existing
+
+
+# ============= HİKÂYE AĞACI (story_tree.py) =============
+
+def get_story_members_since(hours):
+    """
+    Son X saatte eklenen ve bir hikâyeye atanmış haberler
+    
+    Returns:
+        [{'id', 'title', 'created_at', 'story_id', 'story_title'}, ...]
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    time_ago = datetime.utcnow() - timedelta(hours=hours)
+    
+    cursor.execute(
+        '''SELECT n.id, n.title, n.created_at, m.story_id, s.title AS story_title
+           FROM news n
+           JOIN story_members m ON m.news_id = n.id
+           LEFT JOIN stories s ON s.id = m.story_id
+           WHERE n.created_at >= ?
+           ORDER BY n.id ASC''',
+        (time_ago,)
+    )
+    
+    results = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return results
+
+
+def save_story_tree(nodes, members):
+    """
+    Hikâye ağacını tek işlemde yeniden yaz
+    
+    Args:
+        nodes: [{'level', 'node_id', 'parent_id', 'title', 'keywords', 'story_count',
+                 'member_count', 'first_seen', 'last_seen', 'built_at'}, ...]
+        members: [(level, node_id, story_id), ...]
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('DELETE FROM story_tree')
+    cursor.execute('DELETE FROM story_tree_members')
+    cursor.executemany(
+        '''INSERT INTO story_tree (level, node_id, parent_id, title, keywords, story_count,
+                                    member_count, first_seen, last_seen, built_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        [
+            (node['level'], node['node_id'], node['parent_id'], node['title'],
+             json.dumps(node['keywords'], ensure_ascii=False), node['story_count'],
+             node['member_count'], node['first_seen'], node['last_seen'], node['built_at'])
+            for node in nodes
+        ]
+    )
+    cursor.executemany(
+        'INSERT INTO story_tree_members (level, node_id, story_id) VALUES (?, ?, ?)',
+        members
+    )
+    
+    _bump_data_version(cursor, 'data')
+    conn.commit()
+    conn.close()
+
+
+def get_story_tree(level, limit=20, parent_id=None):
+    """
+    Ağacın bir seviyesindeki düğümler (haber sayısına göre)
+    
+    Args:
+        parent_id: Verilirse yalnızca bu üst düğümün altındakiler
+    
+    Returns:
+        [{'node_id', 'parent_id', 'title', 'keywords', 'story_count', 'member_count',
+          'first_seen', 'last_seen', 'built_at', 'stories'}, ...]
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    if parent_id is None:
+        cursor.execute(
+            '''SELECT * FROM story_tree WHERE level = ?
+               ORDER BY member_count DESC, node_id ASC LIMIT ?''',
+            (level, limit)
+        )
+    else:
+        cursor.execute(
+            '''SELECT * FROM story_tree WHERE level = ? AND parent_id = ?
+               ORDER BY member_count DESC, node_id ASC LIMIT ?''',
+            (level, parent_id, limit)
+        )
+    nodes = [dict(row) for row in cursor.fetchall()]
+    
+    for node in nodes:
+        node['keywords'] = json.loads(node['keywords']) if node['keywords'] else []
+        cursor.execute(
+            'SELECT story_id FROM story_tree_members WHERE level = ? AND node_id = ? ORDER BY story_id',
+            (level, node['node_id'])
+        )
+        node['stories'] = [row['story_id'] for row in cursor.fetchall()]
+        del node['level']
+    
+    conn.close()
+    return nodes
+
+
+def get_story_tree_news(level, node_ids, hours, per_node=20):
+    """
+    Düğümlerin pencere içindeki en yeni haberleri
+    
+    Returns:
+        {node_id: [haber, ...]}
+    """
+    results = {node_id: [] for node_id in node_ids}
+    if not node_ids:
+        return results
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    time_ago = datetime.utcnow() - timedelta(hours=hours)
+    placeholders = ','.join('?' * len(node_ids))
+    
+    cursor.execute(
+        f'''SELECT * FROM (
+                SELECT t.node_id, n.id, n.title, n.link, n.description, n.source,
+                       n.pub_date, n.created_at, n.image_url,
+                       ROW_NUMBER() OVER (PARTITION BY t.node_id ORDER BY n.id DESC) AS rank
+                FROM story_tree_members t
+                JOIN story_members m ON m.story_id = t.story_id
+                JOIN news n ON n.id = m.news_id
+                WHERE t.level = ? AND t.node_id IN ({placeholders}) AND n.created_at >= ?
+            ) WHERE rank <= ?''',
+        [level, *node_ids, time_ago, per_node]
+    )
+    
+    for row in cursor.fetchall():
+        item = dict(row)
+        node_id = item.pop('node_id')
+        item.pop('rank')
+        results[node_id].append(item)
+    
+    conn.close()
+    return results
+
+
+def save_edition(edition, keep=100):
+    """
+    Yeni Sanal Gazete baskısını kaydet ve en yeni `keep` baskı dışındakileri sil
+    
+    Args:
+        edition: {'id', 'built_at', 'signature', 'item_count', 'html'}
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        '''INSERT OR IGNORE INTO newspaper_editions (id, built_at, signature, item_count, html)
+           VALUES (?, ?, ?, ?, ?)''',
+        (edition['id'], edition['built_at'], edition['signature'],
+         edition['item_count'], edition['html'])
+    )
+    cursor.execute(
+        '''DELETE FROM newspaper_editions WHERE id NOT IN (
+               SELECT id FROM newspaper_editions ORDER BY built_at DESC, id DESC LIMIT ?
+           )''',
+        (keep,)
+    )
+    
+    conn.commit()
+    conn.close()
+
+
+def get_edition(edition_id=None):
+    """
+    Kaydedilmiş baskı (edition_id verilmezse en yenisi)
+    
+    Returns:
+        {'id', 'built_at', 'signature', 'item_count', 'html'} veya None
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    if edition_id is None:
+        cursor.execute('SELECT * FROM newspaper_editions ORDER BY built_at DESC, id DESC LIMIT 1')
+    else:
+        cursor.execute('SELECT * FROM newspaper_editions WHERE id = ?', (edition_id,))
+    row = cursor.fetchone()
+    
+    conn.close()
+    return dict(row) if row else None
+
+
+def get_latest_edition_meta():
+    """En yeni baskının HTML'siz özeti (id, built_at, signature) veya None"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        '''SELECT id, built_at, signature FROM newspaper_editions
+           ORDER BY built_at DESC, id DESC LIMIT 1'''
+    )
+    row = cursor.fetchone()
+    
+    conn.close()
+    return dict(row) if row else None
+
+
+def list_editions(limit=50):
+    """Baskı arşivi, yeniden eskiye: [{'id', 'built_at', 'item_count'}, ...]"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        '''SELECT id, built_at, item_count FROM newspaper_editions
+           ORDER BY built_at DESC, id DESC LIMIT ?''',
+        (limit,)
+    )
+    editions = [dict(row) for row in cursor.fetchall()]
+    
+    conn.close()
+    return editions
+
+
+# Ölçümler (metrics.py): sorgu fonksiyonlarının süreleri ve döndürdükleri satır sayısı
+instrument_functions(globals(), exclude={
+    'get_connection', 'hash_password', 'add_insert_listener',
+    'invalidate_user_cache', 'get_user_cache_stats', 'histogram_quantile'
+})
@@ -0,0 +1,137 @@
+"""
+HaberMetrik - Sanal Gazete Baskıları
+
+Sanal Gazete her görüntülemede 1000 haberi kümeleyip temsilci seçmek ve
+sayfayı yeniden oluşturmak yerine hazır baskılardan sunulur. Baskı kurucu
+EDITION_INTERVAL'da bir son 24 saatin hikâyelerini gruplar; küme üyelikleri
+son baskıdakiyle aynıysa yeni baskı kurulmaz. Değişmişse her kümeden temsilci
+EDITION_SEED ile seçilir (üyeleri değişmeyen hikâyelerin seçimi önbellekten
+gelir ve baskılar arasında aynı kalır), haber ızgarası bir kez oluşturulur ve
+değişmez bir baskı olarak (id, oluşturulma zamanı, HTML) veritabanına yazılır.
+
+Sayfa yalnızca en son baskıyı okur; eski baskılar EDITION_KEEP kadar arşivde
+kalır. Arka plan döngüsünün çalışmadığı kurulumlarda (ör. gunicorn) süresi
+geçmiş baskı yine sunulur ve yenisi arka planda kurulur.
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime
+
+from flask import render_template
+
+from clustering import select_representatives
+from config import EDITION_INTERVAL, EDITION_KEEP, EDITION_SEED
+from database import get_recent_news, save_edition, get_edition, get_latest_edition_meta
+from recent import parse_utc
+
+# Aynı süreçte tek kurulum (döngü ve soğuk başlangıç isteği çakışmasın)
+_build_lock = threading.Lock()
+_last_checked = 0.0  # Bu süreçteki son kurulum denemesi (epoch)
+
+
+def cluster_signature(clusters):
+    """Küme üyeliklerinin özeti; aynı haber grupları aynı imzayı verir"""
+    groups = sorted(
+        tuple(sorted(news['id'] for news in cluster['news'] if news.get('id') is not None))
+        for cluster in clusters.values()
+        if cluster['news']
+    )
+    return hashlib.md5(repr(groups).encode()).hexdigest()
+
+
+def build_edition(app, force=False):
+    """
+    Son 24 saatin hikâyelerinden yeni baskı kur
+
+    Args:
+        app: Şablonun oluşturulacağı Flask uygulaması
+        force: Küme üyelikleri değişmemiş olsa da kur
+
+    Returns:
+        Yeni baskının id'si; kümeler değişmediyse None
+    """
+    global _last_checked
+    from jobs import run_cluster_job
+    from stories import group_by_story
+
+    with _build_lock:
+        _last_checked = time.time()
+        raw_news = get_recent_news(hours=24, limit=1000)
+
+        # Önce ingest sırasında kurulmuş hikâyeler, yoksa süreç havuzunda kümele
+        clusters = group_by_story(raw_news)
+        if clusters is None:
+            clusters = run_cluster_job(raw_news, eps=0.25, min_samples=2)
+
+        signature = cluster_signature(clusters)
+        latest = get_latest_edition_meta()
+        if not force and latest and latest['signature'] == signature:
+            return None
+
+        news_items = select_representatives(clusters, seed=EDITION_SEED)
+        with app.app_context():
+            html = render_template('newspaper_edition.html', news=news_items)
+
+        built_at = datetime.utcnow().replace(microsecond=0)
+        edition_id = f"{built_at.strftime('%Y%m%d-%H%M%S')}-{signature[:8]}"
+        save_edition({
+            'id': edition_id,
+            'built_at': str(built_at),
+            'signature': signature,
+            'item_count': len(news_items),
+            'html': html
+        }, keep=EDITION_KEEP)
+
+    print(f"📰 Sanal Gazete baskısı kuruldu: {edition_id} ({len(news_items)} haber)")
+    return edition_id
+
+
+def _refresh_in_background(app):
+    """Başka kurulum sürmüyorsa arka planda yeni baskı kur"""
+    global _last_checked
+    if _build_lock.locked():
+        return
+    _last_checked = time.time()  # Eşzamanlı istekler ikinci bir kurulum başlatmasın
+
+    def run():
+        try:
+            build_edition(app)
+        except Exception as e:
+            print(f"Sanal Gazete baskı hatası: {e}")
+
+    threading.Thread(target=run, name="edition_refresh", daemon=True).start()
+
+
+def get_current_edition(app, now=None):
+    """
+    Sunulacak en son baskı
+
+    Hiç baskı yoksa (ilk açılış) bir kez eşzamanlı kurulur. Son baskı ve bu
+    süreçteki son deneme EDITION_INTERVAL'dan eskiyse (arka plan döngüsü başka
+    süreçte veya hiç çalışmıyor) yine o sunulur ve yenisi arka planda kurulur.
+    """
+    edition = get_edition()
+    if edition is None:
+        build_edition(app, force=True)
+        edition = get_edition()
+    else:
+        now = now if now is not None else time.time()
+        built_ts = parse_utc(edition['built_at']) or 0.0
+        if now - max(built_ts, _last_checked) > EDITION_INTERVAL:
+            _refresh_in_background(app)
+
+    if edition is not None:
+        edition['is_latest'] = True
+    return edition
+
+
+def run_edition_loop(app, stop_event, interval=EDITION_INTERVAL):
+    """Baskıları stop_event set edilene kadar periyodik olarak kur"""
+    while not stop_event.is_set():
+        try:
+            build_edition(app)
+        except Exception as e:
+            print(f"Sanal Gazete baskı hatası: {e}")
+        stop_event.wait(interval)
@@ -0,0 +1,207 @@
+"""
+HaberMetrik - Arka Plan Kümeleme İşleri
+
+Ağır TF-IDF + DBSCAN hesaplamalarını web thread'lerinin dışında, bir
+ProcessPoolExecutor'da çalıştırır. Böylece hesaplama sürerken GIL web
+isteklerini bekletmez.
+
+Akış: endpoint önbellekte sonuç varsa doğrudan döndürür, yoksa iş gönderip
+job id'yi döndürür. İstemci /api/jobs/<id> ile sorgular veya
+/api/jobs/<id>/stream ile tamamlanmayı bekler. Biten işin sonucu kümeleme
+önbelleğine yazılır; aynı girdi için süren hesaplama varsa yeni hesaplama
+açılmaz. Her çağıran yine kendi job id'sini alır: işte ham kümeler tutulur ve
+çağıranın formatter'ı sonuç okunurken uygulanır.
+"""
+
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from config import CLUSTER_JOB_WORKERS, CLUSTER_JOB_TTL, CLUSTER_JOB_WAIT_TIMEOUT
+from metrics import CLUSTERING_LATENCY
+
+_executor = None
+_lock = threading.Lock()
+_jobs = {}              # job_id -> iş kaydı (çağıran başına)
+_futures_by_key = {}    # kümeleme önbellek anahtarı -> süren hesaplama
+
+
+def _get_executor():
+    """
+    Süreç havuzunu ilk kullanımda oluştur (kilit altında çağrılır)
+
+    Çocuklar fork yerine forkserver (yoksa spawn) ile başlar: gthread
+    worker'ından fork edilen çocuk, o an başka bir thread'in tuttuğu kilidi
+    (ölçümler, önbellekler, kümeleme sırası) kilitli devralıp takılabilir.
+    """
+    global _executor
+    if _executor is None:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        _executor = ProcessPoolExecutor(max_workers=CLUSTER_JOB_WORKERS, mp_context=context)
+    return _executor
+
+
+def _reset_executor(executor):
+    """Çöken havuzu bırak, sonraki gönderim yenisini kurar (kilit altında çağrılır)"""
+    global _executor
+    if _executor is executor:
+        _executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        print("⚠️ Kümeleme süreç havuzu çöktü, yeniden kurulacak")
+
+
+def _submit(*args):
+    """Havuza gönder; havuz çökmüşse yenisini kurup bir kez daha dene (kilit altında)"""
+    executor = _get_executor()
+    try:
+        return executor, executor.submit(*args)
+    except BrokenProcessPool:
+        _reset_executor(executor)
+        executor = _get_executor()
+        return executor, executor.submit(*args)
+
+
+def _prune():
+    """Süresi dolan işleri unut (kilit altında çağrılır)"""
+    cutoff = time.time() - CLUSTER_JOB_TTL
+    for job_id in [j for j, job in _jobs.items() if job['created_at'] < cutoff and job['future'].done()]:
+        del _jobs[job_id]
+
+
+def _on_done(key, future, executor):
+    """Hesaplama bitince sonucu kümeleme önbelleğine yaz; çöken havuzu bırak"""
+    from clustering import get_clusterer
+
+    with _lock:
+        if _futures_by_key.get(key) is future:
+            del _futures_by_key[key]
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            _reset_executor(executor)
+
+    if future.cancelled() or future.exception() is not None:
+        return
+
+    clusters, compute_seconds = future.result()
+    CLUSTERING_LATENCY.observe(compute_seconds, key[3], 'pool')
+    get_clusterer().store_cached(key, clusters, compute_seconds)
+
+
+def submit_cluster_job(news_items, eps, min_samples, formatter):
+    """
+    Kümeleme işini havuza gönder
+
+    Args:
+        formatter: Kümeleri bu çağıranın yanıtına çeviren fonksiyon (ana süreçte,
+                   sonuç okunurken çalışır)
+
+    Returns:
+        (job_id, None) veya sonuç önbellekte varsa (None, yanıt)
+    """
+    from clustering import get_clusterer, cluster_news_job
+
+    clusterer = get_clusterer()
+    key = clusterer.cache_key(news_items, eps, min_samples)
+
+    cached = clusterer.get_cached(key)
+    if cached is not None:
+        return None, formatter(cached)
+
+    with _lock:
+        _prune()
+
+        # Aynı girdi için süren hesaplama paylaşılır, formatter çağırana özeldir
+        future = _futures_by_key.get(key)
+        started = future is None
+        if started:
+            executor, future = _submit(cluster_news_job, news_items, eps, min_samples, key[3])
+            _futures_by_key[key] = future
+
+        job_id = uuid.uuid4().hex
+        _jobs[job_id] = {
+            'key': key,
+            'future': future,
+            'formatter': formatter,
+            'created_at': time.time(),
+            'response': None
+        }
+
+    if started:
+        future.add_done_callback(lambda f: _on_done(key, f, executor))
+    return job_id, None
+
+
+def get_job(job_id):
+    """
+    İş durumunu getir
+
+    Returns:
+        {'job_id', 'status': 'pending'|'running'|'done'|'error', 'result'?, 'error'?}
+        veya iş bilinmiyorsa None
+    """
+    from clustering import copy_clusters
+
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        return None
+
+    future = job['future']
+    status = {'job_id': job_id}
+
+    if not future.done():
+        status['status'] = 'running' if future.running() else 'pending'
+    elif future.cancelled() or future.exception() is not None:
+        status['status'] = 'error'
+        status['error'] = f"Clustering failed: {future.exception() or 'cancelled'}"
+    else:
+        if job['response'] is None:
+            clusters, _ = future.result()
+            job['response'] = job['formatter'](copy_clusters(clusters))
+        status['status'] = 'done'
+        status['result'] = job['response']
+
+    return status
+
+
+def wait_for_job(job_id, timeout=CLUSTER_JOB_WAIT_TIMEOUT):
+    """İşin bitmesini en fazla timeout saniye bekle (üst sınır CLUSTER_JOB_WAIT_TIMEOUT), son durumu döndür"""
+    timeout = CLUSTER_JOB_WAIT_TIMEOUT if timeout is None else min(timeout, CLUSTER_JOB_WAIT_TIMEOUT)
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        return None
+
+    try:
+        job['future'].exception(timeout=timeout)
+    except FutureTimeoutError:
+        pass
+    return get_job(job_id)
+
+
+def run_cluster_job(news_items, eps, min_samples):
+    """
+    Kümelemeyi havuzda çalıştır ve sonucu bekle
+
+    Bekleyen thread GIL'i tutmaz. Havuz kullanılamazsa veya iş
+    CLUSTER_JOB_WAIT_TIMEOUT içinde bitmezse süreç içinde kümeler.
+    """
+    from clustering import get_clusterer, copy_clusters
+
+    try:
+        job_id, clusters = submit_cluster_job(news_items, eps, min_samples, lambda c: c)
+        if job_id is None:
+            return clusters
+
+        job = wait_for_job(job_id)
+        if job and job['status'] == 'done':
+            return copy_clusters(job['result'])
+        if job and job['status'] != 'error':
+            print(f"Kümeleme işi {CLUSTER_JOB_WAIT_TIMEOUT} sn'de bitmedi, süreç içinde hesaplanıyor")
+    except Exception as e:
+        print(f"Kümeleme işi hatası, süreç içinde hesaplanıyor: {e}")
+
+    return get_clusterer().cluster_news(news_items, eps=eps, min_samples=min_samples)
@@ -0,0 +1,219 @@
+"""
+HaberMetrik - Canlı Haber Akışı
+
+Yeni haberler LiveFeedHub'a iki yoldan girer: ingest sürecinde database
+insert listener'ı anında yayınlar; diğer süreçlerde (gunicorn worker'ları)
+bekleyen aboneler LIVE_TAIL_SECONDS'ta bir, tek bir thread üzerinden
+veritabanını id ile takip eder (recent.py gibi). Abone sayısından bağımsız
+olarak süreç başına en fazla bir takip sorgusu çalışır.
+
+Kaynak başına güncelleyen thread'ler haberleri id sırasıyla teslim etmeyebilir;
+hub geç gelen küçük id'leri de kabul eder. Aboneler geliş sıra numarasıyla
+(seq) bekler, böylece geç gelen olay kaçmaz. Yeniden bağlanan istemci
+Last-Event-ID ile kaldığı yerden devam eder; tampon dışındaki aralık
+veritabanından tamamlanır, LIVE_BUFFER_SIZE'dan uzunsa istemci 'reset' olayı
+alır ve listeyi bir kez /api/live-feed'den yeniden yükler.
+
+Açık bir akış bir thread'i tutar: gunicorn'da gthread worker'ı gerekir
+(Procfile). Tek thread'li worker'da /api/live-stream bağlantıyı tutmaz.
+"""
+
+import threading
+import time
+from collections import deque
+
+from config import LIVE_BUFFER_SIZE, LIVE_TAIL_SECONDS
+
+# Olaylara taşınan haber alanları
+EVENT_FIELDS = ('id', 'title', 'link', 'description', 'source', 'pub_date', 'created_at', 'image_url')
+
+
+def _to_events(news_items):
+    return [
+        {field: item.get(field) for field in EVENT_FIELDS}
+        for item in news_items
+        if item.get('id') is not None and item.get('title')
+    ]
+
+
+class LiveFeedHub:
+    """Son olayları tutan ve bekleyen abonelere dağıtan süreç içi yayıncı"""
+
+    def __init__(self, maxlen=LIVE_BUFFER_SIZE, tail_seconds=LIVE_TAIL_SECONDS):
+        self._events = deque(maxlen=maxlen)  # (seq, olay), geliş sırasıyla
+        self._ids = set()       # Tampondaki olayların id'leri
+        self._cond = threading.Condition()
+        self._floor = None      # Bu id ve öncesi tamponda olmayabilir (None: henüz başlatılmadı)
+        self._last_id = 0       # Görülen en büyük id
+        self._seq = 0           # Kabul edilen son olayın sıra numarası
+        self._tailed_id = 0     # Veritabanı takibinin kaldığı id
+        self._tailed_at = 0.0
+        self._tailing = False
+        self.tail_seconds = tail_seconds
+        self._subscribers = 0
+        self._published = 0
+        self._tail_queries = 0
+
+    def _ensure_started(self):
+        """İlk kullanımda başlangıç noktasını veritabanından al (kilit altında)"""
+        if self._floor is None:
+            from database import get_max_news_id
+            self._floor = self._last_id = self._tailed_id = get_max_news_id()
+            self._tailed_at = time.time()
+
+    def _accept(self, events):
+        """Görülmemiş olayları tampona ekle, eklenen sayısını döndür (kilit altında)"""
+        added = 0
+        for event in sorted(events, key=lambda e: e['id']):
+            if event['id'] <= self._floor or event['id'] in self._ids:
+                continue
+            if len(self._events) == self._events.maxlen:
+                _, dropped = self._events[0]
+                self._ids.discard(dropped['id'])
+                self._floor = max(self._floor, dropped['id'])
+            self._seq += 1
+            self._events.append((self._seq, event))
+            self._ids.add(event['id'])
+            self._last_id = max(self._last_id, event['id'])
+            added += 1
+        self._published += added
+        return added
+
+    def publish(self, news_items):
+        """Yeni eklenen haberleri yayınla (database insert listener)"""
+        events = _to_events(news_items)
+        if not events:
+            return
+
+        with self._cond:
+            self._ensure_started()
+            if self._accept(events):
+                self._cond.notify_all()
+
+    def sync(self):
+        """
+        Başka süreçlerde eklenen haberleri veritabanından al
+
+        tail_seconds içinde en fazla bir kez ve aynı anda tek thread'den
+        sorgular; sorgu kilit dışında çalışır.
+        """
+        with self._cond:
+            self._ensure_started()
+            if self._tailing or time.time() - self._tailed_at < self.tail_seconds:
+                return
+            self._tailing = True
+            after_id = self._tailed_id
+
+        rows = []
+        try:
+            from database import get_news_after_id
+            rows = get_news_after_id(after_id, limit=self._events.maxlen)
+        except Exception as e:
+            print(f"⚠️ Canlı akış takibi başarısız: {e}")
+        finally:
+            with self._cond:
+                self._tailing = False
+                self._tailed_at = time.time()
+                self._tail_queries += 1
+                if rows:
+                    self._tailed_id = max(self._tailed_id, rows[-1]['id'])
+                    if self._accept(_to_events(rows)):
+                        self._cond.notify_all()
+
+    @property
+    def last_id(self):
+        """Görülen en büyük haber id'si"""
+        self.sync()
+        with self._cond:
+            return self._last_id
+
+    def resume(self, last_id):
+        """
+        last_id'den büyük id'li olaylar (id sırasıyla) ve güncel seq
+
+        Tamponda olmayan aralık (başka worker'dan alınmış last_id gibi)
+        veritabanından okunur; tampondan uzunsa reset gerekir.
+
+        Returns:
+            (olaylar, seq); aralık tampondan uzunsa (None, seq)
+        """
+        self.sync()
+        with self._cond:
+            seq = self._seq
+            if last_id >= self._floor:
+                events = sorted(
+                    (event for _, event in self._events if event['id'] > last_id),
+                    key=lambda e: e['id']
+                )
+                return events, seq
+
+        from database import get_news_after_id
+        rows = get_news_after_id(last_id, limit=self._events.maxlen + 1)
+        if len(rows) > self._events.maxlen:
+            return None, seq
+        return _to_events(rows), seq
+
+    def _events_after_seq(self, seq):
+        """seq'ten sonra kabul edilen olaylar; tampon yetmiyorsa None (kilit altında)"""
+        if self._events and self._events[0][0] > seq + 1:
+            return None
+        return [event for event_seq, event in self._events if event_seq > seq]
+
+    def wait_for_events(self, seq, timeout):
+        """
+        seq'ten sonra kabul edilen olayları döndür, yoksa en fazla timeout saniye bekle
+
+        Beklerken tail_seconds'ta bir veritabanı takibi yapılır (sync).
+
+        Returns:
+            (olaylar, yeni seq); zaman aşımında olaylar boş liste, abone
+            tamponun gerisinde kaldıysa None
+        """
+        deadline = time.time() + timeout
+        while True:
+            self.sync()
+            with self._cond:
+                self._ensure_started()
+                events = self._events_after_seq(seq)
+                if events is None or events:
+                    return events, self._seq
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return [], seq
+                self._cond.wait(min(remaining, self.tail_seconds))
+
+    def subscribe(self, limit=None):
+        """Abone ekle; limit doluysa False"""
+        with self._cond:
+            if limit is not None and self._subscribers >= limit:
+                return False
+            self._subscribers += 1
+            return True
+
+    def unsubscribe(self):
+        with self._cond:
+            self._subscribers -= 1
+
+    def get_stats(self):
+        """Abone sayısı ve tampon durumu"""
+        with self._cond:
+            return {
+                'subscribers': self._subscribers,
+                'published': self._published,
+                'buffered': len(self._events),
+                'last_id': self._last_id,
+                'floor': self._floor,
+                'tail_queries': self._tail_queries
+            }
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_live_hub():
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = LiveFeedHub()
+        return _hub
@@ -0,0 +1,188 @@
+"""
+HaberMetrik - Yaklaşık Komşu Arama (Random-Projection LSH)
+
+TF-IDF vektörleri SimHash imzalarıyla kovalara ayrılır; yalnızca aynı kovaya
+düşen haber çiftlerinin kosinüs benzerliği hesaplanır. Sonuç, DBSCAN'e
+metric='precomputed' ile verilebilen seyrek bir mesafe grafiğidir, böylece
+O(n²) kaba kuvvet karşılaştırma yerine yüz binlerce haber tek çekirdekte
+kümelenebilir.
+
+Geri çağırma (recall) n_tables ve n_bits ile ayarlanır: daha fazla tablo
+daha yüksek recall, daha fazla bit daha küçük kova (daha hızlı) demektir.
+"""
+
+import math
+import numpy as np
+from scipy import sparse
+
+from config import LSH_TABLES, LSH_BITS, LSH_MAX_BUCKET
+from vectors import distance_graph
+
+# Bayt başına bit sayısı (imza Hamming mesafesi için)
+_POPCOUNT = np.array([bin(x).count('1') for x in range(256)], dtype=np.uint16)
+
+# Bu boyuta kadar olan kovalar aday çift listesiyle doğrulanır
+SMALL_BUCKET = 64
+# Aday çiftler bu büyüklükte parçalarla doğrulanır (bellek sınırı)
+PAIR_CHUNK = 500000
+
+
+def estimate_recall(eps, n_tables=LSH_TABLES, n_bits=LSH_BITS):
+    """
+    Mesafesi tam eps olan bir çiftin en az bir tabloda çakışma olasılığı
+
+    SimHash'te tek bitin eşleşme olasılığı 1 - θ/π'dir (θ: iki vektör arası açı).
+    Küme bağlantılılığı birden fazla yol üzerinden kurulduğu için gerçek küme
+    geri çağırma oranı bu değerden yüksektir.
+    """
+    theta = math.acos(max(-1.0, min(1.0, 1.0 - eps)))
+    p_bit = 1.0 - theta / math.pi
+    return 1.0 - (1.0 - p_bit ** n_bits) ** n_tables
+
+
+def _compact_columns(matrix):
+    """Yalnızca dolu sütunları bırak (küçük kova çarpımları için)"""
+    cols, inverse = np.unique(matrix.indices, return_inverse=True)
+    return sparse.csr_matrix(
+        (matrix.data, inverse.astype(np.int32), matrix.indptr),
+        shape=(matrix.shape[0], len(cols))
+    )
+
+
+def _bucket_pairs(order, starts, sizes, n):
+    """
+    Kovalardaki tüm (i < j) çiftlerini vektörel olarak üret
+
+    Returns:
+        i * n + j anahtarları (int64)
+    """
+    if len(starts) == 0:
+        return np.array([], dtype=np.int64)
+
+    # Her pozisyonun kovasında kendisinden sonra gelen eleman sayısı
+    positions = _expand_ranges(starts, sizes)
+    ends = np.repeat(starts + sizes, sizes)
+    partners = ends - positions - 1
+
+    left = np.repeat(positions, partners)
+    offsets = np.arange(len(left)) - np.repeat(np.cumsum(partners) - partners, partners)
+    right = left + 1 + offsets
+
+    i, j = order[left], order[right]
+    return np.minimum(i, j).astype(np.int64) * n + np.maximum(i, j)
+
+
+def _expand_ranges(starts, sizes):
+    """[s, s+k) aralıklarını tek dizide birleştir"""
+    offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    return np.repeat(starts, sizes) + offsets
+
+
+def _sorted_unique(keys):
+    """np.unique'in sıralama tabanlı hızlı karşılığı (büyük int64 dizileri için)"""
+    keys = np.sort(keys)
+    if len(keys) == 0:
+        return keys
+    return keys[np.r_[True, keys[1:] != keys[:-1]]]
+
+
+def _verify_bucket(reduced, bucket, threshold, max_bucket, n):
+    """Büyük bir kovadaki çiftleri blok çarpımıyla doğrula"""
+    keys = []
+    sims_out = []
+    bucket_matrix = _compact_columns(reduced[bucket])
+
+    # Çok büyük kovalar satır parçalarıyla doğrulanır (bellek sınırı)
+    for start in range(0, len(bucket), max_bucket):
+        rows = bucket[start:start + max_bucket]
+        sims = (bucket_matrix[start:start + max_bucket] @ bucket_matrix.T).tocoo()
+
+        keep = sims.data >= threshold
+        i = rows[sims.row[keep]]
+        j = bucket[sims.col[keep]]
+        upper = i < j
+
+        keys.append(i[upper].astype(np.int64) * n + j[upper])
+        sims_out.append(sims.data[keep][upper])
+
+    return np.concatenate(keys), np.concatenate(sims_out)
+
+
+def lsh_radius_graph(matrix, eps, n_tables=LSH_TABLES, n_bits=LSH_BITS,
+                     max_bucket=LSH_MAX_BUCKET, seed=0):
+    """
+    Kosinüs mesafesi eps'ten küçük/eşit haber çiftlerini yaklaşık olarak bul
+
+    Args:
+        matrix: l2 normalize TF-IDF matrisi (n x F, seyrek)
+        eps: DBSCAN eps (kosinüs mesafesi)
+
+    Returns:
+        scipy.sparse.csr_matrix (n x n) - yalnızca doğrulanmış komşuların mesafeleri
+    """
+    matrix = sparse.csr_matrix(matrix)
+    n = matrix.shape[0]
+    threshold = 1.0 - eps
+
+    # Yalnızca kullanılan sütunlar için rastgele hiper-düzlemler üret
+    reduced = _compact_columns(matrix)
+    rng = np.random.default_rng(seed)
+    planes = rng.standard_normal((reduced.shape[1], n_tables * n_bits)).astype(np.float32)
+    bits = np.asarray(reduced @ planes) > 0
+
+    weights = 1 << np.arange(n_bits, dtype=np.int64)
+    has_terms = np.diff(matrix.indptr) > 0
+
+    # Küçük kovalardaki aday çiftler toplanıp tek seferde doğrulanır,
+    # büyük kovalar blok çarpımıyla doğrulanır
+    candidate_keys = []
+    verified_keys = []
+    verified_sims = []
+
+    for table in range(n_tables):
+        codes = bits[:, table * n_bits:(table + 1) * n_bits] @ weights
+        codes = np.where(has_terms, codes, -1)
+
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, np.diff(sorted_codes) != 0])
+        sizes = np.diff(np.r_[starts, n])
+        valid = (sizes >= 2) & (sorted_codes[starts] != -1)
+
+        small = valid & (sizes <= SMALL_BUCKET)
+        candidate_keys.append(_bucket_pairs(order, starts[small], sizes[small], n))
+
+        for bucket_start, size in zip(starts[valid & ~small], sizes[valid & ~small]):
+            bucket = order[bucket_start:bucket_start + size]
+            keys, sims = _verify_bucket(reduced, bucket, threshold, max_bucket, n)
+            verified_keys.append(keys)
+            verified_sims.append(sims)
+
+    # Tüm imza bitlerinde çok farklı olan adaylar gerçek komşu olamaz:
+    # eps açısında beklenen Hamming mesafesinin 3σ üstü eşik olarak kullanılır
+    total_bits = n_tables * n_bits
+    p_diff = math.acos(max(-1.0, min(1.0, threshold))) / math.pi
+    max_hamming = total_bits * p_diff + 3 * math.sqrt(total_bits * p_diff * (1 - p_diff))
+    signatures = np.packbits(bits, axis=1)
+
+    keys = _sorted_unique(np.concatenate(candidate_keys))
+    for chunk_start in range(0, len(keys), PAIR_CHUNK):
+        chunk = keys[chunk_start:chunk_start + PAIR_CHUNK]
+        hamming = _POPCOUNT[signatures[chunk // n] ^ signatures[chunk % n]].sum(axis=1)
+        chunk = chunk[hamming <= max_hamming]
+
+        sims = np.asarray(
+            reduced[chunk // n].multiply(reduced[chunk % n]).sum(axis=1)
+        ).ravel()
+        keep = sims >= threshold
+        verified_keys.append(chunk[keep])
+        verified_sims.append(sims[keep])
+
+    if not verified_keys:
+        return sparse.csr_matrix((n, n))
+
+    keys, first = np.unique(np.concatenate(verified_keys), return_index=True)
+    sims = np.concatenate(verified_sims)[first]
+    i, j = keys // n, keys % n
+
+    return distance_graph(np.concatenate([i, j]), np.concatenate([j, i]), np.concatenate([sims, sims]), n)
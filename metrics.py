@@ -0,0 +1,244 @@
+"""
+HaberMetrik - Performans Ölçümleri
+
+Süreç içi sayaç ve histogramlar; /metrics Prometheus metin biçiminde
+(text/plain; version=0.0.4) sunar. Ölçüler:
+
+    - HTTP istek süreleri (endpoint, method, status)
+    - database.py fonksiyonlarının süreleri ve döndürdükleri satır sayısı
+    - Kümeleme süreleri (motor, süreç içi/havuz)
+    - update_feed'in kaynak başına indirme/ayrıştırma/ekleme süreleri,
+      haber sayıları, hataları ve son başarılı güncelleme zamanı
+    - Kaynak başına haber tazeliği (created_at - pub_date)
+
+Her gözlem bir bisect ve kısa bir kilit; üretimde açık bırakılabilir.
+Değerler süreç başınadır (gunicorn'da her worker kendi değerlerini sunar).
+"""
+
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+
+from config import FRESHNESS_BUCKETS
+
+# Saniye cinsinden varsayılan histogram sınırları
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Ağ isteği içeren aşamalar için (kaynak indirme vb.)
+SLOW_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+
+
+def _escape(value):
+    """Etiket değerini kaçışla (ters bölü, çift tırnak, satır sonu)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Etiketli seri taşıyan ölçü (kayıt defterine kendini ekler)"""
+
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _header(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    """Yalnızca artan sayaç"""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        return self._header() + [
+            f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+            for labels, value in series
+        ]
+
+
+class Gauge(_Metric):
+    """Son değeri tutulan ölçü"""
+
+    kind = 'gauge'
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._series[labels] = value
+
+    render = Counter.render
+
+
+class Histogram(_Metric):
+    """Sabit sınırlı histogram (kova sayıları, toplam ve adet)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [kova sayıları..., +Inf, toplam]
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+
+        lines = self._header()
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                le = ('le', _format_value(float(bound)))
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(round(values[-1], 6))}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    'habermetrik_http_request_duration_seconds', 'HTTP istek süresi',
+    ('endpoint', 'method', 'status')
+)
+DB_QUERY_LATENCY = Histogram(
+    'habermetrik_db_query_duration_seconds', 'database.py fonksiyon süresi', ('function',)
+)
+DB_ROWS = Counter(
+    'habermetrik_db_rows_total', 'database.py fonksiyonlarının döndürdüğü satır sayısı', ('function',)
+)
+CLUSTERING_LATENCY = Histogram(
+    'habermetrik_clustering_duration_seconds', 'Kümeleme hesaplama süresi',
+    ('engine', 'mode'), buckets=SLOW_BUCKETS
+)
+FEED_STAGE_LATENCY = Histogram(
+    'habermetrik_feed_stage_duration_seconds', 'Kaynak güncelleme aşama süresi (fetch/parse/insert)',
+    ('source', 'stage'), buckets=SLOW_BUCKETS
+)
+FEED_ITEMS = Counter(
+    'habermetrik_feed_items_total', 'Kaynaktan okunan (fetched) ve eklenen (inserted) haberler',
+    ('source', 'result')
+)
+FEED_FRESHNESS = Histogram(
+    'habermetrik_feed_freshness_seconds', 'Haberin yayınlanmasından eklenmesine kadar geçen süre',
+    ('source',), buckets=FRESHNESS_BUCKETS
+)
+FEED_ERRORS = Counter(
+    'habermetrik_feed_errors_total', 'Kaynak güncelleme hataları', ('source', 'type')
+)
+FEED_LAST_SUCCESS = Gauge(
+    'habermetrik_feed_last_success_timestamp_seconds', 'Kaynağın son başarılı güncellemesi (epoch)',
+    ('source',)
+)
+
+
+def render_metrics():
+    """Tüm ölçüler Prometheus metin biçiminde"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def _count_rows(result):
+    """Sorgu sonucunun satır sayısı (liste döndürmeyen fonksiyonlar için None)"""
+    if isinstance(result, list):
+        return len(result)
+    return None
+
+
+def timed_query(func):
+    """database.py fonksiyonunun süresini ve döndürdüğü satır sayısını ölç"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            DB_QUERY_LATENCY.observe(time.perf_counter() - start, name)
+        rows = _count_rows(result)
+        if rows is not None:
+            DB_ROWS.inc(name, amount=rows)
+        return result
+
+    return wrapper
+
+
+def instrument_functions(namespace, exclude=()):
+    """
+    Modülde tanımlı herkese açık fonksiyonları timed_query ile sar
+
+    Modülün sonunda globals() ile çağrılır; modül içi çağrılar ve sonradan
+    yapılan 'from modül import f' içe aktarmaları da ölçülen sürümü kullanır.
+    """
+    module_name = namespace['__name__']
+    for name, func in list(namespace.items()):
+        if (name.startswith('_') or name in exclude or not inspect.isfunction(func)
+                or func.__module__ != module_name):
+            continue
+        namespace[name] = timed_query(func)
+
+
+def install_request_metrics(app):
+    """Uygulamanın tüm isteklerinin süresini endpoint başına ölç"""
+    from flask import g, request
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start,
+                request.endpoint or 'not_found', request.method, str(response.status_code)
+            )
+        return response
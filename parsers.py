@@ -2,6 +2,7 @@
 HaberMetrik - RSS/Sitemap Parser Modülü
 """
 
+import time
 import requests
 import xml.etree.ElementTree as ET
 import re
@@ -15,6 +16,32 @@ class BaseParser:
     def __init__(self, source_key, url):
         self.source_key = source_key
         self.url = url
+        self.reset_timings()
+    
+    def reset_timings(self):
+        """Yoklama başında indirme ölçümlerini sıfırla"""
+        self.fetch_seconds = 0.0   # get_items içinde indirmeye harcanan süre
+        self.fetch_started = None  # İlk indirmenin başladığı an (UTC)
+        self.fetch_ended = None    # Son indirmenin bittiği an (UTC)
+    
+    def add_timings(self, other):
+        """Alt parser'ın (ör. sitemap index içindeki sitemap) indirme ölçümlerini ekle"""
+        self.fetch_seconds += other.fetch_seconds
+        self.fetch_started = self.fetch_started or other.fetch_started
+        self.fetch_ended = other.fetch_ended or self.fetch_ended
+    
+    def fetch(self, url):
+        """URL'yi indir (süre ve başlangıç/bitiş anı kaydedilir)"""
+        if self.fetch_started is None:
+            self.fetch_started = datetime.utcnow()
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, headers=REQUEST_HEADERS, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return response
+        finally:
+            self.fetch_seconds += time.perf_counter() - start
+            self.fetch_ended = datetime.utcnow()
     
     def get_items(self):
         """Haberleri getir"""
@@ -120,8 +147,7 @@ class RSSParser(BaseParser):
     
     def get_items(self):
         try:
-            response = requests.get(self.url, headers=REQUEST_HEADERS, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
+            response = self.fetch(self.url)
             
             root = ET.fromstring(response.content)
             items = []
@@ -193,8 +219,7 @@ class SitemapParser(BaseParser):
     
     def get_items(self):
         try:
-            response = requests.get(self.url, headers=REQUEST_HEADERS, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
+            response = self.fetch(self.url)
             
             root = ET.fromstring(response.content)
             items = []
@@ -251,8 +276,7 @@ class SitemapIndexParser(BaseParser):
     
     def get_items(self):
         try:
-            response = requests.get(self.url, headers=REQUEST_HEADERS, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
+            response = self.fetch(self.url)
             
             root = ET.fromstring(response.content)
             all_items = []
@@ -264,6 +288,7 @@ class SitemapIndexParser(BaseParser):
                     # Her bir sitemap'i parse et
                     parser = SitemapParser(self.source_key, loc.text)
                     items = parser.get_items()
+                    self.add_timings(parser)
                     all_items.extend(items)
                     
                     # İlk 100 haber yeterli
@@ -281,7 +306,10 @@ class DynamicSitemapParser(BaseParser):
     
     def get_items(self):
         # Sözcü için özel parser
-        return SitemapParser(self.source_key, self.url).get_items()
+        parser = SitemapParser(self.source_key, self.url)
+        items = parser.get_items()
+        self.add_timings(parser)
+        return items
 
 
 def get_parser(source_key):
@@ -0,0 +1,217 @@
+"""
+HaberMetrik - Örneklemeli Profil Çıkarıcı
+
+Admin panelinden yeniden başlatma gerektirmeden açılır. Belirli bir süre
+boyunca ayrı bir thread PROFILER_INTERVAL_MS'de bir hedef thread'lerin yığın
+izlerini (sys._current_frames) örnekler:
+
+    - 'requests': isteklerin `rate` kadarı rastgele seçilir, yalnızca o
+      istekleri işleyen thread'ler örneklenir (kök çerçeve 'request:<endpoint>')
+    - 'ingest': arka plan thread'leri (update_*, editions, story_tree)
+
+Sonuç flamegraph.pl / speedscope ile açılabilen "collapsed stacks" biçimidir:
+her satır 'kök;çerçeve;...;çerçeve adet'. Örnekleme yalnızca bu süreçte
+yapılır (gunicorn'da istek hangi worker'a düştüyse).
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from config import PROFILER_INTERVAL_MS, PROFILER_MAX_SECONDS, PROFILER_MAX_STACKS
+
+PROFILER_TARGETS = ('requests', 'ingest')
+
+# 'ingest' hedefinde örneklenen thread adı önekleri
+INGEST_THREAD_PREFIXES = ('update_', 'editions', 'edition_refresh', 'story_tree')
+
+# Bir yığında tutulan en fazla çerçeve (en dıştakiler atılır)
+MAX_STACK_DEPTH = 128
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename).replace(' ', '_').replace(';', '_')
+    return f'{filename}:{code.co_name}'
+
+
+def collapse_stack(frame, root):
+    """Çerçeveden kökten yaprağa 'kök;dosya:fonksiyon;...' yığını"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.append(root)
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """Süre sınırlı, thread seçmeli istatistiksel örnekleyici"""
+
+    def __init__(self, interval_ms=PROFILER_INTERVAL_MS, max_stacks=PROFILER_MAX_STACKS):
+        self.interval = interval_ms / 1000.0
+        self.max_stacks = max_stacks
+        self._lock = threading.Lock()
+        self._stacks = Counter()
+        self._tracked = {}      # thread id -> kök etiket (örneklenen istekler)
+        self._thread = None
+        self._stop = threading.Event()
+        self._session = None    # {'target', 'rate', 'started_at', 'deadline', ...}
+
+    @property
+    def active(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, target, duration, rate=0.1):
+        """
+        Yeni örnekleme oturumu başlat (önceki sonuçlar silinir)
+
+        Args:
+            target: 'requests' veya 'ingest'
+            duration: Saniye (PROFILER_MAX_SECONDS ile sınırlı)
+            rate: 'requests' hedefinde örneklenen istek oranı (0-1)
+
+        Raises:
+            ValueError: Geçersiz hedef veya zaten çalışan oturum
+        """
+        if target not in PROFILER_TARGETS:
+            raise ValueError(f'Geçersiz hedef: {target}')
+
+        with self._lock:
+            if self.active:
+                raise ValueError('Profil çıkarma zaten çalışıyor')
+            duration = max(1, min(int(duration), PROFILER_MAX_SECONDS))
+            now = time.time()
+            self._stacks.clear()
+            self._tracked.clear()
+            self._stop.clear()
+            self._session = {
+                'target': target,
+                'rate': max(0.0, min(float(rate), 1.0)),
+                'duration': duration,
+                'started_at': now,
+                'deadline': now + duration,
+                'samples': 0,
+                'dropped': 0,
+                'requests': 0
+            }
+            self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Süren oturumu erken bitir"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=2)
+
+    def _targets(self, target):
+        """Örneklenecek thread'ler: {thread id: kök etiket}"""
+        if target == 'requests':
+            with self._lock:
+                return dict(self._tracked)
+        return {
+            thread.ident: thread.name
+            for thread in threading.enumerate()
+            if thread.name.startswith(INGEST_THREAD_PREFIXES)
+        }
+
+    def _run(self):
+        session = self._session
+        own_id = threading.get_ident()
+
+        while not self._stop.is_set() and time.time() < session['deadline']:
+            targets = self._targets(session['target'])
+            if targets:
+                frames = sys._current_frames()
+                stacks = [
+                    collapse_stack(frames[thread_id], root)
+                    for thread_id, root in targets.items()
+                    if thread_id != own_id and thread_id in frames
+                ]
+                with self._lock:
+                    for stack in stacks:
+                        if stack in self._stacks or len(self._stacks) < self.max_stacks:
+                            self._stacks[stack] += 1
+                        else:
+                            session['dropped'] += 1
+                    session['samples'] += len(stacks)
+            self._stop.wait(self.interval)
+
+        session['finished_at'] = time.time()
+        with self._lock:
+            self._tracked.clear()
+
+    # ---- İstek kancaları ('requests' hedefi) ----
+
+    def begin_request(self, endpoint):
+        """İstek başında çağrılır; örnekleme için seçildiyse True"""
+        session = self._session
+        if (not self.active or session['target'] != 'requests'
+                or random.random() >= session['rate']):
+            return False
+        with self._lock:
+            self._tracked[threading.get_ident()] = f'request:{endpoint or "not_found"}'
+            session['requests'] += 1
+        return True
+
+    def end_request(self):
+        with self._lock:
+            self._tracked.pop(threading.get_ident(), None)
+
+    # ---- Sonuçlar ----
+
+    def collapsed(self):
+        """Flamegraph uyumlu 'yığın adet' satırları"""
+        with self._lock:
+            stacks = sorted(self._stacks.items())
+        return ''.join(f'{stack} {count}\n' for stack, count in stacks)
+
+    def top_frames(self, limit=15):
+        """En çok örneklenen yaprak fonksiyonlar: [(çerçeve, adet, oran), ...]"""
+        leaves = Counter()
+        with self._lock:
+            for stack, count in self._stacks.items():
+                leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [(frame, count, count / total) for frame, count in leaves.most_common(limit)]
+
+    def status(self):
+        with self._lock:
+            session = dict(self._session) if self._session else None
+            distinct = len(self._stacks)
+        if session is None:
+            return {'active': False, 'session': None}
+        session['remaining'] = max(0, int(session['deadline'] - time.time())) if self.active else 0
+        return {'active': self.active, 'session': session, 'distinct_stacks': distinct}
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler():
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = SamplingProfiler()
+        return _profiler
+
+
+def install_request_sampling(app):
+    """Profil oturumu açıkken isteklerin bir kısmını örneklemeye al"""
+    from flask import g, request
+
+    @app.before_request
+    def begin_request_sampling():
+        profiler = _profiler
+        if profiler is not None and profiler.active:
+            g.profiled = profiler.begin_request(request.endpoint)
+
+    @app.teardown_request
+    def end_request_sampling(exc):
+        if g.pop('profiled', False):
+            _profiler.end_request()
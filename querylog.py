@@ -0,0 +1,247 @@
+"""
+HaberMetrik - Yavaş Sorgu Günlüğü
+
+SLOW_QUERY_MS > 0 ise database.get_connection izlenen bağlantılar döndürür:
+her execute/executemany ve ardından gelen fetch çağrıları tek ifade olarak
+ölçülür. Eşiği aşan ifadeler parametreleri ve EXPLAIN QUERY PLAN çıktısıyla
+günlüğe yazılır ve en yavaş SLOW_QUERY_TOP_N ifadelik bellek içi tabloya
+(admin paneli) eklenir.
+
+Bir ifadenin süresi, imleç yeni ifade çalıştırana, sonuçlar tükenene veya
+bağlantı kapanana kadar geçen execute + fetch süresidir; SQLite sorgunun
+çoğunu fetch sırasında yaptığından yalnızca execute'u ölçmek yanıltıcı olur.
+"""
+
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from config import SLOW_QUERY_MS, SLOW_QUERY_TOP_N
+
+# Planı sorgulanmayan ifadeler (şema/işlem komutları)
+_NO_PLAN = re.compile(r'^\s*(PRAGMA|CREATE|ALTER|DROP|BEGIN|COMMIT|ROLLBACK|VACUUM|ANALYZE)\b', re.I)
+_WHITESPACE = re.compile(r'\s+')
+
+# Günlükte gösterilen en fazla parametre karakteri
+PARAMS_PREVIEW = 200
+
+
+def _normalize(sql):
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def _preview_params(params):
+    text = repr(params)
+    return text if len(text) <= PARAMS_PREVIEW else text[:PARAMS_PREVIEW] + '...'
+
+
+class SlowQueryLog:
+    """Eşiği aşan ifadelerin sınırlı tablosu (ifade metnine göre gruplanır)"""
+
+    def __init__(self, threshold_ms=SLOW_QUERY_MS, top_n=SLOW_QUERY_TOP_N):
+        self.threshold = threshold_ms / 1000.0
+        self.top_n = top_n
+        self._entries = {}  # normalize edilmiş sql -> kayıt
+        self._lock = threading.Lock()
+        self._recorded = 0
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def record(self, conn, sql, params, seconds, caller):
+        """Eşiği aşan ifadeyi günlüğe yaz ve tabloya ekle"""
+        if seconds < self.threshold:
+            return
+
+        key = _normalize(sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            plan = entry['plan'] if entry else None
+
+        if plan is None:
+            plan = self._explain(conn, sql, params)
+            print(f"🐢 Yavaş sorgu ({seconds * 1000:.1f} ms, {caller}): {key}\n"
+                  f"   parametreler: {_preview_params(params)}\n"
+                  + ''.join(f"   {line}\n" for line in plan))
+        else:
+            print(f"🐢 Yavaş sorgu ({seconds * 1000:.1f} ms, {caller}): {key[:120]}")
+
+        with self._lock:
+            self._recorded += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {
+                    'sql': key, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'plan': plan
+                }
+            entry['count'] += 1
+            entry['total_ms'] += seconds * 1000
+            entry['last_ms'] = seconds * 1000
+            entry['max_ms'] = max(entry['max_ms'], seconds * 1000)
+            entry['caller'] = caller
+            entry['params'] = _preview_params(params)
+            entry['last_seen'] = time.time()
+
+            # Tablo sınırı: en düşük en-yüksek süreli ifade düşer
+            if len(self._entries) > self.top_n:
+                slowest = sorted(self._entries.values(), key=lambda e: e['max_ms'], reverse=True)
+                self._entries = {e['sql']: e for e in slowest[:self.top_n]}
+
+    @staticmethod
+    def _explain(conn, sql, params):
+        """İfadenin sorgu planı (satır listesi)"""
+        if _NO_PLAN.match(sql):
+            return []
+        try:
+            rows = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+        except sqlite3.Error as e:
+            return [f'(plan alınamadı: {e})']
+        # (id, parent, notused, detail) -> ağaç girintisi
+        depth = {0: 0}
+        lines = []
+        for row in rows:
+            level = depth.get(row[1], 0) + 1
+            depth[row[0]] = level
+            lines.append('  ' * (level - 1) + row[3])
+        return lines
+
+    def top(self, limit=None):
+        """En yavaş ifadeler (en yüksek süreye göre)"""
+        with self._lock:
+            entries = [dict(entry) for entry in self._entries.values()]
+        entries.sort(key=lambda e: e['max_ms'], reverse=True)
+        for entry in entries:
+            entry['avg_ms'] = round(entry['total_ms'] / entry['count'], 2)
+            entry['total_ms'] = round(entry['total_ms'], 2)
+            entry['max_ms'] = round(entry['max_ms'], 2)
+            entry['last_ms'] = round(entry['last_ms'], 2)
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'threshold_ms': self.threshold * 1000,
+                'recorded': self._recorded,
+                'statements': len(self._entries)
+            }
+
+
+class TracedCursor(sqlite3.Cursor):
+    """execute + fetch süresini ölçen imleç"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = None  # [sql, params, geçen süre, çağıran]
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            self.connection._open_cursors.discard(self)
+            _log.record(self.connection, pending[0], pending[1], pending[2], pending[3])
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._pending is not None:
+                self._pending[2] += time.perf_counter() - start
+
+    def _start(self, method, sql, params, caller):
+        self._finish()
+        self._pending = [sql, params, 0.0, caller]
+        try:
+            self._timed(method, sql, params)
+        except Exception:
+            self._pending = None
+            raise
+        # Sonucu okunmadan bırakılan imleç bağlantı kapanınca kaydedilir
+        self.connection._open_cursors.add(self)
+        return self
+
+    def _execute(self, sql, params, caller):
+        return self._start(super().execute, sql, params, caller)
+
+    def execute(self, sql, params=()):
+        return self._execute(sql, params, sys._getframe(1).f_code.co_name)
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        self._start(super().executemany, sql, seq_of_params, sys._getframe(1).f_code.co_name)
+        # Plan için ilk parametre kümesi yeterli
+        if self._pending is not None:
+            self._pending[1] = seq_of_params[0] if seq_of_params else ()
+        self._finish()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, *(() if size is None else (size,)))
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            return self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+class TracedConnection(sqlite3.Connection):
+    """İmleçleri TracedCursor olan bağlantı"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._open_cursors = set()  # Süresi henüz kaydedilmemiş ifadeleri olan imleçler
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor()._execute(sql, params, sys._getframe(1).f_code.co_name)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def close(self):
+        # Sonuçları sonuna kadar okunmamış ifadeleri de kaydet
+        for cursor in list(self._open_cursors):
+            cursor._finish()
+        super().close()
+
+
+_log = SlowQueryLog()
+
+
+def get_slow_query_log():
+    return _log
+
+
+def open_connection(path):
+    """SLOW_QUERY_MS > 0 ise izlenen, değilse düz bağlantı"""
+    if _log.enabled:
+        return sqlite3.connect(path, factory=TracedConnection)
+    return sqlite3.connect(path)
@@ -0,0 +1,219 @@
+"""
+HaberMetrik - Son Haberler Halka Tamponu
+
+En son eklenen RECENT_BUFFER_SIZE haberi, tarihleri önceden UTC epoch'a
+çevrilmiş olarak bellekte tutar. /api/live-feed ve /api/trending-topics her
+istekte SQLite'a gidip yüzlerce satırı yeniden okumak yerine buradan dilim alır.
+
+Tampon iki yoldan güncel kalır:
+    - Ingest yazıcısı aynı süreçteyse insert listener ile anında
+    - Her durumda en fazla RECENT_TAIL_SECONDS'ta bir 'id > son id' sorgusuyla
+      (gunicorn gibi yazıcının başka süreçte olduğu kurulumlar için)
+
+Takip sorgusu tampondaki satır sayısını da denetler; aradan haber silinmişse
+tampon veritabanından yeniden yüklenir. İlk kullanımda (soğuk başlangıç) veya
+tampondan büyük bir dilim istendiğinde doğrudan veritabanına gidilir.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from config import RECENT_BUFFER_SIZE, RECENT_TAIL_SECONDS
+
+# get_latest_news ile aynı alanlar
+FIELDS = ('id', 'title', 'source', 'created_at', 'link', 'pub_date', 'image_url', 'description')
+
+
+def parse_utc(value):
+    """'YYYY-MM-DD HH:MM:SS' (naive UTC) veya ISO tarihini epoch saniyeye çevir"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class RecentNewsBuffer:
+    """Son haberlerin id sıralı halka tamponu"""
+
+    def __init__(self, maxlen=RECENT_BUFFER_SIZE, tail_seconds=RECENT_TAIL_SECONDS):
+        self.maxlen = maxlen
+        self.tail_seconds = tail_seconds
+        self._rows = deque(maxlen=maxlen)  # (created_ts, event_ts, haber) - id sırasıyla
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_id = 0
+        self._synced_at = 0.0
+        self._generation = 0  # Tampon baştan yüklendikçe artar (ör. silinen haberler)
+        self._data_version = 0  # data_versions 'data' satırı (silme, hikâye/ağaç yazımları)
+        self._stats = {'reloads': 0, 'tail_queries': 0, 'pushed': 0, 'db_fallbacks': 0}
+
+    @staticmethod
+    def _row(item):
+        news = {field: item.get(field) for field in FIELDS}
+        created_ts = parse_utc(news['created_at'])
+        event_ts = parse_utc(news['pub_date']) or created_ts
+        return (created_ts, event_ts, news)
+
+    def _append(self, items):
+        """id sırasıyla yeni haberleri ekle (kilit altında)"""
+        for item in sorted(items, key=lambda i: i['id']):
+            if item['id'] <= self._last_id:
+                continue
+            self._rows.append(self._row(item))
+            self._last_id = item['id']
+
+    def _reload(self, cursor):
+        """Tamponu veritabanındaki son satırlarla doldur (kilit altında)"""
+        cursor.execute(
+            f'SELECT {", ".join(FIELDS)} FROM news ORDER BY id DESC LIMIT ?',
+            (self.maxlen,)
+        )
+        rows = [dict(row) for row in cursor.fetchall()]
+        self._rows.clear()
+        self._last_id = 0
+        self._append(rows)
+        self._loaded = True
+        self._generation += 1
+        self._stats['reloads'] += 1
+
+    def _sync(self, force=False):
+        """Soğuk başlangıçta yükle, sonra en fazla tail_seconds'ta bir takip et"""
+        now = time.time()
+        with self._lock:
+            if self._loaded and not force and now - self._synced_at < self.tail_seconds:
+                return
+
+            from database import get_connection
+            conn = get_connection()
+            cursor = conn.cursor()
+            try:
+                if not self._loaded:
+                    self._reload(cursor)
+                else:
+                    self._stats['tail_queries'] += 1
+                    cursor.execute(
+                        f'SELECT {", ".join(FIELDS)} FROM news WHERE id > ? ORDER BY id',
+                        (self._last_id,)
+                    )
+                    self._append([dict(row) for row in cursor.fetchall()])
+
+                    # Tampon aralığından silinen haber varsa baştan yükle
+                    if self._rows:
+                        cursor.execute(
+                            'SELECT COUNT(*) as count FROM news WHERE id BETWEEN ? AND ?',
+                            (self._rows[0][2]['id'], self._last_id)
+                        )
+                        if cursor.fetchone()['count'] != len(self._rows):
+                            self._reload(cursor)
+
+                # Başka süreçteki silme ve hikâye yazımları (ETag'ler için)
+                try:
+                    cursor.execute("SELECT version FROM data_versions WHERE name = 'data'")
+                    row = cursor.fetchone()
+                    self._data_version = row['version'] if row else 0
+                except sqlite3.OperationalError:
+                    pass
+            finally:
+                conn.close()
+            self._synced_at = now
+
+    def push(self, news_items):
+        """Yeni eklenen haberleri tampona ekle (database insert listener)"""
+        items = [item for item in news_items if item.get('id') is not None]
+        with self._lock:
+            if not self._loaded or not items:
+                return
+            self._append(items)
+            self._stats['pushed'] += len(items)
+
+    def latest(self, limit=20):
+        """
+        En son eklenen haberler (get_latest_news karşılığı, yeniden eskiye)
+
+        Returns:
+            [{'id', 'title', 'source', 'created_at', 'link', 'pub_date', 'image_url', 'description'}, ...]
+        """
+        if limit > self.maxlen:
+            from database import get_latest_news
+            with self._lock:
+                self._stats['db_fallbacks'] += 1
+            return get_latest_news(limit=limit)
+
+        self._sync()
+        result = []
+        with self._lock:
+            for _, _, news in reversed(self._rows):
+                if len(result) >= limit:
+                    break
+                result.append(dict(news))
+        return result
+
+    def window(self, seconds, limit=None, slack=900, now=None):
+        """
+        Tarihi (pub_date, yoksa created_at) son `seconds` içinde olan haberler
+
+        Eklenme zamanı tarih sırasında olduğundan tampon sondan taranır ve
+        created_at, pencere + slack'ten eskiye düşünce durulur; yalnızca
+        pencereye aday k satıra bakılır. slack, pub_date'in eklenmeden önceki
+        gecikme payıdır.
+
+        Returns:
+            [(yaş saniye, haber), ...] yeniden eskiye
+        """
+        self._sync()
+        now = now if now is not None else time.time()
+        stop_before = now - seconds - slack
+        result = []
+        with self._lock:
+            for created_ts, event_ts, news in reversed(self._rows):
+                if created_ts is not None and created_ts < stop_before:
+                    break
+                if event_ts is None or now - event_ts > seconds:
+                    continue
+                result.append((now - event_ts, dict(news)))
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def version(self):
+        """
+        Tamponun gördüğü veri sürümü: (son haber id'si, yeniden yükleme sayısı,
+        data_versions 'data' sürümü)
+
+        Takip aralığı içinde veritabanına gitmez; HTTP ETag'leri için kullanılır.
+        Başka süreçteki yazımlar en geç tail_seconds sonra görünür.
+        """
+        self._sync()
+        with self._lock:
+            return (self._last_id, self._generation, self._data_version)
+
+    def get_stats(self):
+        """Tampon büyüklüğü ve veritabanı erişim sayaçları"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._rows)
+            stats['last_id'] = self._last_id
+        return stats
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_recent_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = RecentNewsBuffer()
+        return _buffer
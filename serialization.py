@@ -0,0 +1,171 @@
+"""
+HaberMetrik - API Yanıt Serileştirme ve Sıkıştırma
+
+- orjson kuruluysa Flask'ın JSON sağlayıcısı orjson ile değiştirilir (çıktı
+  anahtar sırası dahil stdlib sağlayıcısıyla aynı JSON'dur, yalnızca ASCII
+  kaçışı yapılmaz)
+- Accept-Encoding'e göre eşik üstündeki yanıtlar brotli (kuruluysa) veya gzip
+  ile sıkıştırılır
+- fields= ile haber listelerinden ağır alanlar (ör. description) atılır
+
+orjson/brotli kurulu değilse stdlib json ve gzip kullanılır.
+"""
+
+import gzip
+
+from flask.json.provider import DefaultJSONProvider
+
+from config import API_JSON_BACKEND, API_COMPRESS_MIN_BYTES
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Haber listesi taşıyan anahtarlar (fields= bunların elemanlarına uygulanır)
+ARTICLE_LIST_KEYS = ('news', 'articles', 'results')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider ile aynı çıktı, orjson hızıyla"""
+
+    _options = 0
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            self._options |= orjson.OPT_SORT_KEYS
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # indent vb. özel seçenekler için stdlib
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(obj)
+        body = orjson.dumps(obj, default=self.default, option=self._options)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def install_json_provider(app):
+    """API_JSON_BACKEND 'auto' ve orjson kuruluysa hızlı sağlayıcıyı kur"""
+    if API_JSON_BACKEND == 'auto' and orjson is not None:
+        app.json = OrjsonProvider(app)
+    return type(app.json).__name__
+
+
+def _accepted_encodings(accept_encoding):
+    """Accept-Encoding başlığından q > 0 olan kodlamalar"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def compress_response(response, accept_encoding, min_bytes=API_COMPRESS_MIN_BYTES):
+    """
+    Yanıtı istemcinin kabul ettiği en iyi kodlamayla sıkıştır
+
+    Akış (SSE), 200 dışı, zaten kodlanmış veya eşikten küçük yanıtlara
+    dokunulmaz.
+    """
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and 'br' in accepted:
+        encoding = 'br'
+    elif 'gzip' in accepted:
+        encoding = 'gzip'
+    else:
+        return response
+
+    body = response.get_data()
+    if len(body) < min_bytes:
+        return response
+
+    if encoding == 'br':
+        body = brotli.compress(body, quality=5)
+    else:
+        body = gzip.compress(body, compresslevel=6)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def parse_fields(spec):
+    """
+    fields= parametresini çöz
+
+    'title,link,source' yalnızca bu alanları tutar; '-description,-image_url'
+    bu alanları atar.
+
+    Returns:
+        (tutulacaklar veya None, atılacaklar)
+    """
+    names = [name.strip() for name in (spec or '').split(',') if name.strip()]
+    keep = {name for name in names if not name.startswith('-')}
+    drop = {name[1:] for name in names if name.startswith('-')}
+    return (keep or None), drop
+
+
+def select_fields(payload, spec):
+    """
+    Yanıttaki haber listelerine fields= seçimini uygula
+
+    Yanıtın kendisi değiştirilmez (önbellekteki yanıtlar paylaşılır); haber
+    listeleri en üst düzeyde veya 'clusters' elemanlarının içinde aranır.
+    """
+    keep, drop = parse_fields(spec)
+    if keep is None and not drop:
+        return payload
+
+    def trim(item):
+        if not isinstance(item, dict):
+            return item
+        if keep is not None:
+            return {key: value for key, value in item.items() if key in keep}
+        return {key: value for key, value in item.items() if key not in drop}
+
+    def apply(container):
+        result = dict(container)
+        for key in ARTICLE_LIST_KEYS:
+            if isinstance(result.get(key), list):
+                result[key] = [trim(item) for item in result[key]]
+        return result
+
+    if not isinstance(payload, dict):
+        return payload
+
+    payload = apply(payload)
+    if isinstance(payload.get('clusters'), list):
+        payload['clusters'] = [
+            apply(cluster) if isinstance(cluster, dict) else cluster
+            for cluster in payload['clusters']
+        ]
+    return payload
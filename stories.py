@@ -0,0 +1,432 @@
+"""
+HaberMetrik - Çevrimiçi Haber Hikâyeleri
+
+Ingest sırasında her yeni haberi mevcut bir hikâyeye atar veya yeni hikâye açar.
+Atama, DBSCAN(min_samples=2) ile aynı kuraldır: kosinüs mesafesi STORY_EPS'ten
+küçük/eşit olan herhangi bir haberle bağlantılı olan haber o hikâyeye girer;
+birden fazla hikâyeye bağlanan haber bu hikâyeleri birleştirir.
+
+Aktif pencerenin TF-IDF matrisi partiler arasında saklanır; yeni haberler son
+öğrenilen IDF ile ağırlıklandırılıp bu matrise karşı puanlanır, pencere her
+partide yeniden öğrenilmez. IDF ağırlıkları pencereyle değiştiği için
+periyodik bakım IDF'yi yeniler, pencerenin en yeni haberlerini DBSCAN ile
+yeniden kümeler ve hikâyeleri birleştirir/böler. Hikâye id'leri (ilk haberin
+id'si) bakım sonrasında da korunur.
+
+Sayfalar group_by_story() ile önceden kurulmuş kümeleri okur.
+"""
+
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from scipy import sparse
+from sklearn.cluster import DBSCAN
+
+from config import (
+    STORY_EPS, STORY_WINDOW_HOURS, STORY_MAINTENANCE_INTERVAL, STORY_MAINTENANCE_LIMIT,
+    CLUSTER_LSH_MIN_ITEMS
+)
+from database import (
+    get_news_vectors, get_story_window, save_story_updates, get_story_assignments,
+    get_existing_story_ids
+)
+from lsh import lsh_radius_graph
+from recent import parse_utc
+from vectors import vectorize_titles, pack_vector, unpack_vectors, tfidf_from_counts, fit_tfidf
+
+# İlk yüklemede atanmamış haberler bu büyüklükte parçalarla işlenir
+BOOTSTRAP_CHUNK = 500
+
+
+class StoryTracker:
+    """Aktif pencere üzerinde artımlı hikâye kümeleyici"""
+
+    def __init__(self, eps=STORY_EPS, window_hours=STORY_WINDOW_HOURS):
+        self.eps = eps
+        self.window_seconds = window_hours * 3600
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_maintenance = time.time()
+
+        # Aktif pencere (ekleme sırasıyla, satırlar _counts ile paralel)
+        self._ids = []
+        self._added_at = []  # Haberin eklenme zamanı (epoch; pencereden düşme için)
+        self._counts = None
+        self._idf = None     # Son öğrenilen IDF (fit_tfidf)
+        self._matrix = None  # _counts'un _idf ile TF-IDF'i (satırlar paralel)
+        self._titles = {}
+        self._story_of = {}
+        self._members = defaultdict(set)
+
+    def add_news(self, news_items):
+        """Yeni eklenen haberleri hikâyelere ata (database insert listener)"""
+        items = [item for item in news_items if item.get('id') is not None]
+        if not items:
+            return
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            items = [item for item in items if item['id'] not in self._story_of]
+            if not items:
+                return
+
+            self._assign(
+                [item['id'] for item in items],
+                [item['title'] for item in items],
+                self._load_counts(items),
+                time.time()
+            )
+
+            if time.time() - self._last_maintenance >= STORY_MAINTENANCE_INTERVAL:
+                self._maintain()
+
+    def _load_counts(self, items):
+        """Haberlerin saklanan ham sayı vektörlerini yükle (yoksa hesapla)"""
+        stored = get_news_vectors([item['id'] for item in items])
+        blobs = [stored.get(item['id']) for item in items]
+
+        missing = [i for i, blob in enumerate(blobs) if blob is None]
+        if missing:
+            fresh = vectorize_titles([items[i]['title'] for i in missing])
+            for row, i in enumerate(missing):
+                blobs[i] = pack_vector(fresh, row)
+
+        return unpack_vectors(blobs)
+
+    def _load(self):
+        """Aktif pencereyi veritabanından yükle, atanmamış haberleri işle"""
+        rows = get_story_window(hours=self.window_seconds / 3600)
+        now = time.time()
+
+        # Yüklenen haberler kendi eklenme zamanlarıyla pencereden düşer
+        for row in rows:
+            row['added_at'] = parse_utc(row['created_at']) or now
+
+        assigned = [row for row in rows if row['story_id'] is not None]
+        pending = [row for row in rows if row['story_id'] is None]
+
+        if assigned:
+            self._append(
+                [row['id'] for row in assigned],
+                [row['title'] for row in assigned],
+                self._load_counts(assigned),
+                [row['added_at'] for row in assigned]
+            )
+            for row in assigned:
+                self._set_story(row['id'], row['story_id'])
+            self._refit()
+
+        # İlk yükleme bir kez yapılır: IDF her parçadan sonra yenilenir
+        for start in range(0, len(pending), BOOTSTRAP_CHUNK):
+            chunk = pending[start:start + BOOTSTRAP_CHUNK]
+            self._assign(
+                [row['id'] for row in chunk],
+                [row['title'] for row in chunk],
+                self._load_counts(chunk),
+                now,
+                added_at=[row['added_at'] for row in chunk]
+            )
+            self._refit()
+
+        # Başlık ve anahtar kelimeleri güncel pencereyle yenile
+        if self._members:
+            self._persist(set(self._members), [])
+
+        self._loaded = True
+        print(f"📚 Hikâye takibi: {len(self._ids)} haber, {len(self._members)} hikâye yüklendi")
+
+    def _append(self, ids, titles, counts, added_at, matrix=None):
+        """
+        Haberleri aktif pencereye ekle
+
+        Args:
+            added_at: Haber başına eklenme zamanı (epoch)
+            matrix: Satırların _idf ile TF-IDF'i (yoksa pencere matrisi _refit'e kadar geçersiz)
+        """
+        self._ids.extend(ids)
+        self._added_at.extend(added_at)
+        self._titles.update(zip(ids, titles))
+        if self._counts is None:
+            self._counts = counts
+            self._matrix = matrix
+        else:
+            self._counts = sparse.vstack([self._counts, counts], format='csr')
+            if matrix is None or self._matrix is None:
+                self._matrix = None
+            else:
+                self._matrix = sparse.vstack([self._matrix, matrix], format='csr')
+
+    def _refit(self):
+        """IDF'yi aktif pencereden yeniden öğren ve pencere matrisini yeniden ağırlıklandır"""
+        if self._counts is None or self._counts.shape[0] == 0:
+            return
+        self._idf = fit_tfidf(self._counts)
+        self._matrix = self._idf.transform(self._counts)
+
+    def _set_story(self, news_id, story_id):
+        """Haberin hikâyesini bellekte güncelle"""
+        old = self._story_of.get(news_id)
+        if old is not None:
+            self._members[old].discard(news_id)
+            if not self._members[old]:
+                del self._members[old]
+        self._story_of[news_id] = story_id
+        self._members[story_id].add(news_id)
+
+    def _evict(self, now):
+        """
+        Pencere dışına çıkan haberleri bellekten at
+
+        Haberler id (eklenme) sırasıyla tutulduğundan eklenme zamanları
+        neredeyse artan sıradadır; baştan ilk pencere içi habere kadar atılır.
+        """
+        cutoff = now - self.window_seconds
+        keep_from = 0
+        while keep_from < len(self._added_at) and self._added_at[keep_from] < cutoff:
+            keep_from += 1
+        if keep_from == 0:
+            return
+
+        for news_id in self._ids[:keep_from]:
+            story_id = self._story_of.pop(news_id)
+            self._members[story_id].discard(news_id)
+            if not self._members[story_id]:
+                del self._members[story_id]
+            self._titles.pop(news_id, None)
+
+        self._ids = self._ids[keep_from:]
+        self._added_at = self._added_at[keep_from:]
+        self._counts = self._counts[keep_from:]
+        if self._matrix is not None:
+            self._matrix = self._matrix[keep_from:]
+
+    def _assign(self, ids, titles, counts, now, added_at=None):
+        """
+        Yeni haberleri en yakın hikâyeye ata (kilit altında)
+
+        Parti son öğrenilen IDF ile ağırlıklandırılır ve saklanan pencere
+        matrisine karşı puanlanır; pencere yeniden öğrenilmez.
+
+        Args:
+            now: Pencerenin sonu (epoch)
+            added_at: Haber başına eklenme zamanları (yoksa hepsi now)
+        """
+        self._evict(now)
+
+        if self._idf is None or self._matrix is None:
+            # Henüz IDF yok (boş pencere) veya pencere matrisi geçersiz
+            self._refit()
+        if self._idf is None:
+            self._idf = fit_tfidf(counts)
+
+        threshold = 1.0 - self.eps
+        n_active = len(self._ids)
+
+        batch = self._idf.transform(counts)
+        sims_active = (batch @ self._matrix.T).tocsr() if n_active else None
+        sims_batch = (batch @ batch.T).tocsr()
+
+        self._append(ids, titles, counts, added_at or [now] * len(ids), batch)
+
+        touched = set()
+        merges = []
+        for j, news_id in enumerate(ids):
+            linked = set()
+
+            if sims_active is not None:
+                start, end = sims_active.indptr[j], sims_active.indptr[j + 1]
+                for col, sim in zip(sims_active.indices[start:end], sims_active.data[start:end]):
+                    if sim >= threshold:
+                        linked.add(self._story_of[self._ids[col]])
+
+            start, end = sims_batch.indptr[j], sims_batch.indptr[j + 1]
+            for col, sim in zip(sims_batch.indices[start:end], sims_batch.data[start:end]):
+                if col < j and sim >= threshold:
+                    linked.add(self._story_of[ids[col]])
+
+            if not linked:
+                story_id = news_id
+            else:
+                # Birden fazla hikâyeye bağlanan haber onları birleştirir (en eski id kalır)
+                story_id = min(linked)
+                for other in linked - {story_id}:
+                    for member in list(self._members[other]):
+                        self._set_story(member, story_id)
+                    merges.append((other, story_id))
+                    touched.discard(other)
+
+            self._set_story(news_id, story_id)
+            touched.add(story_id)
+
+        self._persist(touched, ids, merges)
+
+    def _maintain(self):
+        """
+        IDF'yi yenile, pencerenin en yeni haberlerini yeniden kümele,
+        hikâyeleri birleştir/böl
+        """
+        self._last_maintenance = time.time()
+        if not self._ids:
+            return
+
+        self._refit()
+        offset = max(0, len(self._ids) - STORY_MAINTENANCE_LIMIT)
+        ids = self._ids[offset:]
+        matrix = self._matrix if offset == 0 else tfidf_from_counts(self._counts[offset:])
+
+        if len(ids) >= CLUSTER_LSH_MIN_ITEMS:
+            labels = DBSCAN(
+                eps=self.eps, min_samples=2, metric='precomputed'
+            ).fit_predict(lsh_radius_graph(matrix, self.eps))
+        else:
+            labels = DBSCAN(
+                eps=self.eps, min_samples=2, metric='cosine', algorithm='brute'
+            ).fit_predict(matrix)
+
+        components = defaultdict(list)
+        for idx, label in enumerate(labels):
+            components[label if label != -1 else f"single_{idx}"].append(ids[idx])
+
+        # Büyük bileşenler önce: her bileşen üyelerinin çoğunluk hikâyesini devralır
+        ordered = sorted(components.values(), key=len, reverse=True)
+        claimed = set()
+        targets = []
+        for members in ordered:
+            votes = Counter(self._story_of[m] for m in members)
+            candidates = [s for s, _ in sorted(votes.items(), key=lambda x: (-x[1], x[0])) if s not in claimed]
+            target = candidates[0] if candidates else None
+            if target is not None:
+                claimed.add(target)
+            targets.append(target)
+
+        # Hikâyesi kalmayan bileşenler (bölünen parçalar) kullanılmayan bir üye
+        # id'si alır; bellekte veya veritabanında yaşayan bir hikâyenin id'si
+        # parçayı sessizce o hikâyeye katardı. Uygun id yoksa bölünmez.
+        split = [i for i, target in enumerate(targets) if target is None]
+        if split:
+            candidates = {m for i in split for m in ordered[i]} - claimed - set(self._members)
+            candidates -= get_existing_story_ids(candidates)
+            for i in split:
+                free = [m for m in ordered[i] if m in candidates and m not in claimed]
+                if free:
+                    targets[i] = min(free)
+                    claimed.add(targets[i])
+
+        changed = []
+        touched = set()
+        for members, target in zip(ordered, targets):
+            if target is None:
+                continue
+            for news_id in members:
+                old = self._story_of[news_id]
+                if old != target:
+                    touched.update((old, target))
+                    self._set_story(news_id, target)
+                    changed.append(news_id)
+
+        if changed:
+            self._persist(touched, changed)
+            print(f"🧹 Hikâye bakımı: {len(changed)} haber yeniden atandı")
+
+    def _persist(self, touched, news_ids, merges=()):
+        """
+        Değişen hikâyeleri ve üyelikleri kaydet
+
+        Anahtar kelimeler saklanan pencere matrisinden hesaplanır.
+        """
+        from clustering import cluster_keywords, keyword_title
+
+        active = [story_id for story_id in touched if self._members.get(story_id)]
+        if self._matrix is None:
+            self._refit()
+        matrix = self._matrix
+
+        # Değişen hikâyelerin anahtar kelimeleri tek merkez hesabıyla
+        order = {story_id: i for i, story_id in enumerate(active)}
+        groups = [order.get(self._story_of[news_id], -1) for news_id in self._ids]
+        keywords = cluster_keywords(matrix, groups)
+
+        seen_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        stories = []
+        for story_id in active:
+            top_terms = keywords.get(order[story_id], [])
+            first_member = min(self._members[story_id])
+            stories.append({
+                'id': story_id,
+                'title': keyword_title(top_terms, [{'title': self._titles[first_member]}]),
+                'keywords': top_terms,
+                'seen_at': seen_at
+            })
+
+        save_story_updates(
+            stories,
+            [(news_id, self._story_of[news_id]) for news_id in news_ids],
+            merges,
+            recount_ids=touched
+        )
+
+
+def group_by_story(news_items, min_coverage=0.9):
+    """
+    Haberleri kayıtlı hikâyelerine göre grupla
+
+    cluster_news ile aynı yapıyı döndürür. Haberlerin en az min_coverage kadarı
+    bir hikâyeye atanmamışsa (takipçi çalışmıyor/geride) None döner ve çağıran
+    taraf cluster_news'e düşmelidir.
+    """
+    if not news_items:
+        return {}
+
+    ids = [item['id'] for item in news_items if item.get('id') is not None]
+    assignments = get_story_assignments(ids)
+    if len(assignments) < min_coverage * len(news_items):
+        return None
+
+    clusters = {}
+    for idx, item in enumerate(news_items):
+        assignment = assignments.get(item.get('id'))
+        if assignment:
+            story_id = assignment['story_id']
+            cluster_id = str(story_id)
+            title = assignment['title']
+            keywords = assignment['keywords']
+        else:
+            story_id = None
+            cluster_id = f"single_{item['id']}" if item.get('id') is not None else f"single_i{idx}"
+            title = None
+            keywords = []
+
+        if cluster_id not in clusters:
+            clusters[cluster_id] = {
+                'id': cluster_id,
+                'story_id': story_id,
+                'title': title,
+                'keywords': [term for term, _ in keywords],
+                'keyword_weights': [{'term': term, 'weight': weight} for term, weight in keywords],
+                'news': []
+            }
+        clusters[cluster_id]['news'].append(item)
+
+    for cluster in clusters.values():
+        items = cluster['news']
+        cluster['count'] = len(items)
+        cluster['news'] = sorted(items, key=lambda x: x.get('pub_date') or '', reverse=True)
+        if not cluster['title']:
+            cluster['title'] = items[0]['title'][:50] + '...'
+
+    return dict(sorted(clusters.items(), key=lambda x: x[1]['count'], reverse=True))
+
+
+# Global singleton
+_tracker = None
+
+
+def get_tracker():
+    global _tracker
+    if _tracker is None:
+        _tracker = StoryTracker()
+    return _tracker
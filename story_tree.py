@@ -0,0 +1,185 @@
+"""
+HaberMetrik - Çok Pencereli Hikâye Ağacı
+
+Çevrimiçi hikâyeleri (stories.py) 1s, 6s, 24s ve 7g pencereleri için
+hiyerarşik olarak gruplar. Her hikâye, üyelerinin ham terim sayılarının
+toplamı olan tek bir belge gibi TF-IDF'lenir; üst seviyeler bu hikâye
+vektörlerini daha gevşek eps ile tek bağlantılı (single-link) bileşenlere
+birleştirir.
+
+Tüm seviyeler aynı komşu grafiğini kullandığı ve eps yukarı doğru
+büyüdüğü için her düğüm bir üst seviyede tam olarak bir düğümün içindedir.
+Düğüm id'si içindeki en eski hikâyenin id'sidir, böylece ağaç yeniden
+kurulduğunda da aynı kalır.
+
+Ağaç arka planda STORY_TREE_INTERVAL'da bir kurulur; API yalnızca
+kaydedilmiş tabloyu okur.
+"""
+
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from config import STORY_TREE_LEVELS, CLUSTER_LSH_MIN_ITEMS
+from database import get_story_members_since, get_news_vectors, save_story_tree
+from lsh import lsh_radius_graph
+from vectors import vectorize_titles, pack_vector, unpack_vectors, tfidf_from_counts
+
+LEVEL_HOURS = {level: hours for level, hours, _ in STORY_TREE_LEVELS}
+
+
+def _story_matrix(rows, story_ids):
+    """Her hikâyenin TF-IDF vektörü (üyelerinin terim sayılarının toplamı)"""
+    stored = get_news_vectors([row['id'] for row in rows])
+    blobs = [stored.get(row['id']) for row in rows]
+
+    missing = [i for i, blob in enumerate(blobs) if blob is None]
+    if missing:
+        fresh = vectorize_titles([rows[i]['title'] for i in missing])
+        for row, i in enumerate(missing):
+            blobs[i] = pack_vector(fresh, row)
+
+    index = {story_id: i for i, story_id in enumerate(story_ids)}
+    membership = sparse.csr_matrix(
+        (np.ones(len(rows)), ([index[row['story_id']] for row in rows], np.arange(len(rows)))),
+        shape=(len(story_ids), len(rows))
+    )
+    return tfidf_from_counts(membership @ unpack_vectors(blobs))
+
+
+def _neighbor_graph(matrix, eps):
+    """Hikâye vektörleri arasında kosinüs mesafesi eps'ten küçük/eşit çiftler"""
+    from clustering import radius_graph
+
+    if matrix.shape[0] >= CLUSTER_LSH_MIN_ITEMS:
+        return lsh_radius_graph(matrix, eps)
+    return radius_graph(matrix, eps)
+
+
+def build_story_tree():
+    """
+    Ağacı yeniden kur ve kaydet
+
+    Returns:
+        {seviye: düğüm sayısı}
+    """
+    from clustering import cluster_keywords, keyword_title
+
+    start = time.perf_counter()
+    max_hours = max(hours for _, hours, _ in STORY_TREE_LEVELS)
+    rows = get_story_members_since(max_hours)
+
+    now = datetime.utcnow()
+    built_at = now.strftime('%Y-%m-%d %H:%M:%S')
+    if not rows:
+        save_story_tree([], [])
+        return {level: 0 for level, _, _ in STORY_TREE_LEVELS}
+
+    story_ids = sorted({row['story_id'] for row in rows})
+    index = {story_id: i for i, story_id in enumerate(story_ids)}
+    matrix = _story_matrix(rows, story_ids)
+
+    max_eps = max(eps for _, _, eps in STORY_TREE_LEVELS if eps is not None)
+    graph = _neighbor_graph(matrix, max_eps).tocoo()
+
+    story_of_row = np.array([index[row['story_id']] for row in rows])
+    created_at = np.array([str(row['created_at']) for row in rows])
+    titles = {}
+    for row in rows:
+        titles.setdefault(row['story_id'], row['story_title'] or row['title'])
+
+    nodes = []
+    members = []
+    node_of = {}   # seviye -> hikâye sırası -> düğüm id
+    counts = {}
+    for level, hours, eps in STORY_TREE_LEVELS:
+        cutoff = (now - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+        in_window = created_at >= cutoff
+        member_count = np.bincount(story_of_row[in_window], minlength=len(story_ids))
+        active = np.flatnonzero(member_count > 0)
+
+        # Bu penceredeki hikâyelerin bileşenleri (eps None: her hikâye kendi düğümü)
+        labels = np.full(len(story_ids), -1)
+        if eps is None:
+            labels[active] = np.arange(len(active))
+        else:
+            is_active = member_count > 0
+            keep = (graph.data <= eps) & is_active[graph.row] & is_active[graph.col]
+            adjacency = sparse.csr_matrix(
+                (np.ones(keep.sum()), (graph.row[keep], graph.col[keep])),
+                shape=(len(story_ids), len(story_ids))
+            )
+            _, components = connected_components(adjacency, directed=False)
+            labels[active] = components[active]
+
+        groups = defaultdict(list)
+        for i in active:
+            groups[labels[i]].append(i)
+
+        # Hikâye başına penceredeki ilk/son haber zamanı
+        first_seen, last_seen = {}, {}
+        for i, ts in zip(story_of_row[in_window].tolist(), created_at[in_window].tolist()):
+            if i not in first_seen or ts < first_seen[i]:
+                first_seen[i] = ts
+            if i not in last_seen or ts > last_seen[i]:
+                last_seen[i] = ts
+
+        # Düğüm id'si = en eski hikâye id'si
+        keyword_labels = np.full(len(story_ids), -1)
+        ordered = list(groups.values())
+        for k, group in enumerate(ordered):
+            keyword_labels[group] = k
+        keywords = cluster_keywords(matrix, keyword_labels)
+
+        node_of[level] = {}
+        for k, group in enumerate(ordered):
+            node_id = story_ids[min(group)]
+            largest = max(group, key=lambda i: member_count[i])
+            top_terms = keywords.get(k, [])
+
+            for i in group:
+                node_of[level][i] = node_id
+                members.append((level, node_id, story_ids[i]))
+
+            nodes.append({
+                'level': level,
+                'node_id': node_id,
+                'parent_id': None,
+                'title': keyword_title(top_terms, [{'title': titles[story_ids[largest]]}]),
+                'keywords': top_terms,
+                'story_count': len(group),
+                'member_count': int(member_count[group].sum()),
+                'first_seen': min(first_seen[i] for i in group),
+                'last_seen': max(last_seen[i] for i in group),
+                'built_at': built_at
+            })
+        counts[level] = len(ordered)
+
+    # Üst düğüm: bir sonraki (daha geniş) seviyede hikâyelerinin bulunduğu düğüm
+    levels = [level for level, _, _ in STORY_TREE_LEVELS]
+    parent_level = dict(zip(levels, levels[1:]))
+    first_story = {}
+    for level, node_id, story_id in members:
+        first_story.setdefault((level, node_id), index[story_id])
+    for node in nodes:
+        upper = parent_level.get(node['level'])
+        if upper is not None:
+            node['parent_id'] = node_of[upper].get(first_story[(node['level'], node['node_id'])])
+
+    save_story_tree(nodes, members)
+    print(f"🌳 Hikâye ağacı: {counts} ({time.perf_counter() - start:.2f} sn)")
+    return counts
+
+
+def run_story_tree_loop(stop_event, interval):
+    """Ağacı stop_event set edilene kadar periyodik olarak yeniden kur"""
+    while not stop_event.is_set():
+        try:
+            build_story_tree()
+        except Exception as e:
+            print(f"Hikâye ağacı hatası: {e}")
+        stop_event.wait(interval)
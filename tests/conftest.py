@@ -0,0 +1,19 @@
+"""
+HaberMetrik - Ortak test donanımları
+
+Testler yapılandırılmış veritabanına dokunmaz; her test geçici bir dosyada
+şeması kurulmuş boş bir veritabanı alır.
+"""
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Geçici SQLite veritabanı (database.DATABASE_PATH yerine); dosya yolunu döndürür"""
+    path = str(tmp_path / 'habermetre.db')
+    monkeypatch.setattr(database, 'DATABASE_PATH', path)
+    database.init_db()
+    return path
@@ -0,0 +1,73 @@
+"""
+Paylaşılan yanıt önbelleğinin testleri
+
+Paylaşılan depo için redis-py yerine geçen yerel bir istemci kullanılır
+(gerçek Redis: RESPONSE_CACHE_BACKEND=redis).
+"""
+
+import threading
+import time
+
+import pytest
+
+from cache import MemoryBackend, RedisBackend, ResponseCache
+
+
+class LocalRedis:
+    """Önbelleğin kullandığı redis-py alt kümesi, süreç içinde"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value, expires_at = self._data.get(key, (None, 0))
+            return value if expires_at > time.time() else None
+
+    def set(self, key, value, nx=False, px=None):
+        with self._lock:
+            if nx and self._data.get(key, (None, 0))[1] > time.time():
+                return None
+            self._data[key] = (value, time.time() + px / 1000)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def scan_iter(self, pattern):
+        with self._lock:
+            return [k for k in self._data if k.startswith(pattern.rstrip('*'))]
+
+
+@pytest.mark.parametrize('make_backend', [MemoryBackend, lambda: RedisBackend(LocalRedis())],
+                         ids=['memory', 'shared'])
+def test_burst_computes_once_and_stale_refreshes_in_background(make_backend):
+    backend = make_backend()
+    calls = []
+
+    def slow_compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'n': len(calls)}
+
+    # İki "worker" aynı depoyu paylaşır
+    workers = [ResponseCache(backend, ttl=0.5, stale=5), ResponseCache(backend, ttl=0.5, stale=5)]
+    results = []
+    threads = [
+        threading.Thread(target=lambda c=workers[i % 2]: results.append(c.get_or_compute('k', slow_compute)))
+        for i in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and all(r == {'n': 1} for r in results), (len(calls), results)
+
+    time.sleep(0.6)  # bayat
+    start = time.perf_counter()
+    value = workers[0].get_or_compute('k', slow_compute)
+    assert value == {'n': 1} and time.perf_counter() - start < 0.1, "bayat kayıt beklemeden dönmeli"
+    time.sleep(0.4)
+    assert workers[1].get_or_compute('k', slow_compute) == {'n': 2} and len(calls) == 2
@@ -0,0 +1,108 @@
+"""
+Kümelemenin eşzamanlılık testleri
+
+Sabit tohumlu deneme derlemi geçici veritabanına yüklenir. Kümeleme ve komşu
+grafiği önbellekleri atlanır; her çağrı gerçekten hesaplanır ve eşzamanlı
+sonuçlar sıralı sonuçla aynı olmalıdır.
+"""
+
+import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import pytest
+
+import clustering
+import database
+
+WORKERS = 32
+QUERY = 'son dakika & gündem'
+
+# Hikâye başlığı + ayrıntı kelimesi; tekil haberler ortak gürültüden
+STORIES = [
+    ('merkez bankası faiz kararı', 'politika faizi yüzde sabit tuttu'),
+    ('istanbul trafik yoğunluğu', 'köprü ve tünellerde uzun kuyruklar'),
+    ('süper lig derbi maçı', 'galibiyet golü son dakikada geldi'),
+    ('akaryakıt zam geldi', 'benzin ve motorin pompa fiyatları'),
+    ('meteoroloji kuvvetli yağış uyarısı', 'sağanak ve fırtına bekleniyor'),
+    ('üniversite sınavı sonuçları', 'adaylar tercih dönemine hazırlanıyor'),
+    ('asgari ücret görüşmeleri', 'komisyon yeni rakamı açıkladı'),
+    ('orman yangını kontrol altında', 'ekipler havadan ve karadan müdahale etti'),
+]
+NOISE = ['açıklama', 'yapıldı', 'gelişme', 'bugün', 'kritik', 'yeni', 'detaylar', 'ortaya']
+
+
+def make_corpus(query, per_story=12, singles=20, seed=0):
+    """Sorguyu açıklamasında içeren deneme haberleri"""
+    rng = random.Random(seed)
+    items = []
+    for story, (headline, detail) in enumerate(STORIES):
+        words = detail.split()
+        for i in range(per_story):
+            items.append((f'{headline} {rng.choice(words)}', f'stres-{story}-{i}'))
+    for i in range(singles):
+        items.append((' '.join(rng.sample(NOISE, 4)) + f' tekil{i}', f'stres-tekil-{i}'))
+
+    return [
+        {
+            'title': title,
+            'link': f'https://example.com/{slug}',
+            'description': f'{query} - {title}',
+            'source': 'stres',
+            'pub_date': f'2024-01-01 {i // 60 % 24:02d}:{i % 60:02d}:00'
+        }
+        for i, (title, slug) in enumerate(items)
+    ]
+
+
+@pytest.fixture
+def computed(monkeypatch):
+    """Kümeleme ve komşu grafiği önbelleklerini atla; hesaplama sayılarını döndür"""
+    counts = Counter()
+
+    def bypass(name):
+        def get_or_compute(key, compute):
+            counts[name] += 1
+            return compute()
+        return get_or_compute
+
+    monkeypatch.setattr(clustering._cluster_cache, 'get_or_compute', bypass('clusters'))
+    monkeypatch.setattr(clustering._graph_cache, 'get_or_compute', bypass('graphs'))
+    return counts
+
+
+@pytest.fixture
+def corpus_db(temp_db):
+    database.insert_many_news(make_corpus(QUERY))
+    return temp_db
+
+
+def test_concurrent_search_grouped_matches_sequential(corpus_db, computed):
+    from app import app
+
+    client = app.test_client()
+    url = '/api/search-grouped?' + urlencode({'q': QUERY, 'eps': 0.35, 'min_samples': 2})
+    expected = client.get(url).get_json()
+    assert 'error' not in expected
+    assert expected['total'] > 0 and expected['cluster_count'] > 0
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        responses = list(pool.map(lambda _: client.get(url).get_json(), range(WORKERS)))
+
+    assert computed['clusters'] == WORKERS + 1
+    assert all(response == expected for response in responses)
+
+
+def test_concurrent_clustering_matches_sequential(corpus_db, computed):
+    clusterer = clustering.get_clusterer()
+    items = database.search_news(QUERY, 200)
+    expected = clusterer._cluster_news(items, 0.35, 2, 'brute')
+    assert expected
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(
+            lambda _: clusterer._cluster_news_limited(items, 0.35, 2, 'brute'), range(WORKERS)
+        ))
+
+    assert all(result == expected for result in results)
@@ -0,0 +1,76 @@
+"""
+Panel paketinin canlı bölümü
+
+Paket paylaşılan yanıt önbelleğinden gelir; live bölümü ise her istekte son
+haberler tamponundan kurulur ve önbellekteki gövdeyle bayatlamaz.
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+
+import cache
+import database
+import live
+import recent
+
+TAIL_SECONDS = 0.05
+
+
+def insert_news(titles):
+    now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    database.insert_many_news([
+        {'title': title, 'link': f'https://example.com/{title}', 'description': '',
+         'source': 'test', 'pub_date': now}
+        for title in titles
+    ])
+
+
+@pytest.fixture
+def client(temp_db, monkeypatch):
+    from app import app
+
+    monkeypatch.setattr(recent, '_buffer', recent.RecentNewsBuffer(tail_seconds=TAIL_SECONDS))
+    monkeypatch.setattr(live, '_hub', None)
+    monkeypatch.setattr(cache, '_response_cache', cache.ResponseCache(cache.MemoryBackend(), ttl=300))
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 1
+    return client
+
+
+def live_titles(body):
+    return [news['title'] for news in body['live']['news']]
+
+
+def test_live_section_is_not_cached(client):
+    insert_news(['ilk haber'])
+    url = '/api/dashboard-bundle?fields=stats,live'
+    first = client.get(url)
+    assert first.headers.get('ETag') is None
+    assert live_titles(first.get_json()) == ['ilk haber']
+
+    insert_news(['ikinci haber'])
+    time.sleep(TAIL_SECONDS)
+    second = client.get(url).get_json()
+
+    # stats önbellekten (değişmedi), live tampondan (yeni haber var)
+    assert second['stats'] == first.get_json()['stats']
+    assert live_titles(second) == ['ikinci haber', 'ilk haber']
+
+
+def test_live_only_bundle(client):
+    insert_news(['tek haber'])
+    body = client.get('/api/dashboard-bundle?fields=live&article_fields=title').get_json()
+    assert list(body) == ['live']
+    assert body['live']['news'] == [{'title': 'tek haber'}]
+
+
+def test_bundle_without_live_keeps_etag(client):
+    insert_news(['ilk haber'])
+    response = client.get('/api/dashboard-bundle?fields=stats')
+    assert 'live' not in response.get_json()
+    etag = response.headers['ETag']
+    assert client.get('/api/dashboard-bundle?fields=stats', headers={'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,61 @@
+"""
+API ETag'lerinin zaman penceresi
+
+Zamana göre değişen uçlar genel 300 saniyelik kovayla bayat 304 almamalı.
+"""
+
+import pytest
+
+import api.routes as routes
+
+
+@pytest.fixture
+def client(temp_db):
+    from app import app
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 1
+    return client
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """routes.time.time'ı elle ilerletilen saatle değiştir"""
+    now = [1_000_020.0]
+
+    class FakeTime:
+        @staticmethod
+        def time():
+            return now[0]
+
+    monkeypatch.setattr(routes, 'time', FakeTime)
+    return now
+
+
+def test_live_feed_is_not_etagged(client):
+    response = client.get('/api/live-feed')
+    assert response.status_code == 200
+    assert response.headers.get('ETag') is None
+
+    # Eski bir ETag ile bile gövde yeniden hesaplanır
+    response = client.get('/api/live-feed', headers={'If-None-Match': 'W/"x"'})
+    assert response.status_code == 200
+
+
+def test_flow_rate_etag_uses_short_window(client, clock):
+    etag = client.get('/api/news-flow-rate').headers['ETag']
+    assert client.get('/api/news-flow-rate', headers={'If-None-Match': etag}).status_code == 304
+
+    clock[0] += routes.API_ETAG_SHORT_WINDOW_SECONDS
+    assert client.get('/api/news-flow-rate', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_other_endpoints_keep_default_window(client, clock):
+    etag = client.get('/api/time-series').headers['ETag']
+
+    clock[0] += routes.API_ETAG_SHORT_WINDOW_SECONDS
+    assert client.get('/api/time-series', headers={'If-None-Match': etag}).status_code == 304
+
+    clock[0] += routes.API_ETAG_WINDOW_SECONDS
+    assert client.get('/api/time-series', headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,79 @@
+"""
+Arka plan kümeleme işlerinin testleri
+
+Havuzdaki çocuk süreç fork edilmediği için yapılandırılmış göreli
+veritabanı yolunu (DATABASE_PATH) kendi çalışma dizininde açar; testler
+geçici dizine geçip veritabanını orada kurar.
+"""
+
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import jobs
+
+NEWS = [
+    {'title': title, 'source': 'test', 'link': f'https://example.com/{i}'}
+    for i, title in enumerate([
+        'merkez bankası faiz kararı açıklandı',
+        'merkez bankası faiz kararı bekleniyor',
+        'merkez bankası faiz kararını açıkladı',
+        'süper lig derbi maçı berabere bitti',
+        'süper lig derbi maçı golsüz bitti',
+        'orman yangını kontrol altına alındı',
+    ])
+]
+
+
+class BrokenExecutor:
+    """Çocuğu çökmüş havuz gibi davranır"""
+
+    def __init__(self, *args, **kwargs):
+        self.shutdowns = 0
+
+    def submit(self, *args):
+        raise BrokenProcessPool('çocuk süreç çöktü')
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns += 1
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool(temp_db, tmp_path, monkeypatch):
+    """Her test kendi havuzunu geçici dizinde kurar ve sonunda kapatır"""
+    from clustering import _cluster_cache
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(jobs, '_executor', None)
+    monkeypatch.setattr(_cluster_cache, 'get', lambda key: None)
+    yield
+    if jobs._executor is not None and not isinstance(jobs._executor, BrokenExecutor):
+        jobs._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def test_executor_does_not_fork():
+    with jobs._lock:
+        executor = jobs._get_executor()
+    assert executor._mp_context.get_start_method() in ('forkserver', 'spawn')
+
+
+def test_broken_pool_is_replaced(monkeypatch):
+    broken = BrokenExecutor()
+    monkeypatch.setattr(jobs, '_executor', broken)
+
+    job_id, payload = jobs.submit_cluster_job(NEWS, 0.5, 2, lambda clusters: clusters)
+    assert payload is None and broken.shutdowns == 1
+    assert jobs._executor is not broken
+
+    job = jobs.wait_for_job(job_id, timeout=60)
+    assert job['status'] == 'done'
+    assert sum(cluster['count'] for cluster in job['result'].values()) == len(NEWS)
+    assert max(cluster['count'] for cluster in job['result'].values()) > 1
+
+
+def test_run_cluster_job_falls_back_when_pool_unusable(monkeypatch):
+    # Yeniden kurulan havuz da çökük: iş süreç içinde kümelenmeli
+    monkeypatch.setattr(jobs, 'ProcessPoolExecutor', BrokenExecutor)
+
+    clusters = jobs.run_cluster_job(NEWS, 0.5, 2)
+    assert sum(cluster['count'] for cluster in clusters.values()) == len(NEWS)
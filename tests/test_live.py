@@ -0,0 +1,74 @@
+"""
+Canlı akış dağıtıcısının testleri
+
+Veritabanı yerine bellekte bir haber listesi kullanılır; listener ile
+gelmeyen haberler (başka süreçte eklenenler) takip sorgusuyla gelmelidir.
+"""
+
+import threading
+import time
+
+import pytest
+
+import database
+from live import LiveFeedHub
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = LiveFeedHub(maxlen=4, tail_seconds=0.05)
+    hub._floor = hub._last_id = hub._tailed_id = 100
+    hub._tailed_at = time.time()
+    hub.committed = []
+
+    def fake_news_after_id(after_id, limit=500):
+        return sorted((row for row in hub.committed if row['id'] > after_id), key=lambda r: r['id'])[:limit]
+
+    monkeypatch.setattr(database, 'get_news_after_id', fake_news_after_id)
+    return hub
+
+
+def insert(hub, *ids, listener=True):
+    rows = [{'id': news_id, 'title': f'haber {news_id}'} for news_id in ids]
+    hub.committed.extend(rows)
+    if listener:
+        hub.publish(rows)
+
+
+def test_subscriber_receives_each_news_once(hub):
+    received = []
+
+    def subscriber():
+        seq = 0
+        while len(received) < 6:
+            events, seq = hub.wait_for_events(seq, timeout=2)
+            if not events:
+                break
+            received.extend(e['id'] for e in events)
+
+    thread = threading.Thread(target=subscriber)
+    thread.start()
+    insert(hub, 101, 103)
+    time.sleep(0.1)
+    # Geç gelen küçük id kabul edilir, tekrar ve taban altı id gönderilmez
+    insert(hub, 102)
+    hub.publish([{'id': 103, 'title': 'haber 103'}, {'id': 99, 'title': 'eski'}])
+    time.sleep(0.1)
+    insert(hub, 104, 105)
+    insert(hub, 106, listener=False)  # Başka süreçte eklendi: takip sorgusuyla gelir
+    thread.join()
+
+    assert sorted(received) == [101, 102, 103, 104, 105, 106], received
+
+
+def test_resume(hub):
+    insert(hub, 101, 102, 103, 104, 105, 106)
+
+    assert [e['id'] for e in hub.resume(103)[0]] == [104, 105, 106]
+    assert [e['id'] for e in hub.resume(102)[0]] == [103, 104, 105, 106], \
+        "tampondan düşen aralık veritabanından tamamlanmalı"
+    insert(hub, 107, 108)
+    assert hub.resume(100)[0] is None, "tampondan uzun aralık reset istemeli"
+    events, seq = hub.resume(108)
+    assert events == [] and hub.wait_for_events(seq, timeout=0.05) == ([], seq)
+    assert hub.wait_for_events(0, timeout=0)[0] is None, "geride kalan abone reset istemeli"
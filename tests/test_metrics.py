@@ -0,0 +1,29 @@
+"""
+Prometheus metin biçimindeki ölçülerin testleri
+"""
+
+import pytest
+
+import metrics
+from metrics import Counter, Histogram
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    """Deneme ölçüleri uygulamanın kayıt defterine girmesin"""
+    monkeypatch.setattr(metrics, '_registry', [])
+
+
+def test_histogram_is_cumulative_and_labels_escaped():
+    hist = Histogram('test_seconds', 'deneme', ('path',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        hist.observe(value, 'a"b')
+    counter = Counter('test_total', 'deneme')
+    counter.inc(amount=3)
+
+    text = '\n'.join(hist.render() + counter.render())
+    assert 'test_seconds_bucket{path="a\\"b",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{path="a\\"b",le="1"} 3' in text
+    assert 'test_seconds_bucket{path="a\\"b",le="+Inf"} 4' in text
+    assert 'test_seconds_count{path="a\\"b"} 4' in text
+    assert 'test_total 3' in text
@@ -0,0 +1,30 @@
+"""
+Örnekleyen profilleyicinin testleri
+"""
+
+import threading
+
+from profiler import SamplingProfiler
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_busy_thread_hot_function_is_sampled():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name='update_test')
+    worker.start()
+    try:
+        profiler = SamplingProfiler(interval_ms=2)
+        profiler.start('ingest', duration=1)
+        profiler._thread.join()
+    finally:
+        stop.set()
+        worker.join()
+
+    top = profiler.top_frames(3)
+    assert profiler.status()['session']['samples'] > 50, profiler.status()
+    assert any('busy_loop' in line or '<genexpr>' in line for line, _, _ in top), top
+    assert all(line.startswith('update_test;') for line in profiler.collapsed().splitlines())
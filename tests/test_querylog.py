@@ -0,0 +1,35 @@
+"""
+Yavaş sorgu kaydının testleri
+"""
+
+import sqlite3
+
+import pytest
+
+import querylog
+from querylog import SlowQueryLog, TracedConnection
+
+
+@pytest.fixture
+def log(monkeypatch):
+    log = SlowQueryLog(threshold_ms=0.1)
+    monkeypatch.setattr(querylog, '_log', log)
+    return log
+
+
+def test_slow_query_recorded_with_fetch_time_and_plan(log):
+    conn = sqlite3.connect(':memory:', factory=TracedConnection)
+    conn.execute('CREATE TABLE t (a INTEGER, b TEXT)')
+    conn.executemany('INSERT INTO t VALUES (?, ?)', [(i, str(i)) for i in range(50000)])
+    cursor = conn.cursor()
+    cursor.execute('SELECT b, COUNT(*) FROM t WHERE a % ? = 0 GROUP BY b', (7,))
+    assert len(cursor.fetchall()) > 0
+    conn.execute('SELECT * FROM t WHERE b = ?', ('49999',)).fetchone()  # tükenmeden kapanır
+    conn.close()
+
+    top = log.top()
+    sqls = [entry['sql'] for entry in top]
+    assert any(s.startswith('SELECT b, COUNT(*)') for s in sqls), sqls
+    assert any(s.startswith('SELECT * FROM t WHERE b = ?') for s in sqls), sqls
+    grouped = next(e for e in top if e['sql'].startswith('SELECT b'))
+    assert any('SCAN' in line for line in grouped['plan']), grouped['plan']
@@ -0,0 +1,25 @@
+"""
+Seyrek komşu grafiklerinin testleri (kesin ve LSH)
+"""
+
+import pytest
+
+from clustering import radius_graph
+from lsh import lsh_radius_graph
+from vectors import tfidf_from_counts, vectorize_titles
+
+TITLES = [
+    'merkez bankası faiz kararını açıkladı',
+    'merkez bankası faiz kararını açıkladı',
+    'süper lig derbi maçı berabere bitti',
+]
+
+
+@pytest.mark.parametrize('build', [radius_graph, lsh_radius_graph], ids=['brute', 'lsh'])
+def test_identical_titles_stay_neighbours(build):
+    graph = build(tfidf_from_counts(vectorize_titles(TITLES)), 0.35)
+
+    # Mesafe 0 olan çift seyrek matriste saklı kalmalı, simetrik olmalı
+    assert graph[0, 1] > 0 and graph[1, 0] > 0
+    assert graph[0, 1] < 1e-9
+    assert graph[0, 2] == 0 and graph.nnz == 2
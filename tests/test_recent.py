@@ -0,0 +1,94 @@
+"""
+Son haberler tamponunun veritabanıyla tutarlılığı
+
+Başka bir bağlantıdan (ingest süreci gibi) yapılan eklemeler ve silmeler
+tampona en geç tail_seconds sonra yansımalıdır.
+"""
+
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from recent import FIELDS, RecentNewsBuffer, parse_utc
+
+TAIL_SECONDS = 0.2
+
+
+def insert_rows(path, count, start=0, now=None, seed=0):
+    """
+    Başka bir bağlantıdan haber ekle; created_at son 8 saate yayılır, pub_date
+    eklenmeden en fazla 10 dk önce veya yok
+    """
+    rng = random.Random(seed + start)
+    now = now or datetime.utcnow()
+    conn = sqlite3.connect(path)
+    rows = []
+    for i in range(start, start + count):
+        created = now - timedelta(seconds=(start + count - i) * 8 * 3600 // (start + count))
+        pub = None if i % 5 == 0 else created - timedelta(seconds=rng.randint(0, 600))
+        rows.append((
+            f'haber {i}', f'https://example.com/{i}', '', 'test',
+            pub.strftime('%Y-%m-%d %H:%M:%S') if pub else None,
+            created.strftime('%Y-%m-%d %H:%M:%S')
+        ))
+    conn.executemany(
+        'INSERT INTO news (title, link, description, source, pub_date, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+        rows
+    )
+    conn.commit()
+    conn.close()
+
+
+def db_rows(path):
+    """Tüm haberler, id'ye göre yeniden eskiye (tam tarama)"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    rows = [dict(row) for row in conn.execute(f'SELECT {", ".join(FIELDS)} FROM news ORDER BY id DESC')]
+    conn.close()
+    return rows
+
+
+@pytest.fixture
+def buffer(temp_db):
+    insert_rows(temp_db, 200)
+    buffer = RecentNewsBuffer(maxlen=500, tail_seconds=TAIL_SECONDS)
+    assert buffer.latest(500) == db_rows(temp_db)
+    return buffer
+
+
+def test_insert_from_other_connection_visible_within_tail(buffer, temp_db):
+    insert_rows(temp_db, 5, start=200)
+    time.sleep(TAIL_SECONDS)
+
+    assert buffer.latest(500) == db_rows(temp_db)
+    stats = buffer.get_stats()
+    assert stats['reloads'] == 1 and stats['tail_queries'] >= 1
+
+
+def test_deleted_row_triggers_reload(buffer, temp_db):
+    generation = buffer.version()[1]
+    conn = sqlite3.connect(temp_db)
+    conn.execute('DELETE FROM news WHERE id = 100')
+    conn.commit()
+    conn.close()
+    time.sleep(TAIL_SECONDS)
+
+    latest = buffer.latest(500)
+    assert buffer.get_stats()['reloads'] == 2
+    assert buffer.version()[1] == generation + 1
+    assert 100 not in {news['id'] for news in latest}
+    assert latest == db_rows(temp_db)
+
+
+@pytest.mark.parametrize('seconds', [900, 3600, 6 * 3600])
+def test_window_matches_full_scan(buffer, temp_db, seconds):
+    now = time.time()
+    fast = [news['id'] for _, news in buffer.window(seconds, now=now)]
+    slow = [
+        news['id'] for news in db_rows(temp_db)
+        if now - (parse_utc(news['pub_date']) or parse_utc(news['created_at'])) <= seconds
+    ]
+    assert slow and fast == slow
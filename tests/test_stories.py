@@ -0,0 +1,130 @@
+"""
+Çevrimiçi hikâye takibinin testleri (geçici veritabanında)
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+
+import database
+import stories
+from stories import StoryTracker
+
+# Aynı hikâyenin haberleri tek kelimeyle ayrılır
+BATCHES = [
+    [
+        'merkez bankası faiz kararını açıkladı',
+        'merkez bankası faiz kararını açıkladı bugün',
+        'süper lig derbi maçı berabere bitti',
+        'süper lig derbi maçı berabere bitti akşam',
+        'orman yangını kontrol altına alındı',
+    ],
+    [
+        'merkez bankası faiz kararını açıkladı sabah',
+        'süper lig derbi maçı berabere bitti dün',
+        'meteoroloji kuvvetli yağış uyarısı yaptı',
+    ],
+    [
+        'orman yangını kontrol altına alındı nihayet',
+        'meteoroloji kuvvetli yağış uyarısı yaptı yine',
+    ],
+]
+
+
+def insert_batch(titles):
+    """Haberleri ekle, id'leriyle döndür"""
+    last_id = database.get_max_news_id()
+    now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    database.insert_many_news([
+        {'title': title, 'link': f'https://example.com/{title}', 'description': '',
+         'source': 'test', 'pub_date': now}
+        for title in titles
+    ])
+    return database.get_news_after_id(last_id)
+
+
+def story_groups(ids):
+    """Aynı hikâyedeki başlık grupları"""
+    assignments = database.get_story_assignments(ids)
+    groups = {}
+    for news_id, assignment in assignments.items():
+        groups.setdefault(assignment['story_id'], set()).add(news_id)
+    return sorted(sorted(group) for group in groups.values())
+
+
+@pytest.fixture
+def fits(monkeypatch):
+    """fit_tfidf çağrılarını say"""
+    calls = []
+
+    def counting_fit(counts):
+        calls.append(counts.shape[0])
+        return fit_tfidf(counts)
+
+    fit_tfidf = stories.fit_tfidf
+    monkeypatch.setattr(stories, 'fit_tfidf', counting_fit)
+    return calls
+
+
+def test_batches_do_not_refit_window(temp_db, fits):
+    tracker = StoryTracker(eps=0.5)
+    first = insert_batch(BATCHES[0])
+    tracker.add_news(first)
+    fits_after_load = len(fits)
+
+    rows = list(first)
+    for titles in BATCHES[1:]:
+        batch = insert_batch(titles)
+        tracker.add_news(batch)
+        rows.extend(batch)
+
+    # Partiler saklanan IDF ile puanlanır; IDF yalnızca bakımda yenilenir
+    assert len(fits) == fits_after_load
+    assert tracker._matrix.shape[0] == len(rows)
+
+    by_title = {row['title']: row['id'] for row in rows}
+    groups = story_groups(list(by_title.values()))
+    for prefix in ('merkez bankası', 'süper lig', 'orman yangını', 'meteoroloji'):
+        ids = sorted(news_id for title, news_id in by_title.items() if title.startswith(prefix))
+        assert ids in groups, prefix
+
+    tracker._maintain()
+    assert len(fits) == fits_after_load + 1
+    assert story_groups(list(by_title.values())) == groups
+
+
+@pytest.mark.parametrize('taken_by', [None, 'memory', 'database'])
+def test_split_gets_unused_story_id(temp_db, monkeypatch, taken_by):
+    # Bakım yalnızca son iki haberi kümeler; ikisi aynı hikâyede ama benzemiyor
+    monkeypatch.setattr(stories, 'STORY_MAINTENANCE_LIMIT', 2)
+    titles = [
+        'orman yangını kontrol altına alındı',
+        'orman yangını kontrol altına alındı nihayet',
+        'merkez bankası faiz kararını açıkladı',
+        'süper lig derbi maçı berabere bitti',
+    ]
+    a, b, c, d = [row['id'] for row in insert_batch(titles)]
+
+    tracker = StoryTracker(eps=0.5)
+    tracker._loaded = True
+    tracker._append([a, b, c, d], titles, stories.vectorize_titles(titles), [time.time()] * 4)
+    # Bölünen parçanın tek adayı d; 'memory' durumunda d yaşayan bir hikâyenin id'si
+    older = d if taken_by == 'memory' else a
+    for news_id, story_id in ((a, older), (b, older), (c, c), (d, c)):
+        tracker._set_story(news_id, story_id)
+    if taken_by == 'database':
+        conn = database.get_connection()
+        conn.execute('INSERT INTO stories (id, title, member_count) VALUES (?, ?, 1)', (d, 'eski hikâye'))
+        conn.commit()
+        conn.close()
+
+    tracker._maintain()
+
+    assert tracker._story_of[c] == c
+    assert tracker._story_of[a] == tracker._story_of[b] == older
+    if taken_by is None:
+        assert tracker._story_of[d] == d
+    else:
+        # Kullanılmayan id yok: bölme yapılmaz, d başka bir hikâyeye katılmaz
+        assert tracker._story_of[d] == c
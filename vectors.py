@@ -0,0 +1,126 @@
+"""
+HaberMetrik - Haber Vektörleri
+
+Başlıkları durumsuz (stateless) bir HashingVectorizer ile vektörleştirir.
+Vektörler haber eklenirken bir kez hesaplanır ve news_vectors tablosunda
+sıkıştırılmış ikili (BLOB) olarak saklanır; clustering bunları id ile yükler
+ve yalnızca istek kümesine ait IDF ağırlıklandırmasını uygular.
+
+BLOB formatı: [uint32 sütun indeksleri][uint16 terim sayıları] (little-endian)
+
+Hash'in tersi olmadığı için tek kelimelik terimlerin sütunları ingest sırasında
+vector_terms tablosuna yazılır; küme anahtar kelimeleri buradan okunur.
+"""
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.utils import murmurhash3_32
+
+# Hash uzayı boyutu (çakışma olasılığı düşük, bellek sadece dolu hücreler kadar)
+N_FEATURES = 2 ** 20
+
+# TfidfVectorizer(ngram_range=(1, 2)) ile aynı tokenizasyon, sözlük yok
+_hasher = HashingVectorizer(
+    n_features=N_FEATURES,
+    ngram_range=(1, 2),
+    alternate_sign=False,
+    norm=None
+)
+_analyzer = _hasher.build_analyzer()
+
+
+def vectorize_titles(titles):
+    """
+    Başlıkları ham terim sayısı matrisine çevir
+
+    Returns:
+        scipy.sparse.csr_matrix (len(titles) x N_FEATURES)
+    """
+    return _hasher.transform(titles)
+
+
+def unigram_terms(titles):
+    """
+    Başlıklardaki tek kelimelik terimlerin hash sütunları
+
+    HashingVectorizer ile aynı analiz ve hash (murmurhash3, seed=0).
+
+    Returns:
+        {sütun indeksi: terim}
+    """
+    terms = {}
+    for title in titles:
+        for token in _analyzer(title):
+            if ' ' not in token:
+                terms[abs(murmurhash3_32(token, seed=0)) % N_FEATURES] = token
+    return terms
+
+
+def pack_vector(matrix, row):
+    """Matrisin bir satırını BLOB'a çevir"""
+    start, end = matrix.indptr[row], matrix.indptr[row + 1]
+    indices = matrix.indices[start:end].astype('<u4')
+    counts = np.minimum(matrix.data[start:end], 65535).astype('<u2')
+    return indices.tobytes() + counts.tobytes()
+
+
+def unpack_vectors(blobs):
+    """
+    BLOB listesini ham terim sayısı matrisine çevir
+
+    Returns:
+        scipy.sparse.csr_matrix (len(blobs) x N_FEATURES)
+    """
+    indptr = [0]
+    indices = []
+    data = []
+
+    for blob in blobs:
+        n = len(blob) // 6
+        indices.append(np.frombuffer(blob, dtype='<u4', count=n))
+        data.append(np.frombuffer(blob, dtype='<u2', count=n, offset=n * 4))
+        indptr.append(indptr[-1] + n)
+
+    if indices:
+        indices = np.concatenate(indices).astype(np.int32)
+        data = np.concatenate(data).astype(np.float64)
+    else:
+        indices = np.array([], dtype=np.int32)
+        data = np.array([], dtype=np.float64)
+
+    return sparse.csr_matrix(
+        (data, indices, np.array(indptr, dtype=np.int32)),
+        shape=(len(blobs), N_FEATURES)
+    )
+
+
+def tfidf_from_counts(counts):
+    """
+    Ham sayı matrisine istek kümesi üzerinden TF-IDF uygula
+
+    TfidfVectorizer varsayılanlarıyla aynı: smooth_idf, l2 normalizasyon.
+    """
+    return TfidfTransformer().fit_transform(counts)
+
+
+def fit_tfidf(counts):
+    """
+    IDF ağırlıklarını sayı matrisinden öğren (tfidf_from_counts ile aynı ayarlar)
+
+    Dönüştürücünün transform'u sonraki satırları aynı IDF ile ağırlıklandırıp
+    l2 normalize eder; pencereyi her partide yeniden öğrenmek gerekmez.
+    """
+    return TfidfTransformer().fit(counts)
+
+
+def distance_graph(rows, cols, sims, n):
+    """
+    Benzerlik çiftlerinden seyrek kosinüs mesafe matrisi
+    (DBSCAN metric='precomputed'; radius_graph ve lsh_radius_graph ortak)
+
+    Özdeş başlıkların mesafesi 0'dır; seyrek matriste saklanmayan hücre
+    "komşu değil" sayılacağı için çok küçük pozitif bir değere yükseltilir.
+    """
+    distances = np.maximum(1.0 - sims, 1e-12)
+    return sparse.csr_matrix((distances, (rows, cols)), shape=(n, n))